@@ -0,0 +1,354 @@
+"""
+Which backend draws Dream Table fastest?
+
+Replays the same scenes (recorded input, frame by frame) on each backend that's
+installed, and reports how long each frame took to process, draw and show. Each
+scene runs in a fresh interpreter, starting from a fully started up board, with
+vsync and frame limits off.
+
+The built-in scenes are scripted; --record saves a scene from a real session
+instead, to replay later with --scene:
+
+    python benchmarks/backends.py --record doodle.json --backend pyray
+    python benchmarks/backends.py --scene doodle.json
+
+Usage (with dreamtable importable, e.g. after `pip install -e .`):
+
+    python benchmarks/backends.py [--backend NAME ...] [--scene FILE ...]
+"""
+
+import argparse
+import dataclasses
+import importlib
+import importlib.util
+import json
+import random
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type
+
+from dreamtable import components as c
+from dreamtable.hal import (
+    InputEvent,
+    Key,
+    KeyPressed,
+    KeyReleased,
+    MouseButton,
+    MouseButtonPressed,
+    MouseButtonReleased,
+    MouseMoved,
+    MouseWheelMoved,
+    Vec2,
+)
+from dreamtable.hal.input import InputQueue
+
+# name: (module, class, constructor arguments, module it needs installed)
+BACKENDS: Dict[str, Tuple[str, str, Dict[str, Any], str]] = {
+    "software": ("dreamtable.hal.software", "SoftwareHAL", {}, "numpy"),
+    "pyray": ("dreamtable.hal.pyray", "PyRayHAL", {"target_fps": 0}, "raylib"),
+    "pysdl2": ("dreamtable.hal.pysdl2", "PySDL2HAL", {"vsync": False}, "sdl2"),
+}
+
+EVENT_TYPES: Dict[str, Type[Any]] = {
+    t.__name__: t
+    for t in (
+        KeyPressed,
+        KeyReleased,
+        MouseButtonPressed,
+        MouseButtonReleased,
+        MouseMoved,
+        MouseWheelMoved,
+    )
+}
+
+# A scene is the input events for each frame, in order
+Scene = List[List[InputEvent]]
+
+# Where the board is on screen at startup: the world camera is centered on
+# the origin at 4x, and the palette canvas (128x8) sits at the origin
+SCREEN_CENTER = Vec2(400, 300)
+WORLD_ZOOM = 4
+
+
+# Built-in scenes
+
+
+def _move(queue: InputQueue, position: Vec2) -> List[InputEvent]:
+    """Events for moving the mouse to `position`, in `queue`'s state."""
+    before = len(queue.events)
+    queue.move_mouse(position)
+    return queue.events[before:]
+
+
+def _press(queue: InputQueue, event: InputEvent) -> List[InputEvent]:
+    queue.push(event)
+    return [event]
+
+
+def idle() -> Iterator[List[InputEvent]]:
+    """Nothing happening: the cost of redrawing an unchanged board."""
+    for _ in range(120):
+        yield []
+
+
+def pan() -> Iterator[List[InputEvent]]:
+    """Drag the board around with the middle mouse button."""
+    queue = InputQueue()
+    yield _move(queue, SCREEN_CENTER)
+    yield _press(queue, MouseButtonPressed(MouseButton.MIDDLE, queue.mouse_position))
+    for i in range(120):
+        step = Vec2(4, 2) if i < 60 else Vec2(-4, -2)
+        yield _move(queue, queue.mouse_position + step)
+    yield _press(queue, MouseButtonReleased(MouseButton.MIDDLE, queue.mouse_position))
+
+
+def zoom() -> Iterator[List[InputEvent]]:
+    """Zoom all the way in on the board, and back out."""
+    queue = InputQueue()
+    yield _move(queue, SCREEN_CENTER)
+    for i in range(120):
+        if i % 4 == 0:
+            yield [MouseWheelMoved(1 if i < 60 else -1)]
+        else:
+            yield []
+
+
+def draw() -> Iterator[List[InputEvent]]:
+    """Scribble back and forth across the canvas with the pencil."""
+    queue = InputQueue()
+    yield _press(queue, KeyPressed(Key.W))
+    yield _press(queue, KeyReleased(Key.W))
+
+    left = SCREEN_CENTER + Vec2(2, 2)
+    width, height = 128 * WORLD_ZOOM - 4, 8 * WORLD_ZOOM - 4
+    yield _move(queue, left)
+    yield _press(queue, MouseButtonPressed(MouseButton.LEFT, queue.mouse_position))
+    for i in range(120):
+        x = (i % 40) / 40 * width
+        if i // 40 % 2:
+            x = width - x
+        yield _move(queue, left + Vec2(x, i % 8 / 8 * height))
+    yield _press(queue, MouseButtonReleased(MouseButton.LEFT, queue.mouse_position))
+
+
+def hatch() -> Iterator[List[InputEvent]]:
+    """Lay a clutch of eggs, and watch the tiny friends hatch and wander."""
+    queue = InputQueue()
+    yield _press(queue, KeyPressed(Key.U))
+    yield _press(queue, KeyReleased(Key.U))
+
+    for i in range(60):
+        position = SCREEN_CENTER + Vec2(i % 10 * 30 - 150, i // 10 * 30 - 120)
+        yield _move(queue, position)
+        yield _press(queue, MouseButtonPressed(MouseButton.LEFT, position))
+        yield _press(queue, MouseButtonReleased(MouseButton.LEFT, position))
+    for _ in range(600):
+        yield []
+
+
+SCENES = {scene.__name__: scene for scene in (idle, pan, zoom, draw, hatch)}
+
+
+# Saving and loading scenes
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, Vec2):
+        return [value.x, value.y]
+    if isinstance(value, (Key, MouseButton)):
+        return value.name
+    return value
+
+
+def _decode_value(name: str, value: Any) -> Any:
+    if name == "key":
+        return Key[value]
+    if name == "button":
+        return MouseButton[value]
+    if name in ("position", "delta"):
+        return Vec2(*value)
+    return value
+
+
+def encode_scene(scene: Scene) -> List[List[Dict[str, Any]]]:
+    return [
+        [
+            {
+                "type": type(event).__name__,
+                **{
+                    field.name: _encode_value(getattr(event, field.name))
+                    for field in dataclasses.fields(event)
+                },
+            }
+            for event in events
+        ]
+        for events in scene
+    ]
+
+
+def decode_scene(data: List[List[Dict[str, Any]]]) -> Scene:
+    scene = []
+    for events in data:
+        frame = []
+        for event in events:
+            fields = dict(event)
+            event_type = EVENT_TYPES[fields.pop("type")]
+            frame.append(
+                event_type(**{k: _decode_value(k, v) for k, v in fields.items()})
+            )
+        scene.append(frame)
+    return scene
+
+
+# Running Dream Table on a backend (in the child interpreter)
+
+
+def _hal_class(backend: str) -> Tuple[Type[Any], Dict[str, Any]]:
+    module, name, kwargs, _ = BACKENDS[backend]
+    return getattr(importlib.import_module(module), name), kwargs
+
+
+def _is_starting_up(world: Any) -> bool:
+    starting = any(type(p).__name__ == "StartupController" for p in world._processors)
+    loading = any(not img.image for _, img in world.get_component(c.Image))
+    return starting or loading
+
+
+def replay(backend: str, scene: Scene) -> List[float]:
+    """Run Dream Table on `backend`, replaying `scene`; the time of each frame."""
+    import dreamtable.app as app
+
+    hal_class, kwargs = _hal_class(backend)
+    frame_times: List[float] = []
+
+    class ReplayHAL(hal_class):  # type: ignore
+        def run(self, world: Any) -> None:
+            # Start from the same place on every backend: fully started up,
+            # and settled
+            while _is_starting_up(world):
+                self._input.begin_frame()
+                self.draw_frame(world)
+            for _ in range(10):
+                self._input.begin_frame()
+                self.draw_frame(world)
+
+            for events in scene:
+                self._input.begin_frame()
+                for event in events:
+                    self._input.push(event)
+                start = time.perf_counter()
+                self.draw_frame(world)
+                frame_times.append(time.perf_counter() - start)
+
+    random.seed(0)
+    app.run(ReplayHAL(**kwargs))
+    return frame_times
+
+
+def record(backend: str) -> Scene:
+    """Run Dream Table on `backend` as usual, recording the input."""
+    import dreamtable.app as app
+
+    # As it would normally run, frame limits and all
+    hal_class, _ = _hal_class(backend)
+    scene: Scene = []
+
+    class RecordingQueue(InputQueue):
+        def begin_frame(self) -> None:
+            super().begin_frame()
+            scene.append([])
+
+        def push(self, event: InputEvent) -> None:
+            super().push(event)
+            scene[-1].append(event)
+
+    hal = hal_class()
+    hal._input = RecordingQueue()
+    app.run(hal)
+    # Drop the frames spent starting up, before any input arrived
+    while scene and not scene[0]:
+        scene.pop(0)
+    return scene
+
+
+# Running the benchmark (in the parent)
+
+
+def is_available(backend: str) -> bool:
+    return importlib.util.find_spec(BACKENDS[backend][3]) is not None
+
+
+def run_child(backend: str, scene: Scene) -> Optional[List[float]]:
+    result = subprocess.run(
+        [sys.executable, __file__, "--child", backend],
+        input=json.dumps(encode_scene(scene)),
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode:
+        print(result.stderr, file=sys.stderr)
+        return None
+    return json.loads(result.stdout.splitlines()[-1])  # type: ignore
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--backend", action="append", choices=BACKENDS, help="default: all"
+    )
+    parser.add_argument(
+        "--scene",
+        action="append",
+        help=f"a built-in scene ({', '.join(SCENES)}) or a recorded scene file;"
+        " default: all built-in scenes",
+    )
+    parser.add_argument("--record", metavar="FILE", help="record a scene to FILE")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        scene = decode_scene(json.load(sys.stdin))
+        print(json.dumps(replay(args.child, scene)))
+        return
+
+    if args.record:
+        backend = (args.backend or ["pyray"])[0]
+        scene = record(backend)
+        with open(args.record, "w") as file:
+            json.dump(encode_scene(scene), file)
+        print(f"Recorded {len(scene)} frames to {args.record}")
+        return
+
+    scenes: Dict[str, Scene] = {}
+    for name in args.scene or SCENES:
+        if name in SCENES:
+            scenes[name] = list(SCENES[name]())
+        else:
+            with open(name) as file:
+                scenes[name] = decode_scene(json.load(file))
+
+    backends = args.backend or list(BACKENDS)
+    for backend in backends:
+        if not is_available(backend):
+            print(f"{backend}: not installed, skipping")
+    backends = [b for b in backends if is_available(b)]
+
+    print(f"{'scene':12} {'backend':10} {'median':>9} {'p95':>9} {'fps':>7}")
+    for name, scene in scenes.items():
+        for backend in backends:
+            frame_times = run_child(backend, scene)
+            if not frame_times:
+                print(f"{name:12} {backend:10} {'failed':>9}")
+                continue
+            median = statistics.median(frame_times)
+            p95 = statistics.quantiles(frame_times, n=20)[-1]
+            print(
+                f"{name:12} {backend:10} {median * 1000:7.2f}ms {p95 * 1000:7.2f}ms"
+                f" {1 / median:7.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
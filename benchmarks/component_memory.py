@@ -0,0 +1,73 @@
+"""
+How much memory does an entity's worth of components take?
+
+Creates a lot of entities shaped like the tiny friends that hatch from eggs
+(the most numerous thing on a busy board), and reports the memory allocated per
+entity, as seen by tracemalloc.
+
+Usage (with dreamtable importable, e.g. after `pip install -e .`):
+
+    python benchmarks/component_memory.py [COUNT]
+"""
+
+import gc
+import sys
+import tracemalloc
+from typing import Any, Callable, List
+
+import esper
+
+from dreamtable import components as c
+from dreamtable.hal import Vec2
+
+
+def friend_components(i: int) -> List[Any]:
+    return [
+        c.Name("A tiny friend"),
+        c.Position(Vec2(i % 1000 * 16, i // 1000 * 16)),
+        c.Extent(Vec2(16, 16)),
+        c.Draggable(),
+        c.Hoverable(),
+        c.Selectable(),
+        c.Deletable(),
+        c.Image("res://sprites/16x16babies.png"),
+        c.SpriteRegion(88, 65),
+        c.Animation(0, Vec2(i % 4 * 64, 0)),
+        c.Velocity(friction=0.8),
+        c.Wandering(force=2.0),
+        c.TinyFriend(type=i % 4),
+    ]
+
+
+def measure(count: int, build: Callable[[int], Any]) -> float:
+    """Bytes allocated per item by build(), keeping everything alive."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    keep = build(count)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del keep
+    return (after - before) / count
+
+
+def build_components(count: int) -> Any:
+    return [friend_components(i) for i in range(count)]
+
+
+def build_world(count: int) -> Any:
+    world = esper.World()
+    for i in range(count):
+        world.create_entity(*friend_components(i))
+    return world
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(f"Python {sys.version.split()[0]}, {count} entities")
+    print(f"  components only:     {measure(count, build_components):7.0f} B/entity")
+    print(f"  in an esper.World:   {measure(count, build_world):7.0f} B/entity")
+
+
+if __name__ == "__main__":
+    main()
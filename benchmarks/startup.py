@@ -0,0 +1,145 @@
+"""
+How long does it take to get the first frame on screen?
+
+Starts Dream Table in a fresh interpreter (so nothing is imported yet) on the
+debug HAL, and reports how long it took to import dreamtable.app, to finish the
+first frame, and to finish starting up: every processor added and every image
+loaded. Each run is repeated and the medians are reported. With --importtime,
+also lists the slowest imports up to the first frame, as reported by
+`python -X importtime`.
+
+The debug HAL doesn't draw anything, or import a graphics library, so this
+measures Dream Table's own share of startup.
+
+Usage (with dreamtable importable, e.g. after `pip install -e .`):
+
+    python benchmarks/startup.py [--runs N] [--importtime]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+# Runs in the child interpreter; prints its timings as JSON
+CHILD = """
+import json, sys, time
+
+start = time.perf_counter()
+import dreamtable.app as app
+imported = time.perf_counter()
+
+from dreamtable import components as c
+from dreamtable.hal.debug import DebugHAL
+
+timings = {"import": imported - start}
+
+
+class StartupHAL(DebugHAL):
+    def run(self, world):
+        frames = 0
+        while True:
+            frames += 1
+            self._input.begin_frame()
+            world.process(self)
+            if frames == 1:
+                timings["first_frame"] = time.perf_counter() - start
+                timings["modules_at_first_frame"] = len(sys.modules)
+            starting = any(
+                type(p).__name__ == "StartupController" for p in world._processors
+            )
+            loading = any(
+                not img.image for _, img in world.get_component(c.Image)
+            )
+            if not (starting or loading):
+                break
+        timings["ready"] = time.perf_counter() - start
+        timings["ready_frames"] = frames
+        timings["modules_at_ready"] = len(sys.modules)
+
+
+app.run(StartupHAL())
+print(json.dumps(timings))
+"""
+
+# Stops the child right after its first frame, for -X importtime
+FIRST_FRAME_ONLY = """
+import dreamtable.app as app
+from dreamtable.hal.debug import DebugHAL
+
+
+class FirstFrameHAL(DebugHAL):
+    def run(self, world):
+        self._input.begin_frame()
+        world.process(self)
+
+
+app.run(FirstFrameHAL())
+"""
+
+
+def run_once() -> Dict[str, float]:
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD], check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def slowest_imports(count: int) -> List[Tuple[int, int, str]]:
+    """(self µs, cumulative µs, module) of the slowest imports."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", FIRST_FRAME_ONLY],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stderr
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        prefix = len("import time:")
+        self_us, cumulative_us, module = line[prefix:].split("|")
+        imports.append((int(self_us), int(cumulative_us), module.rstrip()))
+    imports.sort(key=lambda i: i[0], reverse=True)
+    return imports[:count]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--importtime", action="store_true")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    runs = [run_once() for _ in range(args.runs)]
+    elapsed = time.perf_counter() - start
+
+    def median(key: str) -> float:
+        return statistics.median(run[key] for run in runs)
+
+    print(f"{args.runs} runs in {elapsed:.1f}s, medians:")
+    print(f"  import dreamtable.app  {median('import') * 1000:8.1f} ms")
+    print(
+        f"  first frame            {median('first_frame') * 1000:8.1f} ms"
+        f"  ({median('modules_at_first_frame'):.0f} modules imported)"
+    )
+    print(
+        f"  ready                  {median('ready') * 1000:8.1f} ms"
+        f"  ({median('modules_at_ready'):.0f} modules imported,"
+        f" {median('ready_frames'):.0f} frames)"
+    )
+
+    if args.importtime:
+        print()
+        print("slowest imports up to the first frame (self time):")
+        for self_us, cumulative_us, module in slowest_imports(15):
+            print(
+                f"  {self_us / 1000:7.1f} ms  {cumulative_us / 1000:7.1f} ms  {module}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,121 @@
+from typing import List, Optional, Tuple, Type
+
 import esper
 
 from dreamtable import components as c
 from dreamtable import processors as p
-from dreamtable.constants import PositionSpace, Tool
-from dreamtable.hal import Camera, Color, Vec2
+from dreamtable.constants import Phase, PositionSpace, Tool
+from dreamtable.hal import HAL, Camera, Color, Vec2
+from dreamtable.processors.controllers.startup import StartupStep
+from dreamtable.world import World
 
-from dreamtable.hal.pyray import PyRayHAL
+# Processors are added a phase at a time, in this order, while starting up.
+# Processors are named rather than imported here, so that each module is only
+# imported once the window is up (see processors/__init__.py).
+PROCESSORS: List[Tuple[Phase, List[str]]] = [
+    (
+        Phase.UPDATE,
+        [
+            # global state and input
+            "CameraContextController",
+            "HoverController",
+            "InputRouterController",
+            # controllers
+            "ToolSwitcherController",
+            "PencilToolController",
+            "BrushToolController",
+            "DropperToolController",
+            "GridToolController",
+            "EggToolController",
+            "DragController",
+            "BoxSelectionController",
+            "AutotileController",
+            "MagnifierController",
+            "PaletteController",
+            "ImageController",
+            "CanvasExportController",
+            "CameraController",
+        ],
+    ),
+    (
+        Phase.SIMULATE,
+        [
+            "MotionController",
+            "WanderingController",
+            "EggTimerController",
+            "TinyFriendController",
+            "AnimationController",
+        ],
+    ),
+    (
+        Phase.RENDER,
+        [
+            # must come first: works out what's in view
+            "VisibilityController",
+            "TextureResidencyController",
+            # renderers (world)
+            "BackgroundGridRenderer",
+            "PositionMarkerRenderer",
+            "CanvasRenderer",
+            "TilemapRenderer",
+            "SpriteRegionRenderer",
+            "DebugEntityRenderer",
+            # renderers (ui)
+            "BoxSelectionRenderer",
+            "ButtonRenderer",
+            "DropperToolRenderer",
+            "PencilToolRenderer",
+            "GridToolRenderer",
+            # these must come last: draw the world as recorded above
+            "ViewportRenderer",
+            "CommandBufferRenderer",
+        ],
+    ),
+    (
+        Phase.CLEANUP,
+        [
+            "TextCacheController",
+            "SelectableDeleteController",
+            "DeletionController",
+            "CanvasPagerController",
+        ],
+    ),
+]
 
-# from dreamtable.hal.pysdl2 import PySDL2HAL
 
+def add_processors(world: World, phase: Phase, names: List[str]) -> StartupStep:
+    """A startup step that adds the named processors to a phase."""
 
-def run() -> None:
-    hal = PyRayHAL()
-    # hal = PySDL2HAL()
-    hal.init_window(800, 600, "Dream Table")
+    def step(hal: HAL) -> None:
+        for name in names:
+            processor_class: Type[esper.Processor] = getattr(p, name)
+            world.add_processor(processor_class(), phase=phase)
+
+    return step
+
+
+def run(hal: Optional[HAL] = None) -> None:
+    """
+    Open a window and run Dream Table in it.
 
-    font = hal.load_font("res://fonts/alpha_beta.png")
+    Only what it takes to show the first frame happens before the main loop
+    starts. Everything else is left to the StartupController: the font loads
+    on the next frame, then the processors are imported and added one phase
+    per frame. Images only have a filename to begin with, and the
+    ImageController loads them a few at a time once it's running.
+    """
+    if hal is None:
+        # Importing pyray loads raylib, which takes a while
+        from dreamtable.hal.pyray import PyRayHAL
 
-    img_sweetie = hal.load_image("res://palettes/sweetie-16-8x.png")
-    img_hand = hal.load_image("res://icons/hand.png")
-    img_pencil = hal.load_image("res://icons/pencil.png")
-    img_dropper = hal.load_image("res://icons/dropper.png")
-    img_grid = hal.load_image("res://icons/grid.png")
-    img_cellref = hal.load_image("res://icons/cellref.png")
-    img_cellref_dropper = hal.load_image("res://icons/cellref_dropper.png")
-    img_egg = hal.load_image("res://icons/egg.png")
+        hal = PyRayHAL()
+        # from dreamtable.hal.pysdl2 import PySDL2HAL
+        # hal = PySDL2HAL()
+    hal.init_window(800, 600, "Dream Table")
 
-    world = esper.World()
+    world = World()
     world.context = c.WorldContext(
-        cameras={PositionSpace.SCREEN: Camera(zoom=3)}, theme=c.Theme(font=font),
+        cameras={PositionSpace.SCREEN: Camera(zoom=3)}, theme=c.Theme(font=None),
     )
 
     hal.set_clear_color(Color(0, 0, 0, 255))
@@ -62,6 +149,14 @@ def run() -> None:
         c.Selectable(),
     )
 
+    # an overview of the area around the origin
+    world.create_entity(
+        c.Name("Overview"),
+        c.Position(Vec2(2, 14), space=PositionSpace.SCREEN),
+        c.Extent(Vec2(80, 60)),
+        c.Viewport(camera=Camera(zoom=0.5)),
+    )
+
     # debug: a draggable to drag around (world space)
     world.create_entity(
         c.Name("Draggable"),
@@ -73,13 +168,14 @@ def run() -> None:
         c.Selectable(),
     )
 
-    # debug: a canvas with a preloaded palette image
+    # debug: a canvas with a palette image
     world.create_entity(
         c.Name("Sweetie 16"),
         c.Canvas(),
         c.Position(),
-        c.Extent(hal.get_image_size(img_sweetie)),
-        c.Image(img_sweetie),
+        c.Extent(),  # sized once the image loads
+        c.Image(None, filename="res://palettes/sweetie-16-8x.png"),
+        c.Palette(),
         c.Draggable(),
         c.Hoverable(),
         c.Selectable(),
@@ -94,7 +190,7 @@ def run() -> None:
         c.ToolSwitcher(Tool.MOVE),
         c.Position(Vec2(2 + 8 * 0, 2), space=PositionSpace.SCREEN),
         c.Extent(Vec2(8, 8)),
-        c.Image(img_hand),
+        c.Image(None, filename="res://icons/hand.png"),
         c.Hoverable(),
     )
     world.create_entity(
@@ -103,7 +199,7 @@ def run() -> None:
         c.ToolSwitcher(Tool.PENCIL),
         c.Position(Vec2(2 + 8 * 1, 2), space=PositionSpace.SCREEN),
         c.Extent(Vec2(8, 8)),
-        c.Image(img_pencil),
+        c.Image(None, filename="res://icons/pencil.png"),
         c.Hoverable(),
     )
     world.create_entity(
@@ -112,7 +208,7 @@ def run() -> None:
         c.ToolSwitcher(Tool.DROPPER),
         c.Position(Vec2(2 + 8 * 2, 2), space=PositionSpace.SCREEN),
         c.Extent(Vec2(8, 8)),
-        c.Image(img_dropper),
+        c.Image(None, filename="res://icons/dropper.png"),
         c.Hoverable(),
     )
     world.create_entity(
@@ -121,7 +217,7 @@ def run() -> None:
         c.ToolSwitcher(Tool.GRID),
         c.Position(Vec2(2 + 8 * 3, 2), space=PositionSpace.SCREEN),
         c.Extent(Vec2(8, 8)),
-        c.Image(img_grid),
+        c.Image(None, filename="res://icons/grid.png"),
         c.Hoverable(),
     )
     world.create_entity(
@@ -130,7 +226,7 @@ def run() -> None:
         c.ToolSwitcher(Tool.CELLREF),
         c.Position(Vec2(2 + 8 * 4, 2), space=PositionSpace.SCREEN),
         c.Extent(Vec2(8, 8)),
-        c.Image(img_cellref),
+        c.Image(None, filename="res://icons/cellref.png"),
         c.Hoverable(),
     )
     world.create_entity(
@@ -139,7 +235,7 @@ def run() -> None:
         c.ToolSwitcher(Tool.CELLREF_DROPPER),
         c.Position(Vec2(2 + 8 * 5, 2), space=PositionSpace.SCREEN),
         c.Extent(Vec2(8, 8)),
-        c.Image(img_cellref_dropper),
+        c.Image(None, filename="res://icons/cellref_dropper.png"),
         c.Hoverable(),
     )
     world.create_entity(
@@ -148,47 +244,19 @@ def run() -> None:
         c.ToolSwitcher(Tool.EGG),
         c.Position(Vec2(2 + 8 * 6, 2), space=PositionSpace.SCREEN),
         c.Extent(Vec2(8, 8)),
-        c.Image(img_egg),
+        c.Image(None, filename="res://icons/egg.png"),
         c.Hoverable(),
     )
 
-    # Register controllers and renderers (flavors of processors)
-    for processor_class in [
-        # global state and input
-        p.CameraContextController,
-        # controllers
-        p.ToolSwitcherController,
-        p.PencilToolController,
-        p.DropperToolController,
-        p.GridToolController,
-        p.EggToolController,
-        p.DragController,
-        p.HoverController,
-        p.BoxSelectionController,
-        p.ImageController,
-        p.CanvasExportController,
-        p.CameraController,
-        p.MotionController,
-        p.WanderingController,
-        p.EggTimerController,
-        p.TinyFriendController,
-        # renderers (world)
-        p.BackgroundGridRenderer,
-        p.PositionMarkerRenderer,
-        p.CanvasRenderer,
-        p.SpriteRegionRenderer,
-        p.DebugEntityRenderer,
-        # renderers (ui)
-        p.BoxSelectionRenderer,
-        p.ButtonRenderer,
-        p.DropperToolRenderer,
-        p.PencilToolRenderer,
-        p.GridToolRenderer,
-        # cleanup
-        p.SelectableDeleteController,
-        p.CanvasDeleteController,
-        p.FinalDeleteController,
-    ]:
-        world.add_processor(processor_class())
+    def load_font(hal: HAL) -> None:
+        world.context.theme.font = hal.load_font("res://fonts/alpha_beta.png")
+
+    # Register controllers and renderers (flavors of processors), by phase.
+    # UPDATE goes first, so that the global state later phases rely on is
+    # ready by the time they're added.
+    steps = [load_font]
+    for phase, names in PROCESSORS:
+        steps.append(add_processors(world, phase, names))
+    world.add_processor(p.StartupController(steps), phase=Phase.UPDATE)
 
     hal.run(world)
@@ -0,0 +1,152 @@
+"""
+Autotiling: generating tile sets with a tile for every combination of
+neighbours a tile can have, and picking the right one for each tile of a map.
+
+Both work on whole arrays at a time, so retiling a map takes a handful of
+NumPy operations however many tiles it has.
+"""
+
+from functools import lru_cache
+import math
+
+import numpy as np
+
+from dreamtable.constants import Autotiling
+
+# Neighbour bits, clockwise from the top
+N, NE, E, SE, S, SW, W, NW = (1 << i for i in range(8))
+
+# (bit, rows down, columns right) of each neighbour
+NEIGHBOURS = (
+    (N, -1, 0),
+    (NE, -1, 1),
+    (E, 0, 1),
+    (SE, 1, 1),
+    (S, 1, 0),
+    (SW, 1, -1),
+    (W, 0, -1),
+    (NW, -1, -1),
+)
+
+# The cells a tile set is generated from, in the order they're taken from the
+# source: a tile on its own, a piece of a horizontal run, a piece of a vertical
+# run, a tile surrounded on all four sides but not on its corners, and one
+# surrounded entirely. Each quarter of a generated tile is copied from the same
+# quarter of one of them, depending on the neighbours on that quarter's side.
+ISOLATED, HORIZONTAL, VERTICAL, INNER_CORNERS, FILLED = range(5)
+SOURCE_CELLS = 5
+
+# How many tiles across generated tile sets are
+COLUMNS = {Autotiling.WANG: 4, Autotiling.BLOB: 8}
+
+
+def reduce(bits: np.ndarray, kind: Autotiling) -> np.ndarray:
+    """Drop the neighbour bits that don't change which tile is used."""
+    reduced = bits & (N | E | S | W)
+    if kind is Autotiling.BLOB:
+        for corner, vertical, horizontal in (
+            (NE, N, E),
+            (SE, S, E),
+            (SW, S, W),
+            (NW, N, W),
+        ):
+            both = vertical | horizontal | corner
+            reduced |= ((bits & both) == both) * np.uint8(corner)
+    return reduced
+
+
+@lru_cache(maxsize=None)
+def tile_masks(kind: Autotiling) -> np.ndarray:
+    """The neighbour bits of each tile in a generated tile set, in order."""
+    return np.unique(reduce(np.arange(256, dtype=np.uint8), kind))
+
+
+@lru_cache(maxsize=None)
+def lookup_table(kind: Autotiling) -> np.ndarray:
+    """For each of the 256 combinations of neighbour bits, the tile to use."""
+    return np.searchsorted(
+        tile_masks(kind), reduce(np.arange(256, dtype=np.uint8), kind)
+    )
+
+
+def neighbour_bits(mask: np.ndarray) -> np.ndarray:
+    """For each tile of a bool mask, which of its neighbours are set."""
+    rows, columns = mask.shape
+    padded = np.pad(mask, 1)
+    bits = np.zeros(mask.shape, np.uint8)
+    for bit, down, right in NEIGHBOURS:
+        bits |= padded[
+            slice(1 + down, 1 + down + rows),
+            slice(1 + right, 1 + right + columns),
+        ] * np.uint8(bit)
+    return bits
+
+
+def autotile(mask: np.ndarray, kind: Autotiling) -> np.ndarray:
+    """
+    The tile for each tile of a bool mask, as an index into a tile set
+    generated for `kind`; -1 where the mask isn't set.
+    """
+    tiles = lookup_table(kind)[neighbour_bits(mask)]
+    tiles[~mask] = -1
+    return tiles
+
+
+def mask_from_pixels(pixels: np.ndarray) -> np.ndarray:
+    """Where an image has been painted: the pixels that are bright and opaque."""
+    return (pixels[..., :3].max(axis=2) >= 128) & (pixels[..., 3] >= 128)
+
+
+def split_cells(pixels: np.ndarray, columns: int, rows: int) -> np.ndarray:
+    """An image's cells, by row, as a (cells, height, width, 4) array."""
+    height, width = pixels.shape[0] // rows, pixels.shape[1] // columns
+    return (
+        pixels[: rows * height, : columns * width]
+        .reshape(rows, height, columns, width, 4)
+        .swapaxes(1, 2)
+        .reshape(rows * columns, height, width, 4)
+    )
+
+
+def generate(cells: np.ndarray, kind: Autotiling) -> np.ndarray:
+    """
+    A tile set for `kind`, from the SOURCE_CELLS cells it's made from (as
+    returned by split_cells()). The tiles are in tile_masks() order, by row,
+    COLUMNS[kind] tiles across.
+    """
+    _, height, width, _ = cells.shape
+    masks = tile_masks(kind)
+    tiles = np.zeros((len(masks), height, width, 4), np.uint8)
+
+    top, left = height // 2, width // 2
+    for vertical, horizontal, corner, rows, columns in (
+        (N, W, NW, slice(0, top), slice(0, left)),
+        (N, E, NE, slice(0, top), slice(left, width)),
+        (S, W, SW, slice(top, height), slice(0, left)),
+        (S, E, SE, slice(top, height), slice(left, width)),
+    ):
+        has_vertical = (masks & vertical) != 0
+        has_horizontal = (masks & horizontal) != 0
+        # Wang tiles don't care about corners, so they're always filled in
+        has_corner = ((masks & corner) != 0) | (kind is Autotiling.WANG)
+        source = np.select(
+            [
+                ~has_horizontal & ~has_vertical,
+                has_horizontal & ~has_vertical,
+                ~has_horizontal & has_vertical,
+                ~has_corner,
+            ],
+            [ISOLATED, HORIZONTAL, VERTICAL, INNER_CORNERS],
+            FILLED,
+        )
+        tiles[:, rows, columns] = cells[source][:, rows, columns]
+
+    tiles_across = COLUMNS[kind]
+    tiles_down = math.ceil(len(masks) / tiles_across)
+    sheet = np.zeros((tiles_down * tiles_across, height, width, 4), np.uint8)
+    sheet[: len(masks)] = tiles
+    return (
+        sheet.reshape(tiles_down, tiles_across, height, width, 4)
+        .swapaxes(1, 2)
+        .reshape(tiles_down * height, tiles_across * width, 4)
+    )
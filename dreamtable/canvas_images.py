@@ -0,0 +1,49 @@
+"""
+Which Image each Canvas shows: its own, or for a Magnifier, its source's.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import esper
+
+from dreamtable import components as c
+
+
+class CanvasImages:
+    """
+    The entity and Image that each entity with an Image, or a Magnifier of
+    one, shows. Only worked out again once the Image or Magnifier queries
+    change, so it's cheap to bring up to date every frame.
+    """
+
+    def __init__(self) -> None:
+        self.images: Dict[int, Tuple[int, c.Image]] = {}
+
+        # Magnifiers whose source is gone
+        self.orphans: List[int] = []
+
+        self._image_source: Optional[List[Any]] = None
+        self._magnifier_source: Optional[List[Any]] = None
+
+    def update(self, world: esper.World) -> None:
+        image_query = world.get_component(c.Image)
+        magnifier_query = world.get_component(c.Magnifier)
+        if (
+            image_query is self._image_source
+            and magnifier_query is self._magnifier_source
+        ):
+            return
+        self._image_source = image_query
+        self._magnifier_source = magnifier_query
+
+        self.images = {ent: (ent, img) for ent, img in image_query}
+        self.orphans = []
+        for ent, mag in magnifier_query:
+            found = self.images.get(mag.source)
+            if found is None:
+                self.orphans.append(ent)
+            else:
+                self.images[ent] = found
+
+    def get(self, ent: int) -> Optional[Tuple[int, c.Image]]:
+        return self.images.get(ent)
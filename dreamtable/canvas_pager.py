@@ -0,0 +1,205 @@
+"""
+Disk-backed storage for the pixels of canvases nobody is using.
+
+Every canvas keeps its pixels in memory as a CPU-side image (its texture, if it
+has one, is a separate copy on the GPU). Boards collect canvases that nobody
+has touched in ages, so the pager moves their pixels out to a scratch file and
+loads them back the next time something needs them.
+"""
+
+from dataclasses import dataclass
+import mmap
+import tempfile
+import time
+from typing import BinaryIO, Dict, Iterable, List, Optional, Tuple
+from typing_extensions import Protocol
+import zlib
+
+from dreamtable.hal import HAL, ImageHandle, Vec2
+
+# How much to grow the scratch file by, at least
+MIN_GROWTH = 2**20
+
+
+class HasImage(Protocol):
+    image: Optional[ImageHandle]
+
+
+@dataclass
+class Page:
+    # Where the pixels are in the scratch file
+    offset: int
+    length: int
+
+    # The image they came from
+    size: Vec2
+    compressed: bool
+
+
+class CanvasPager:
+    """
+    Pages canvas images out to an mmap-backed scratch file, and back in again.
+
+    Only the entities passed to retain() are tracked. A tracked entity counts
+    as used whenever its image is fetched through image(); once it has gone
+    unused for `idle_time` seconds, idle() lists it as a candidate for
+    page_out(). The scratch file is only created when the first page goes out,
+    and is deleted when the pager is closed (or the process exits).
+    """
+
+    def __init__(
+        self,
+        idle_time: float = 300.0,
+        compress: bool = True,
+        directory: Optional[str] = None,
+    ) -> None:
+        self.idle_time = idle_time
+        self.compress = compress
+        self.directory = directory
+
+        # Size of the paged out images, and how much room they take on disk
+        self.paged_bytes = 0
+        self.stored_bytes = 0
+
+        self._pages: Dict[int, Page] = {}
+        self._last_used: Dict[int, float] = {}
+
+        self._file: Optional[BinaryIO] = None
+        self._map: Optional[mmap.mmap] = None
+        self._end = 0
+        self._holes: List[Tuple[int, int]] = []
+
+    def __contains__(self, entity: int) -> bool:
+        """Whether the entity's pixels are paged out."""
+        return entity in self._pages
+
+    def __len__(self) -> int:
+        return len(self._pages)
+
+    def retain(self, entities: Iterable[int]) -> None:
+        """Track exactly these entities, dropping the pages of any others."""
+        now = time.monotonic()
+        last_used = self._last_used
+        self._last_used = {ent: last_used.get(ent, now) for ent in entities}
+        for ent in [e for e in self._pages if e not in self._last_used]:
+            self._free(self._pages.pop(ent))
+
+    def idle(self, now: Optional[float] = None) -> List[int]:
+        """Tracked entities that haven't been used for `idle_time` seconds."""
+        if now is None:
+            now = time.monotonic()
+        cutoff = now - self.idle_time
+        return [
+            ent
+            for ent, last_used in self._last_used.items()
+            if last_used <= cutoff and ent not in self._pages
+        ]
+
+    def image(self, hal: HAL, entity: int, img: HasImage) -> ImageHandle:
+        """
+        The entity's image, paged back in first if need be. Anything that
+        reads or writes a canvas's pixels should get them through here.
+        """
+        if entity in self._pages:
+            img.image = self._page_in(hal, self._pages.pop(entity))
+        if entity in self._last_used:
+            self._last_used[entity] = time.monotonic()
+        assert img.image is not None
+        return img.image
+
+    def image_size(self, hal: HAL, entity: int, img: HasImage) -> Vec2:
+        """The size of the entity's image, without paging it in."""
+        if entity in self._pages:
+            return self._pages[entity].size.copy()
+        return hal.get_image_size(img.image)
+
+    def page_out(self, hal: HAL, entity: int, img: HasImage) -> None:
+        """Move the entity's pixels to the scratch file, and unload its image."""
+        assert img.image is not None and entity not in self._pages
+
+        size = hal.get_image_size(img.image)
+        data = hal.get_image_data(img.image)
+        stored = zlib.compress(data, 1) if self.compress else data
+
+        offset = self._allocate(len(stored))
+        end = offset + len(stored)
+        assert self._map is not None
+        self._map[offset:end] = stored
+
+        self._pages[entity] = Page(offset, len(stored), size, self.compress)
+        self.paged_bytes += len(data)
+        self.stored_bytes += len(stored)
+
+        hal.unload_image(img.image)
+        img.image = None
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._pages.clear()
+        self._holes.clear()
+        self._end = 0
+        self.paged_bytes = self.stored_bytes = 0
+
+    def _page_in(self, hal: HAL, page: Page) -> ImageHandle:
+        assert self._map is not None
+        start, end = page.offset, page.offset + page.length
+        data = self._map[start:end]
+        if page.compressed:
+            data = zlib.decompress(data)
+        self._free(page)
+        return hal.load_image_from_data(data, page.size)
+
+    def _free(self, page: Page) -> None:
+        self.paged_bytes -= int(page.size.x) * int(page.size.y) * 4
+        self.stored_bytes -= page.length
+
+        # Merge the freed range with any holes it touches
+        offset, end = page.offset, page.offset + page.length
+        holes = []
+        for hole_offset, hole_length in self._holes:
+            hole_end = hole_offset + hole_length
+            if hole_end == offset:
+                offset = hole_offset
+            elif hole_offset == end:
+                end = hole_end
+            else:
+                holes.append((hole_offset, hole_length))
+
+        # A hole at the end is just unused space
+        if end == self._end:
+            self._end = offset
+        else:
+            holes.append((offset, end - offset))
+        self._holes = sorted(holes)
+
+    def _allocate(self, length: int) -> int:
+        # First fit
+        for i, (offset, hole_length) in enumerate(self._holes):
+            if hole_length >= length:
+                if hole_length == length:
+                    del self._holes[i]
+                else:
+                    self._holes[i] = (offset + length, hole_length - length)
+                return offset
+
+        offset = self._end
+        self._end += length
+        capacity = len(self._map) if self._map is not None else 0
+        if self._end > capacity:
+            self._grow(max(self._end, capacity * 2, MIN_GROWTH))
+        return offset
+
+    def _grow(self, capacity: int) -> None:
+        if self._file is None:
+            self._file = tempfile.TemporaryFile(
+                prefix="dreamtable-pages-", dir=self.directory
+            )
+        if self._map is not None:
+            self._map.close()
+        self._file.truncate(capacity)
+        self._map = mmap.mmap(self._file.fileno(), capacity)
@@ -0,0 +1,224 @@
+"""
+Deferred drawing.
+
+Renderers record draw commands instead of calling the HAL directly. At the end
+of the frame the commands are sorted so that each layer is drawn in as few
+camera scopes as possible, and then sent to the HAL.
+"""
+
+from dataclasses import dataclass
+from typing import Any, List, Mapping, Optional, Tuple
+
+from dreamtable.constants import Layer, PositionSpace
+from dreamtable.hal import (
+    HAL,
+    Camera,
+    Color,
+    FontHandle,
+    Rect,
+    TextureHandle,
+    Vec2,
+)
+
+WHITE = Color(255, 255, 255, 255)
+
+
+@dataclass
+class DrawCommand:
+    layer: Layer
+
+    # Which camera to draw through; None draws in raw screen pixels
+    space: Optional[PositionSpace]
+
+    # Name of the HAL method to call, and its arguments
+    method: str
+    args: Tuple[Any, ...]
+
+    # The entity being drawn, if any, so views can leave out what they can't see
+    entity: Optional[int] = None
+
+    def sort_key(self) -> Tuple[int, int]:
+        # Layers come first, since pixel-space layers sit both below (the
+        # background) and above (tool cursors) the camera-space ones.
+        # Python's sort is stable, so submission order breaks ties; that
+        # matters, since draws within a layer often overlap (e.g. a button's
+        # icon over its background).
+        space = 0 if self.space is None else self.space.value
+        return (self.layer, space)
+
+
+class CommandBuffer:
+    """Collects draw commands over a frame and flushes them to a HAL."""
+
+    def __init__(self) -> None:
+        self.commands: List[DrawCommand] = []
+
+    def submit(
+        self,
+        method: str,
+        args: Tuple[Any, ...],
+        layer: Layer,
+        space: Optional[PositionSpace] = None,
+        entity: Optional[int] = None,
+    ) -> None:
+        self.commands.append(DrawCommand(layer, space, method, args, entity))
+
+    def draw_text(
+        self,
+        font: FontHandle,
+        text: str,
+        position: Vec2,
+        size: float,
+        spacing: float,
+        color: Color,
+        *,
+        layer: Layer,
+        space: Optional[PositionSpace] = None,
+        entity: Optional[int] = None,
+    ) -> None:
+        self.submit(
+            "draw_text",
+            (font, text, position, size, spacing, color),
+            layer,
+            space,
+            entity=entity,
+        )
+
+    def draw_rectangle(
+        self,
+        rect: Rect,
+        color: Color,
+        *,
+        layer: Layer,
+        space: Optional[PositionSpace] = None,
+        entity: Optional[int] = None,
+    ) -> None:
+        self.submit("draw_rectangle", (rect, color), layer, space, entity=entity)
+
+    def draw_rectangle_lines(
+        self,
+        rect: Rect,
+        thickness: int,
+        color: Color,
+        *,
+        layer: Layer,
+        space: Optional[PositionSpace] = None,
+        entity: Optional[int] = None,
+    ) -> None:
+        self.submit(
+            "draw_rectangle_lines",
+            (rect, thickness, color),
+            layer,
+            space,
+            entity=entity,
+        )
+
+    def draw_line(
+        self,
+        start: Vec2,
+        end: Vec2,
+        color: Color,
+        *,
+        layer: Layer,
+        space: Optional[PositionSpace] = None,
+        entity: Optional[int] = None,
+    ) -> None:
+        self.submit("draw_line", (start, end, color), layer, space, entity=entity)
+
+    def draw_line_width(
+        self,
+        start: Vec2,
+        end: Vec2,
+        width: float,
+        color: Color,
+        *,
+        layer: Layer,
+        space: Optional[PositionSpace] = None,
+        entity: Optional[int] = None,
+    ) -> None:
+        self.submit(
+            "draw_line_width", (start, end, width, color), layer, space, entity=entity
+        )
+
+    def draw_texture(
+        self,
+        texture_handle: TextureHandle,
+        pos: Vec2,
+        tint: Color = WHITE,
+        *,
+        layer: Layer,
+        space: Optional[PositionSpace] = None,
+        entity: Optional[int] = None,
+    ) -> None:
+        self.submit(
+            "draw_texture",
+            (texture_handle, pos, tint),
+            layer,
+            space,
+            entity=entity,
+        )
+
+    def draw_texture_rect(
+        self,
+        texture_handle: TextureHandle,
+        source_rect: Rect,
+        pos: Vec2,
+        tint: Color = WHITE,
+        *,
+        layer: Layer,
+        space: Optional[PositionSpace] = None,
+        entity: Optional[int] = None,
+    ) -> None:
+        self.submit(
+            "draw_texture_rect",
+            (texture_handle, source_rect, pos, tint),
+            layer,
+            space,
+            entity=entity,
+        )
+
+    def draw_texture_pro(
+        self,
+        texture_handle: TextureHandle,
+        source_rect: Rect,
+        dest_rect: Rect,
+        tint: Color = WHITE,
+        *,
+        layer: Layer,
+        space: Optional[PositionSpace] = None,
+        entity: Optional[int] = None,
+    ) -> None:
+        self.submit(
+            "draw_texture_pro",
+            (texture_handle, source_rect, dest_rect, tint),
+            layer,
+            space,
+            entity=entity,
+        )
+
+    def flush(self, hal: HAL, cameras: Mapping[PositionSpace, Camera]) -> None:
+        """Draw everything submitted so far, then start over."""
+        draw_commands(hal, cameras, self.commands)
+        self.commands.clear()
+
+
+def draw_commands(
+    hal: HAL, cameras: Mapping[PositionSpace, Camera], commands: List[DrawCommand]
+) -> None:
+    """Sort commands into drawing order (in place), and send them to the HAL."""
+    commands.sort(key=DrawCommand.sort_key)
+
+    # Only switch cameras between runs of commands in different spaces
+    current_space: Optional[PositionSpace] = None
+    for command in commands:
+        if command.space != current_space:
+            if current_space is not None:
+                hal.pop_camera()
+            if command.space is not None:
+                hal.push_camera(cameras[command.space])
+            current_space = command.space
+
+        getattr(hal, command.method)(*command.args)
+
+    if current_space is not None:
+        hal.pop_camera()
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Mapping, Optional
+from typing import Dict, Hashable, List, Mapping, Optional, Set, Tuple
 from typing_extensions import Protocol
 
-from dreamtable.constants import PositionSpace, SelectionType, Tool
+import numpy as np
+
+from dreamtable.constants import Autotiling, PositionSpace, SelectionType, Tool
 from dreamtable.hal import (
     Camera as HALCamera,
     Color,
@@ -14,6 +16,12 @@ from dreamtable.hal import (
     Vec2,
     Rect,
 )
+from dreamtable.canvas_pager import CanvasPager
+from dreamtable.command_buffer import CommandBuffer
+from dreamtable.deletion_queue import DeletionQueue
+from dreamtable.motion_store import MotionStore
+from dreamtable.text_cache import TextCache
+from dreamtable.texture_residency import TextureResidency
 
 
 ################################################################################
@@ -29,6 +37,44 @@ def rect(xy: XY, wh: XY) -> Rect:
     return Rect(xy.x, xy.y, wh.x, wh.y)
 
 
+def view_rect(camera: HALCamera, size: Vec2) -> Rect:
+    """The area a camera shows when drawing into a screen area of the given size."""
+    top_left = camera.target - camera.offset / camera.zoom
+    return Rect(top_left.x, top_left.y, size.x / camera.zoom, size.y / camera.zoom)
+
+
+def is_culled(context: WorldContext, ent: int, pos: Position) -> bool:
+    """Whether an entity is out of every view, and needn't be drawn."""
+    return pos.space == PositionSpace.WORLD and ent not in context.visible
+
+
+def mark_drawn(img: Image, area: Rect) -> None:
+    """Note that an Image's pixels were drawn on, within `area`."""
+    if not img.dirty:
+        img.drawn = area.copy()
+    elif img.drawn is not None:
+        img.drawn = Rect.from_union(img.drawn, area)
+    img.dirty = True
+
+
+def mark_updated(img: Image) -> None:
+    """Note that an Image's texture was updated with what was drawn on it."""
+    img.updated = img.drawn if img.dirty else None
+    img.drawn = None
+    img.dirty = False
+    img.version += 1
+
+
+def interpolated(pos: Position, alpha: float) -> Vec2:
+    """
+    Where to draw a Position, given how far we are between simulation steps.
+    Always a new vector, so the caller is free to change it (e.g. floor() it).
+    """
+    if pos.previous is None:
+        return pos.position.copy()
+    return pos.previous.interpolated(pos.position, alpha)
+
+
 ################################################################################
 # Global data associated with the entire world
 # Can be read or written to by processors
@@ -51,10 +97,55 @@ class WorldContext:
     color_secondary: Color = Color(0, 0, 0, 255)
     color_dropper: Color = Color(0, 0, 0, 0)
 
+    # The entity whose Image the brush tool stamps
+    brush: Optional[int] = None
+
     # Just active cameras; kept in sync by a processor
     cameras: Mapping[PositionSpace, HALCamera] = field(default_factory=dict)
 
-    snap: Vec2 = Vec2(8, 8)
+    snap: Vec2 = field(default_factory=lambda: Vec2(8, 8))
+
+    # Bumped whenever any Selectable's selection state may have changed
+    selection_version: int = 0
+
+    # Columnar position/velocity data for everything that moves
+    motion: MotionStore = field(default_factory=MotionStore)
+
+    # Draw commands recorded by renderers, flushed at the end of the frame
+    commands: CommandBuffer = field(default_factory=CommandBuffer)
+
+    # Measured and pre-rendered labels
+    text_cache: TextCache = field(default_factory=TextCache)
+
+    # World space entities that are in view of the main camera or any
+    # Viewport; kept up to date by a processor at the start of rendering.
+    # Screen space entities aren't culled.
+    visible: Set[int] = field(default_factory=set)
+
+    # The world space areas those views show, main camera first
+    views: List[Rect] = field(default_factory=list)
+
+    # Bumped whenever an Image's texture is (re)uploaded
+    texture_version: int = 0
+
+    # Bumped whenever what's drawn in world space may have changed otherwise:
+    # on input, when things move or animate, when entities or components come
+    # and go, and when tilemap chunks are rendered. Lets views that cache what
+    # they draw tell that nothing changed without looking at every command.
+    scene_version: int = 0
+
+    # Which Image textures are uploaded, within a memory budget
+    textures: TextureResidency = field(default_factory=TextureResidency)
+
+    # Pixels of idle canvases, moved out of memory
+    pager: CanvasPager = field(default_factory=CanvasPager)
+
+    # Entities to delete at the end of the frame, and resources to release
+    deletions: DeletionQueue = field(default_factory=DeletionQueue)
+
+    # The topmost Hoverable under the pointer, if any; input events are
+    # routed with this as their target
+    pointer_target: Optional[int] = None
 
 
 @dataclass
@@ -87,54 +178,66 @@ class Theme:
 # Components
 
 
-@dataclass
+@dataclass(slots=True)
 class Position:
     position: Vec2 = field(default_factory=Vec2)
     space: PositionSpace = PositionSpace.WORLD
 
+    # Position as of the previous simulation step, if it's being simulated
+    previous: Optional[Vec2] = None
 
-@dataclass
+
+@dataclass(slots=True)
 class Extent:
     extent: Vec2 = field(default_factory=Vec2)
 
 
-@dataclass
+@dataclass(slots=True)
 class Velocity:
     velocity: Vec2 = field(default_factory=Vec2)
     friction: float = 1.0
 
 
-@dataclass
+@dataclass(slots=True)
 class Wandering:
+    # While its entity is in the MotionStore, the store counts down the tick,
+    # and only copies it back here once the entity leaves or stops wandering
     interval: int = 100
     tick: int = 100
     force: float = 5.0
 
 
-@dataclass
+@dataclass(slots=True)
 class Name:
     name: str
 
 
-@dataclass
+@dataclass(slots=True)
 class PositionMarker:
     size: float = 8.0
 
 
-@dataclass
+@dataclass(slots=True)
 class CellGrid:
     x: int = 0
     y: int = 0
 
 
-@dataclass
+@dataclass(slots=True)
 class BackgroundGrid:
     color: Color
     line_width: float = 2.0
     min_step: float = 12.0
 
+    # Pre-rendered grid lines, maintained by BackgroundGridRenderer, and the
+    # (step x, step y, rgba, line width, screen width, screen height) they were
+    # rendered for
+    texture: Optional[TextureHandle] = None
+    texture_size: Vec2 = field(default_factory=Vec2)
+    texture_key: Optional[Tuple[float, ...]] = None
 
-@dataclass
+
+@dataclass(slots=True)
 class Camera:
     camera: HALCamera
     active: bool = False
@@ -143,57 +246,100 @@ class Camera:
     zoom_friction: float = 0.85
 
 
-@dataclass
+@dataclass(slots=True)
+class Viewport:
+    """
+    Shows the world through its own camera, in the entity's screen rect.
+    """
+
+    camera: HALCamera
+
+    # Maintained by the renderer. The visible set is only replaced when it
+    # changes, which bumps visible_version.
+    visible: Set[int] = field(default_factory=set)
+    visible_version: int = 0
+    texture: Optional[TextureHandle] = None
+    texture_size: Vec2 = field(default_factory=Vec2)
+    signature: Optional[Hashable] = None
+
+
+@dataclass(slots=True)
 class BoxSelection:
     type: SelectionType = SelectionType.NORMAL
     start_pos: Vec2 = field(default_factory=Vec2)
 
 
-@dataclass
+@dataclass(slots=True)
 class Hoverable:
     hovered: bool = False
 
 
-@dataclass
+@dataclass(slots=True)
 class Selectable:
     selected: bool = False
 
 
-@dataclass
+@dataclass(slots=True)
 class Deletable:
-    deleted: bool = False
+    """Can be deleted by the user; see DeletionQueue."""
 
 
-@dataclass
+@dataclass(slots=True)
 class Draggable:
     dragging: bool = False
     offset: Optional[Vec2] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Button:
     lit: bool = False
 
 
-@dataclass
+@dataclass(slots=True)
 class ToolSwitcher:
     tool: Tool
 
 
-@dataclass
+@dataclass(slots=True)
 class Canvas:
     color: Color = Color(0, 0, 0, 255)
     cell_grid_always_visible: bool = False
 
+    # How big each pixel of its image is drawn
+    scale: int = 1
 
-@dataclass
+
+@dataclass(slots=True)
+class Magnifier:
+    """
+    Makes a Canvas show another entity's Image, at the Canvas's scale. It
+    shares the source's pixels and texture rather than having copies, so
+    drawing on either one draws on both.
+    """
+
+    source: int
+
+
+@dataclass(slots=True)
 class Image:
-    image: ImageHandle
+    # None while it isn't loaded, or is paged out by the CanvasPager
+    image: Optional[ImageHandle]
     texture: Optional[TextureHandle] = None
+
+    # Whether it was drawn on since its texture was last updated, and where
+    # (None for anywhere): see mark_drawn()
     dirty: bool = False
+    drawn: Optional[Rect] = None
 
+    filename: Optional[str] = None
 
-@dataclass
+    # Bumped whenever the texture is updated with pixels that were drawn on,
+    # and where those were (None for anywhere): see mark_updated()
+    version: int = 0
+    updated: Optional[Rect] = None
+
+
+@dataclass(slots=True)
 class SpriteRegion:
     x: int = 0
     y: int = 0
@@ -201,18 +347,108 @@ class SpriteRegion:
     # todo width height
 
 
-@dataclass
+@dataclass(slots=True)
+class Tilemap:
+    """
+    A grid of tiles, each showing one cell of another entity's Image, as split
+    up by its CellGrid. Its Extent follows the size of the grid.
+    """
+
+    # The entity with the Image and CellGrid to take tiles from
+    source: int
+
+    # The cell each tile shows, as row * columns + column (so by row, like
+    # the tiles themselves); -1 is no tile. Bump version after changing it.
+    tiles: np.ndarray
+    version: int = 0
+
+    # Maintained by TilemapRenderer: the tiles rendered into a texture per
+    # chunk, which chunks need rendering again, and the tiles (as of the last
+    # frame) and tile size that was worked out from
+    chunks: Dict[Tuple[int, int], TextureHandle] = field(default_factory=dict)
+    stale: Set[Tuple[int, int]] = field(default_factory=set)
+    last_tiles: Optional[np.ndarray] = None
+    last_version: int = -1
+    tile_size: Vec2 = field(default_factory=Vec2)
+
+
+@dataclass(slots=True)
+class TileSet:
+    """An Image of autotiles: a tile for each combination of neighbours."""
+
+    kind: Autotiling
+
+
+@dataclass(slots=True)
+class Autotile:
+    """
+    Keeps a Tilemap autotiled to match another entity's Image, its mask: a
+    tile for each pixel painted on it. The Tilemap's source is a TileSet.
+    """
+
+    mask: int
+
+
+@dataclass(slots=True)
+class Palette:
+    """Marks a Canvas whose Image is a palette: its colors, in order."""
+
+
+@dataclass(slots=True)
+class Remapped:
+    """An Image remapped to a Palette's colors, and the Palette it was."""
+
+    palette: int
+
+
+@dataclass(slots=True)
+class Timeline:
+    """
+    A sequence of cells, each shown for a while, played back by the
+    AnimationController. Entities with an Animation show it in their
+    SpriteRegion.
+    """
+
+    # (cell, seconds) for each frame. A cell is an offset into a sprite sheet,
+    # from the Animation's origin.
+    frames: List[Tuple[Vec2, float]] = field(default_factory=list)
+    loop: bool = True
+    playing: bool = True
+
+    # Playback rate. It can't run backwards; 0 holds the current frame.
+    speed: float = 1.0
+
+    # Seconds played so far. Set it to seek.
+    time: float = 0.0
+
+    # Bump after changing frames or loop, so the playback schedule is rebuilt
+    version: int = 0
+
+
+@dataclass(slots=True)
+class Animation:
+    """Shows a Timeline (on another entity) in this entity's SpriteRegion."""
+
+    timeline: int
+    origin: Vec2 = field(default_factory=Vec2)
+
+    # Seconds ahead of the timeline, so that things sharing a timeline don't
+    # all move in lockstep
+    phase: float = 0.0
+
+
+@dataclass(slots=True)
 class EggTimer:
     time_left: int = 0
 
 
-@dataclass
+@dataclass(slots=True)
 class TinyFriend:
     # 0: bunny, 1: spider, 2: chick, 3: slime
     type: int = 0
     angle: float = 0
 
 
-@dataclass
+@dataclass(slots=True)
 class DebugEntity:
     pass
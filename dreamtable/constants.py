@@ -1,4 +1,4 @@
-from enum import Enum, auto
+from enum import Enum, IntEnum, auto
 
 EPSILON = 1e-5
 
@@ -10,6 +10,29 @@ class PositionSpace(Enum):
     SCREEN = auto()
 
 
+class Layer(IntEnum):
+    """Draw order, bottom to top."""
+
+    BACKGROUND = auto()
+    MARKERS = auto()
+    CANVASES = auto()
+    SPRITES = auto()
+    DEBUG = auto()
+    LABELS = auto()
+    SELECTION = auto()
+    VIEWPORTS = auto()
+    UI = auto()
+    CURSOR = auto()
+
+
+class InputLayer(IntEnum):
+    """Input dispatch order, top to bottom."""
+
+    UI = auto()
+    TOOL = auto()
+    WORLD = auto()
+
+
 class SelectionType(Enum):
     NORMAL = auto()
     CREATE = auto()
@@ -23,3 +46,30 @@ class Tool(Enum):
     CELLREF = auto()
     CELLREF_DROPPER = auto()
     EGG = auto()
+    BRUSH = auto()
+
+
+class Autotiling(Enum):
+    # A tile for each combination of edge neighbours: 16 of them
+    WANG = auto()
+    # Corner neighbours count too, where both edges next to them are there:
+    # 47 tiles
+    BLOB = auto()
+
+
+class ColorDistance(Enum):
+    # Straight-line distance between RGB values
+    RGB = auto()
+    # Distance in CIELAB, which is closer to how different colors look
+    PERCEPTUAL = auto()
+
+
+class Phase(Enum):
+    # Once per frame: input handling and other state changes
+    UPDATE = auto()
+    # Zero or more times per frame, at a fixed timestep
+    SIMULATE = auto()
+    # Once per frame: drawing
+    RENDER = auto()
+    # Once per frame: releasing resources, deleting entities
+    CLEANUP = auto()
@@ -0,0 +1,57 @@
+"""
+Deferred entity deletion.
+
+Deleting an entity is cheap, but unloading its image and texture isn't, so
+deleting a lot of things at once would stall a frame. The queue deletes marked
+entities right away and hands their resources back to the HAL a few at a time,
+over as many frames as it takes.
+"""
+
+from collections import deque
+import time
+from typing import Deque, List, Set
+
+from dreamtable.hal import HAL, ImageHandle, TextureHandle
+
+
+class DeletionQueue:
+    def __init__(self) -> None:
+        self._marked: Set[int] = set()
+        self._textures: Deque[TextureHandle] = deque()
+        self._images: Deque[ImageHandle] = deque()
+
+    def __len__(self) -> int:
+        """How many resources are still waiting to be released."""
+        return len(self._textures) + len(self._images)
+
+    def mark(self, entity: int) -> None:
+        """Delete this entity at the end of the frame."""
+        self._marked.add(entity)
+
+    def take_marked(self) -> List[int]:
+        """The entities marked since the last call, oldest first."""
+        marked = sorted(self._marked)
+        self._marked.clear()
+        return marked
+
+    def release_texture(self, texture: TextureHandle) -> None:
+        self._textures.append(texture)
+
+    def release_image(self, image: ImageHandle) -> None:
+        self._images.append(image)
+
+    def flush(self, hal: HAL, budget: float) -> bool:
+        """
+        Release queued resources until `budget` seconds have passed (always at
+        least one, so the queue drains eventually). Returns True if any are
+        left for later frames.
+        """
+        deadline = time.perf_counter() + budget
+        while self._textures or self._images:
+            if self._textures:
+                hal.unload_texture(self._textures.popleft())
+            else:
+                hal.unload_image(self._images.popleft())
+            if time.perf_counter() >= deadline:
+                break
+        return bool(self._textures or self._images)
@@ -5,8 +5,16 @@ from .types import (
     Color,
     Camera,
     Key,
+    KeySet,
     MouseButton,
     TextureFormat,
+    InputEvent,
+    KeyPressed,
+    KeyReleased,
+    MouseButtonPressed,
+    MouseButtonReleased,
+    MouseMoved,
+    MouseWheelMoved,
 )
-from .geom import Vec2, Rect
+from .geom import Vec2, Rect, Vec2Array, RectArray
 from .base import HAL
@@ -1,3 +1,5 @@
+from typing import List, Sequence, Type, TypeVar
+
 import esper
 from dreamtable.hal.types import (
     FontHandle,
@@ -5,12 +7,27 @@ from dreamtable.hal.types import (
     TextureHandle,
     Camera,
     Color,
+    InputEvent,
     Key,
+    KeyPressed,
+    KeyReleased,
+    KeySet,
     MouseButton,
+    MouseButtonPressed,
+    MouseButtonReleased,
+    MouseWheelMoved,
     TextureFormat,
 )
 from dreamtable.hal.geom import Vec2, Rect
 
+# How many frames to keep drawing after the last bit of activity before an idle
+# backend starts blocking on input. The first frame handles the input that woke
+# us up; the second catches changes that only land a frame later (e.g. deleted
+# entities, which esper removes at the start of the next frame).
+SETTLE_FRAMES = 2
+
+E = TypeVar("E", bound=InputEvent)
+
 
 class HAL:
     # Window and screen
@@ -42,9 +59,14 @@ class HAL:
         raise NotImplementedError
 
     def load_image(self, resource_path: str) -> ImageHandle:
+        """
+        Load an image. Every call returns a new handle, even for a file that's
+        already loaded, so whoever loaded it can unload it.
+        """
         raise NotImplementedError
 
     def load_texture_from_image(self, image_handle: ImageHandle) -> TextureHandle:
+        """Upload an image as a new texture, with a handle of its own."""
         raise NotImplementedError
 
     def unload_image(self, image_handle: ImageHandle) -> None:
@@ -56,6 +78,17 @@ class HAL:
     def gen_image_from_color(self, size: Vec2, color: Color) -> ImageHandle:
         raise NotImplementedError
 
+    def load_image_from_data(self, data: bytes, size: Vec2) -> ImageHandle:
+        """Create an image from R8G8B8A8 pixels, as returned by get_image_data()."""
+        raise NotImplementedError
+
+    def load_render_texture(self, size: Vec2) -> TextureHandle:
+        """
+        Create a texture that can be drawn into with begin_texture_mode(). It's
+        drawn like any other texture, and freed with unload_texture().
+        """
+        raise NotImplementedError
+
     # Resource reading / writing
 
     def update_texture_from_image(
@@ -73,17 +106,40 @@ class HAL:
     ) -> None:
         raise NotImplementedError
 
+    def stamp_image(
+        self,
+        image_handle: ImageHandle,
+        brush_handle: ImageHandle,
+        positions: Sequence[Vec2],
+    ) -> None:
+        """
+        Draw the brush image over the image with its top left corner at each
+        of `positions` in turn, alpha compositing it over what's there.
+        """
+        raise NotImplementedError
+
     def get_image_size(self, image_handle: ImageHandle) -> Vec2:
         raise NotImplementedError
 
     def get_image_color(self, image_handle: ImageHandle, pos: Vec2) -> Color:
         raise NotImplementedError
 
+    def get_image_data(self, image_handle: ImageHandle) -> bytes:
+        """A copy of the image's pixels, as R8G8B8A8 rows from the top down."""
+        raise NotImplementedError
+
     def export_image(self, image_handle: ImageHandle, filename: str) -> None:
         raise NotImplementedError
 
     # Screen drawing
 
+    def begin_texture_mode(self, texture_handle: TextureHandle) -> None:
+        """Clear a render texture to transparent, and draw into it until end_texture_mode()."""
+        raise NotImplementedError
+
+    def end_texture_mode(self) -> None:
+        raise NotImplementedError
+
     # todo reorder these: text, position, font, color, size=8, spacing=1
     def draw_text(
         self,
@@ -127,27 +183,54 @@ class HAL:
     ) -> None:
         raise NotImplementedError
 
+    def draw_texture_pro(
+        self,
+        texture_handle: TextureHandle,
+        source_rect: Rect,
+        dest_rect: Rect,
+        tint: Color = Color(255, 255, 255, 255),
+    ) -> None:
+        """Draw part of a texture, stretched to fill `dest_rect`."""
+        raise NotImplementedError
+
     def measure_text(
         self, font: FontHandle, text: str, size: int, spacing: int
     ) -> Vec2:
         raise NotImplementedError
 
-    # Keyboard
+    # Input events
 
-    def is_key_down(self, key: Key) -> bool:
+    def get_input_events(self, event_type: Type[E]) -> List[E]:
+        """
+        The events of the given type that arrived since the previous frame, in
+        order. Processors ask only for the event types they handle instead of
+        polling every key or button they might care about. Events that only
+        one processor should act on are better handled by an InputHandler.
+        """
         raise NotImplementedError
 
-    def is_key_pressed(self, key: Key) -> bool:
+    def get_all_input_events(self) -> List[InputEvent]:
+        """
+        Every event that arrived since the previous frame, of any type, in the
+        order they arrived.
+        """
         raise NotImplementedError
 
-    def is_key_released(self, key: Key) -> bool:
+    def get_held_keys(self) -> KeySet:
+        """The keys that are currently held down."""
         raise NotImplementedError
 
-    def clear_key_pressed(self, key: Key) -> None:
-        raise NotImplementedError
+    # Keyboard
+    # The default implementations are shorthands over the event queue.
 
-    def clear_key_released(self, key: Key) -> None:
-        raise NotImplementedError
+    def is_key_down(self, key: Key) -> bool:
+        return key in self.get_held_keys()
+
+    def is_key_pressed(self, key: Key) -> bool:
+        return any(e.key is key for e in self.get_input_events(KeyPressed))
+
+    def is_key_released(self, key: Key) -> bool:
+        return any(e.key is key for e in self.get_input_events(KeyReleased))
 
     # Mouse
 
@@ -155,16 +238,16 @@ class HAL:
         raise NotImplementedError
 
     def is_mouse_button_pressed(self, mouse_button: MouseButton) -> bool:
-        raise NotImplementedError
+        return any(
+            e.button is mouse_button
+            for e in self.get_input_events(MouseButtonPressed)
+        )
 
     def is_mouse_button_released(self, mouse_button: MouseButton) -> bool:
-        raise NotImplementedError
-
-    def clear_mouse_button_pressed(self, mouse_button: MouseButton) -> None:
-        raise NotImplementedError
-
-    def clear_mouse_button_released(self, mouse_button: MouseButton) -> None:
-        raise NotImplementedError
+        return any(
+            e.button is mouse_button
+            for e in self.get_input_events(MouseButtonReleased)
+        )
 
     def get_mouse_position(self) -> Vec2:
         raise NotImplementedError
@@ -173,12 +256,26 @@ class HAL:
         raise NotImplementedError
 
     def get_mouse_wheel_move(self) -> float:
+        return sum(e.amount for e in self.get_input_events(MouseWheelMoved))
+
+    # Main loop
+
+    def request_frame(self) -> None:
+        """
+        Ask for another frame to be drawn even if no input arrives. Processors
+        call this while they have pending work (e.g. something is animating);
+        when nobody asks, the backend is free to block until the next input
+        event and keep showing the last frame.
+        """
         raise NotImplementedError
 
-    def clear_mouse_wheel_move(self) -> None:
+    def is_frame_requested(self) -> bool:
+        """Whether request_frame() has been called during the current frame."""
         raise NotImplementedError
 
-    # Main loop
+    def get_frame_time(self) -> float:
+        """Seconds elapsed since the previous frame."""
+        raise NotImplementedError
 
     def run(self, world: esper.World) -> None:
         raise NotImplementedError
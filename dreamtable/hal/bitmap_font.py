@@ -0,0 +1,111 @@
+"""
+Image fonts, laid out the way raylib lays them out.
+
+An image font is a grid of glyphs drawn on a key color (magenta): the key color
+fills the gaps between glyphs and around each row, and the glyphs appear in
+character order starting from a space. Backends without a font loader of their
+own parse these images with BitmapFont and blit the glyphs themselves.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterator, Tuple
+
+import numpy as np
+
+from dreamtable.hal.geom import Rect, Vec2
+from dreamtable.hal.types import Color
+
+KEY_COLOR = Color(255, 0, 255, 255)
+FIRST_CHAR = 32
+
+# Lines of text are this many glyph heights apart
+LINE_SPACING = 1.5
+
+
+@dataclass
+class BitmapFont:
+    # R8G8B8A8 pixels, with the key color made transparent
+    atlas: np.ndarray
+
+    # Where each character's glyph is in the atlas
+    glyphs: Dict[str, Rect]
+
+    # Height of the glyphs, which draw_text() sizes are relative to
+    base_size: int
+
+    @classmethod
+    def from_image(
+        cls, pixels: np.ndarray, key: Color = KEY_COLOR, first_char: int = FIRST_CHAR
+    ) -> "BitmapFont":
+        """
+        Parse an image font from an array of R8G8B8A8 pixels, shaped (height,
+        width, 4), following raylib's LoadFontFromImage().
+        """
+        is_key = np.all(pixels == key.rgba, axis=2)
+        height, width = is_key.shape
+
+        # The first pixel that isn't the key color marks the top left glyph.
+        # raylib scans row by row, so the column comes from the first row
+        # that has any glyph pixels in it.
+        rows = np.flatnonzero(~is_key.all(axis=1))
+        if not len(rows) or rows[0] == 0:
+            raise ValueError("Not an image font")
+        line_spacing = int(rows[0])
+        char_spacing = int(np.argmax(~is_key[line_spacing]))
+        if char_spacing == 0:
+            raise ValueError("Not an image font")
+
+        column = is_key[line_spacing:, char_spacing]
+        char_height = int(np.argmax(column)) if column.any() else len(column)
+
+        glyphs = {}
+        index = 0
+        y = line_spacing
+        while y < height:
+            x = char_spacing
+            while x < width and not is_key[y, x]:
+                row = is_key[y, x:]
+                char_width = int(np.argmax(row)) if row.any() else len(row)
+                glyphs[chr(first_char + index)] = Rect(x, y, char_width, char_height)
+                index += 1
+                x += char_width + char_spacing
+            y += char_height + line_spacing
+
+        atlas = pixels.copy()
+        atlas[is_key] = 0
+        return cls(atlas, glyphs, char_height)
+
+    def layout(
+        self, text: str, size: float, spacing: float
+    ) -> Iterator[Tuple[Rect, Vec2]]:
+        """
+        The glyphs to draw for `text`, as (source rect in the atlas, offset
+        from the text's position) pairs. Offsets are in output pixels, at the
+        given size; glyphs are scaled by size / base_size.
+        """
+        scale = size / self.base_size
+        x = y = 0.0
+        for char in text:
+            if char == "\n":
+                x = 0.0
+                y += self.base_size * LINE_SPACING * scale
+                continue
+            glyph = self.glyphs.get(char) or self.glyphs.get("?")
+            if glyph is None:
+                continue
+            if not char.isspace():
+                yield glyph, Vec2(x, y)
+            x += glyph.width * scale + spacing
+
+    def measure(self, text: str, size: float, spacing: float) -> Vec2:
+        """The size of `text` when drawn, like raylib's MeasureTextEx()."""
+        scale = size / self.base_size
+        lines = text.split("\n")
+        width = 0.0
+        for line in lines:
+            glyphs = [self.glyphs.get(c) or self.glyphs.get("?") for c in line]
+            widths = [g.width for g in glyphs if g is not None]
+            if widths:
+                width = max(width, sum(widths) * scale + (len(widths) - 1) * spacing)
+        height = self.base_size * scale * (1 + LINE_SPACING * (len(lines) - 1))
+        return Vec2(width, height)
@@ -0,0 +1,177 @@
+"""
+A packed bundle of the built-in resources.
+
+Each `res://` image is stored already decoded, as R8G8B8A8 pixels, after an
+index of where each one starts. Backends memory-map the bundle once and hand
+the pixels straight to the graphics library, so loading a built-in image takes
+no file opens and no PNG decoding.
+
+The bundle is a build artifact. Rebuild it after changing anything under
+dreamtable/resources:
+
+    python -m dreamtable.hal.bundle
+
+Without a bundle, backends fall back to loading the PNG files one at a time.
+The index records the size and modification time of each PNG it was built
+from, and an image whose PNG has changed since is loaded from the PNG instead,
+so a forgotten rebuild costs speed rather than showing stale pixels.
+"""
+
+import argparse
+import json
+import mmap
+import os
+from pathlib import Path
+import struct
+from typing import Dict, Optional, Tuple
+
+from dreamtable.hal.geom import Vec2
+from dreamtable.hal.png import decode_png
+
+RESOURCES_PATH = Path(__file__).parents[1] / "resources"
+BUNDLE_PATH = RESOURCES_PATH / "builtin.bundle"
+
+MAGIC = b"DTBUNDL2"
+
+# Magic, then the length of the JSON index that follows it
+HEADER = struct.Struct("<8sI")
+
+# Pixel data starts on a multiple of this, so it can be copied efficiently
+ALIGNMENT = 16
+
+
+def resource_file(resource_path: str) -> Path:
+    """The file a `res://` path refers to."""
+    if not resource_path.startswith("res://"):
+        raise ValueError("Invalid resource path")
+    return RESOURCES_PATH / resource_path[6:]
+
+
+def _align(offset: int) -> int:
+    return -offset % ALIGNMENT
+
+
+def _source_stamp(path: Path) -> Tuple[int, int]:
+    """What a bundle remembers about a PNG, to tell whether it has changed."""
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+# Where an image's pixels are, its size, and the stamp of the PNG they came from
+Entry = Tuple[int, int, int, int, int]
+
+
+class ResourceBundle:
+    """A memory-mapped resource bundle, as written by build_bundle()."""
+
+    def __init__(self, path: Path, resources_path: Path = RESOURCES_PATH) -> None:
+        self._resources_path = resources_path
+
+        with open(path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, index_length = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            self._map.close()
+            raise ValueError(f"{path} is not a resource bundle")
+
+        index_start = HEADER.size
+        index_end = index_start + index_length
+        index = json.loads(self._map[index_start:index_end])
+        self._index: Dict[str, Entry] = {
+            name: tuple(entry) for name, entry in index.items()  # type: ignore
+        }
+
+    @classmethod
+    def builtin(cls) -> Optional["ResourceBundle"]:
+        """
+        The bundle of built-in resources, if it has been built (by this
+        version of the format).
+        """
+        try:
+            return cls(BUNDLE_PATH)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def __contains__(self, resource_path: str) -> bool:
+        return resource_path[6:] in self._index
+
+    def get(self, resource_path: str) -> Optional[Tuple[memoryview, Vec2]]:
+        """
+        The pixels and size of a `res://` image, if it's in the bundle and its
+        PNG hasn't changed since. The pixels are a view of the mapped file,
+        valid until the bundle is closed.
+        """
+        if not resource_path.startswith("res://"):
+            raise ValueError("Invalid resource path")
+        name = resource_path[6:]
+        entry = self._index.get(name)
+        if entry is None:
+            return None
+        offset, width, height, size, mtime = entry
+        try:
+            if _source_stamp(self._resources_path / name) != (size, mtime):
+                return None
+        except FileNotFoundError:
+            return None
+        end = offset + width * height * 4
+        return memoryview(self._map)[offset:end], Vec2(width, height)
+
+    def close(self) -> None:
+        self._map.close()
+
+
+def build_bundle(
+    resources_path: Path = RESOURCES_PATH, output_path: Path = BUNDLE_PATH
+) -> Dict[str, Entry]:
+    """Decode every PNG under `resources_path`, and pack them into a bundle."""
+    images = []
+    for path in sorted(resources_path.rglob("*.png")):
+        stamp = _source_stamp(path)
+        with open(path, "rb") as file:
+            width, height, pixels = decode_png(file)
+        images.append(
+            (path.relative_to(resources_path).as_posix(), width, height, pixels, stamp)
+        )
+
+    # The offsets depend on the length of the index, which depends on the
+    # offsets; pad the index out until they agree
+    index: Dict[str, Entry] = {}
+    index_length = 0
+    while True:
+        offset = HEADER.size + index_length
+        offset += _align(offset)
+        for name, width, height, pixels, (size, mtime) in images:
+            index[name] = (offset, width, height, size, mtime)
+            offset += len(pixels)
+            offset += _align(offset)
+        encoded = json.dumps(index, separators=(",", ":")).encode()
+        if len(encoded) <= index_length:
+            break
+        index_length = len(encoded)
+
+    with open(output_path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, index_length))
+        file.write(encoded.ljust(index_length))
+        for name, _, _, pixels, _ in images:
+            file.write(bytes(_align(file.tell())))
+            assert file.tell() == index[name][0]
+            file.write(pixels)
+
+    return index
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Pack the built-in resources into a bundle."
+    )
+    parser.add_argument("--resources", type=Path, default=RESOURCES_PATH)
+    parser.add_argument("--output", type=Path, default=BUNDLE_PATH)
+    args = parser.parse_args()
+
+    index = build_bundle(args.resources, args.output)
+    print(f"Packed {len(index)} images into {args.output}")
+
+
+if __name__ == "__main__":
+    main()
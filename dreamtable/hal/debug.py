@@ -3,18 +3,21 @@ A "hardware abstraction layer" with a fake implementation.
 """
 
 import logging
+from typing import List, Sequence, Type
 import uuid
 
 import esper
 
-from dreamtable.hal.base import HAL
+from dreamtable.hal.base import E, HAL
 from dreamtable.hal.geom import Rect, Vec2
+from dreamtable.hal.input import InputQueue
 from dreamtable.hal.types import (
     Camera,
     Color,
     FontHandle,
     ImageHandle,
-    Key,
+    InputEvent,
+    KeySet,
     MouseButton,
     TextureFormat,
     TextureHandle,
@@ -25,6 +28,9 @@ logging.basicConfig(level=logging.DEBUG)
 
 
 class DebugHAL(HAL):
+    def __init__(self) -> None:
+        self._input = InputQueue()
+
     def init_window(self, width: int, height: int, title: str) -> None:
         logger.debug(f"init_window({width=}, {height=}, {title=})")
 
@@ -49,11 +55,27 @@ class DebugHAL(HAL):
         logger.debug(f"gen_image_from_color({size=}, {color=})")
         return str(uuid.uuid4())
 
+    def load_image_from_data(self, data: bytes, size: Vec2) -> ImageHandle:
+        logger.debug(f"load_image_from_data({len(data)=}, {size=})")
+        return str(uuid.uuid4())
+
+    def load_render_texture(self, size: Vec2) -> TextureHandle:
+        logger.debug(f"load_render_texture({size=})")
+        return str(uuid.uuid4())
+
     def draw_image_line(
         self, image_handle: ImageHandle, start: Vec2, end: Vec2, color: Color
     ) -> None:
         logger.debug(f"draw_image_line({image_handle=}, {start=}, {end=}, {color=})")
 
+    def stamp_image(
+        self,
+        image_handle: ImageHandle,
+        brush_handle: ImageHandle,
+        positions: Sequence[Vec2],
+    ) -> None:
+        logger.debug(f"stamp_image({image_handle=}, {brush_handle=}, {positions=})")
+
     def get_image_size(self, image_handle: ImageHandle) -> Vec2:
         logger.debug(f"get_image_size({image_handle=})")
         return Vec2()
@@ -62,6 +84,11 @@ class DebugHAL(HAL):
         logger.debug(f"get_image_color({image_handle=}, {pos=})")
         return Color()
 
+    def get_image_data(self, image_handle: ImageHandle) -> bytes:
+        logger.debug(f"get_image_data({image_handle=})")
+        size = self.get_image_size(image_handle)
+        return bytes(int(size.x) * int(size.y) * 4)
+
     def update_texture_from_image(
         self, texture_handle: TextureHandle, image_handle: ImageHandle
     ) -> None:
@@ -89,6 +116,12 @@ class DebugHAL(HAL):
     def set_clear_color(self, color: Color) -> None:
         logger.debug(f"set_clear_color({color=})")
 
+    def begin_texture_mode(self, texture_handle: TextureHandle) -> None:
+        logger.debug(f"begin_texture_mode({texture_handle=})")
+
+    def end_texture_mode(self) -> None:
+        logger.debug("end_texture_mode()")
+
     # todo reorder these: text, position, font, color, size=8, spacing=1
     def draw_text(
         self,
@@ -136,20 +169,24 @@ class DebugHAL(HAL):
             f"draw_texture_rect({texture_handle=}, {source_rect=}, {pos=}, {tint=})"
         )
 
+    def draw_texture_pro(
+        self,
+        texture_handle: TextureHandle,
+        source_rect: Rect,
+        dest_rect: Rect,
+        tint: Color = Color(255, 255, 255, 255),
+    ) -> None:
+        logger.debug(
+            f"draw_texture_pro({texture_handle=}, {source_rect=}, {dest_rect=}, "
+            f"{tint=})"
+        )
+
     def measure_text(
         self, font: FontHandle, text: str, size: int, spacing: int
     ) -> Vec2:
         logger.debug(f"measure_text({font=}, {text=}, {size=}, {spacing=})")
         return Vec2()
 
-    def get_mouse_position(self) -> Vec2:
-        logger.debug("get_mouse_position()")
-        return Vec2()
-
-    def get_mouse_wheel_move(self) -> float:
-        logger.debug("get_mouse_wheel_move()")
-        return 0
-
     def get_screen_size(self) -> Vec2:
         logger.debug("get_screen_size()")
         return Vec2()
@@ -158,26 +195,41 @@ class DebugHAL(HAL):
         logger.debug("get_screen_rect()")
         return Rect()
 
-    def is_key_pressed(self, key: Key) -> bool:
-        logger.debug(f"is_key_pressed({key=})")
-        return False
+    def get_input_events(self, event_type: Type[E]) -> List[E]:
+        logger.debug(f"get_input_events({event_type=})")
+        return self._input.get(event_type)
 
-    def is_key_down(self, key: Key) -> bool:
-        logger.debug(f"is_key_down({key=})")
-        return False
+    def get_all_input_events(self) -> List[InputEvent]:
+        logger.debug("get_all_input_events()")
+        return self._input.events
+
+    def get_held_keys(self) -> KeySet:
+        logger.debug("get_held_keys()")
+        return self._input.held_keys
 
     def is_mouse_button_down(self, mouse_button: MouseButton) -> bool:
         logger.debug(f"is_mouse_button_down({mouse_button=})")
-        return False
+        return mouse_button in self._input.held_buttons
 
-    def is_mouse_button_pressed(self, mouse_button: MouseButton) -> bool:
-        logger.debug(f"is_mouse_button_pressed({mouse_button=})")
-        return False
+    def get_mouse_position(self) -> Vec2:
+        logger.debug("get_mouse_position()")
+        return self._input.mouse_position.copy()
+
+    def get_mouse_delta(self) -> Vec2:
+        logger.debug("get_mouse_delta()")
+        return self._input.mouse_delta.copy()
 
-    def is_mouse_button_released(self, mouse_button: MouseButton) -> bool:
-        logger.debug(f"is_mouse_button_released({mouse_button=})")
+    def request_frame(self) -> None:
+        logger.debug("request_frame()")
+
+    def is_frame_requested(self) -> bool:
+        logger.debug("is_frame_requested()")
         return False
 
+    def get_frame_time(self) -> float:
+        logger.debug("get_frame_time()")
+        return 1 / 60
+
     def run(self, world: esper.World) -> None:
         frame = 0
         try:
@@ -185,6 +237,7 @@ class DebugHAL(HAL):
                 frame += 1
                 logger.debug("-" * 80)
                 logger.debug(f"frame {frame}")
+                self._input.begin_frame()
                 world.process(self)
         except KeyboardInterrupt:
             logger.debug("quit")
@@ -30,66 +30,41 @@ Geometry classes.
 from __future__ import annotations
 
 import math
-import operator
 import random
-from dataclasses import dataclass
-from typing import Any, Callable, Iterator, Tuple, Union
+from typing import Iterable, Iterator, Optional, Tuple, Union
+
+import numpy as np
 
-BinaryOperator = Callable[[Any, Any], Any]
 Vec2Operand = Union["Vec2", float]
-Vec2Operator = Callable[["Vec2", Vec2Operand], "Vec2"]
 
 PHI = GOLDEN_RATIO = 1 / 2 + math.sqrt(5) / 2
 
 
-def _overload_left_side(f: BinaryOperator) -> Vec2Operator:
-    """Helper function to make left-side operators."""
-
-    def operator(self: Vec2, other: Vec2Operand) -> Vec2:
-        if isinstance(other, Vec2):
-            x, y = other.x, other.y
-        else:
-            x = y = other
-        return Vec2(f(self.x, x), f(self.y, y))
-
-    return operator
-
-
-def _overload_right_side(f: BinaryOperator) -> Vec2Operator:
-    """Helper function to make right-side operators."""
+class Vec2:
+    """
+    A mutable two-dimensional vector.
 
-    def operator(self: Vec2, other: Any) -> Vec2:
-        if isinstance(other, Vec2):
-            x, y = other.x, other.y
-        else:
-            x = y = other
-        return Vec2(f(x, self.x), f(y, self.y))
+    Vectors are created and thrown away constantly, so this is written out by
+    hand with __slots__ rather than being a dataclass, and each operator is its
+    own method. The in-place variants (+=, floor(), assign()...) don't allocate.
+    """
 
-    return operator
+    __slots__ = ("x", "y")
 
+    def __init__(self, x: float = 0, y: float = 0) -> None:
+        self.x = x
+        self.y = y
 
-def _overload_in_place(f: BinaryOperator) -> Vec2Operator:
-    """Helper function to make in-place operators."""
+    def __repr__(self) -> str:
+        return f"{type(self).__qualname__}(x={self.x!r}, y={self.y!r})"
 
-    def operator(self: Vec2, other: Any) -> Vec2:
+    def __eq__(self, other: object) -> bool:
         if isinstance(other, Vec2):
-            x, y = other.x, other.y
-        else:
-            x = y = other
-        self.x, self.y = f(self.x, x), f(self.y, y)
-        return self
+            return self.x == other.x and self.y == other.y
+        return NotImplemented
 
-    return operator
-
-
-@dataclass
-class Vec2:
-    """
-    A mutable two-dimensional vector.
-    """
-
-    x: float = 0
-    y: float = 0
+    # Mutable, so not hashable
+    __hash__ = None  # type: ignore
 
     @staticmethod
     def random(magnitude: float = 1) -> Vec2:
@@ -125,7 +100,8 @@ class Vec2:
 
     def assign(self, other: Vec2) -> None:
         """Copy the given vector into this one."""
-        self.x, self.y = other.xy
+        self.x = other.x
+        self.y = other.y
 
     def normalize(self) -> None:
         """
@@ -182,12 +158,15 @@ class Vec2:
         self.x = round(self.x, digits)
         self.y = round(self.y, digits)
 
-    def floor(self) -> None:
+    def floor(self) -> Vec2:
         """
         Round the elements of the given vector down to the nearest integer.
+        Returns the vector itself, so a temporary can be floored in place:
+        `(a - b).floor()` rather than `(a - b).floored`.
         """
         self.x = math.floor(self.x)
         self.y = math.floor(self.y)
+        return self
 
     def __iter__(self) -> Iterator[float]:
         """Iterate over this vector's coordinates."""
@@ -212,41 +191,135 @@ class Vec2:
         """Return the absolute value of this vector."""
         return Vec2(abs(self.x), abs(self.y))
 
-    __add__ = _overload_left_side(operator.add)
-    __radd__ = _overload_right_side(operator.add)
-    __iadd__ = _overload_in_place(operator.add)
+    def __add__(self, other: Vec2Operand) -> Vec2:
+        if isinstance(other, Vec2):
+            return Vec2(self.x + other.x, self.y + other.y)
+        return Vec2(self.x + other, self.y + other)
+
+    def __radd__(self, other: float) -> Vec2:
+        return Vec2(other + self.x, other + self.y)
+
+    def __iadd__(self, other: Vec2Operand) -> Vec2:
+        if isinstance(other, Vec2):
+            self.x += other.x
+            self.y += other.y
+        else:
+            self.x += other
+            self.y += other
+        return self
+
+    def __sub__(self, other: Vec2Operand) -> Vec2:
+        if isinstance(other, Vec2):
+            return Vec2(self.x - other.x, self.y - other.y)
+        return Vec2(self.x - other, self.y - other)
+
+    def __rsub__(self, other: float) -> Vec2:
+        return Vec2(other - self.x, other - self.y)
+
+    def __isub__(self, other: Vec2Operand) -> Vec2:
+        if isinstance(other, Vec2):
+            self.x -= other.x
+            self.y -= other.y
+        else:
+            self.x -= other
+            self.y -= other
+        return self
+
+    def __mul__(self, other: Vec2Operand) -> Vec2:
+        if isinstance(other, Vec2):
+            return Vec2(self.x * other.x, self.y * other.y)
+        return Vec2(self.x * other, self.y * other)
 
-    __sub__ = _overload_left_side(operator.sub)
-    __rsub__ = _overload_right_side(operator.sub)
-    __isub__ = _overload_in_place(operator.sub)
+    def __rmul__(self, other: float) -> Vec2:
+        return Vec2(other * self.x, other * self.y)
+
+    def __imul__(self, other: Vec2Operand) -> Vec2:
+        if isinstance(other, Vec2):
+            self.x *= other.x
+            self.y *= other.y
+        else:
+            self.x *= other
+            self.y *= other
+        return self
 
-    __mul__ = _overload_left_side(operator.mul)
-    __rmul__ = _overload_right_side(operator.mul)
-    __imul__ = _overload_in_place(operator.mul)
+    def __floordiv__(self, other: Vec2Operand) -> Vec2:
+        if isinstance(other, Vec2):
+            return Vec2(self.x // other.x, self.y // other.y)
+        return Vec2(self.x // other, self.y // other)
+
+    def __rfloordiv__(self, other: float) -> Vec2:
+        return Vec2(other // self.x, other // self.y)
+
+    def __ifloordiv__(self, other: Vec2Operand) -> Vec2:
+        if isinstance(other, Vec2):
+            self.x //= other.x
+            self.y //= other.y
+        else:
+            self.x //= other
+            self.y //= other
+        return self
+
+    def __truediv__(self, other: Vec2Operand) -> Vec2:
+        if isinstance(other, Vec2):
+            return Vec2(self.x / other.x, self.y / other.y)
+        return Vec2(self.x / other, self.y / other)
 
-    __floordiv__ = _overload_left_side(operator.floordiv)
-    __rfloordiv__ = _overload_right_side(operator.floordiv)
-    __ifloordiv__ = _overload_in_place(operator.floordiv)
+    def __rtruediv__(self, other: float) -> Vec2:
+        return Vec2(other / self.x, other / self.y)
 
-    __truediv__ = _overload_left_side(operator.truediv)
-    __rtruediv__ = _overload_right_side(operator.truediv)
-    __itruediv__ = _overload_in_place(operator.truediv)
+    def __itruediv__(self, other: Vec2Operand) -> Vec2:
+        if isinstance(other, Vec2):
+            self.x /= other.x
+            self.y /= other.y
+        else:
+            self.x /= other
+            self.y /= other
+        return self
+
+    def __mod__(self, other: Vec2Operand) -> Vec2:
+        if isinstance(other, Vec2):
+            return Vec2(self.x % other.x, self.y % other.y)
+        return Vec2(self.x % other, self.y % other)
+
+    def __rmod__(self, other: float) -> Vec2:
+        return Vec2(other % self.x, other % self.y)
+
+    def __imod__(self, other: Vec2Operand) -> Vec2:
+        if isinstance(other, Vec2):
+            self.x %= other.x
+            self.y %= other.y
+        else:
+            self.x %= other
+            self.y %= other
+        return self
+
+    def __pow__(self, other: Vec2Operand) -> Vec2:
+        if isinstance(other, Vec2):
+            return Vec2(self.x ** other.x, self.y ** other.y)
+        return Vec2(self.x ** other, self.y ** other)
+
+    def __rpow__(self, other: float) -> Vec2:
+        return Vec2(other ** self.x, other ** self.y)
+
+    def __ipow__(self, other: Vec2Operand) -> Vec2:
+        if isinstance(other, Vec2):
+            self.x **= other.x
+            self.y **= other.y
+        else:
+            self.x **= other
+            self.y **= other
+        return self
 
     __div__ = __truediv__
     __rdiv__ = __rtruediv__
     __idiv__ = __itruediv__
 
-    __mod__ = _overload_left_side(operator.mod)
-    __rmod__ = _overload_right_side(operator.mod)
-    __imod__ = _overload_in_place(operator.mod)
-
-    __pow__ = _overload_left_side(operator.pow)
-    __rpow__ = _overload_right_side(operator.pow)
-    __ipow__ = _overload_in_place(operator.pow)
-
     @property
     def xy(self) -> Tuple[float, float]:
-        """Return the vector as a tuple."""
+        """
+        Return the vector as a (new) tuple. For APIs and keys that need a
+        tuple; use x and y directly otherwise.
+        """
         return self.x, self.y
 
     @xy.setter
@@ -339,7 +412,7 @@ class Vec2:
     @radians.setter
     def radians(self, angle: float) -> None:
         """Set the angle that this vector makes with the x-axis."""
-        self._x, self._y = math.cos(angle), math.sin(angle)
+        self.x, self.y = math.cos(angle), math.sin(angle)
 
     @property
     def positive_radians(self) -> float:
@@ -384,7 +457,10 @@ class Vec2:
 
     @property
     def floored(self) -> Vec2:
-        """Return a vector with the elements rounded down to the nearest integer."""
+        """
+        Return a vector with the elements rounded down to the nearest integer.
+        This allocates; floor() works in place.
+        """
         result = self.copy()
         result.floor()
         return result
@@ -394,16 +470,39 @@ class Vec2:
     perp = perp_product
 
 
-@dataclass
 class Rect:
     """
-    A mutable two-dimensional rectangle.
+    A mutable two-dimensional rectangle. Slotted, like Vec2.
     """
 
-    x: float = 0
-    y: float = 0
-    width: float = 0
-    height: float = 0
+    __slots__ = ("x", "y", "width", "height")
+
+    def __init__(
+        self, x: float = 0, y: float = 0, width: float = 0, height: float = 0
+    ) -> None:
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__qualname__}(x={self.x!r}, y={self.y!r}, "
+            f"width={self.width!r}, height={self.height!r})"
+        )
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Rect):
+            return (
+                self.x == other.x
+                and self.y == other.y
+                and self.width == other.width
+                and self.height == other.height
+            )
+        return NotImplemented
+
+    # Mutable, so not hashable
+    __hash__ = None  # type: ignore
 
     #     @accept_anything_as_vector
     #     def __add__(self, vector):
@@ -509,16 +608,14 @@ class Rect:
     #         bottom = min(cast_anything_to_vector(p).y for p in points)
     #         return Rect.from_sides(left, top, right, bottom)
 
-    #     @staticmethod
-    #     def from_union(*inputs):
-    #         """Create a rectangle that contains all the given inputs.  Each input
-    #         must implement the `Shape` interface."""
-    #         rects = [cast_shape_to_rectangle(x) for x in inputs]
-    #         left = min(x.left for x in rects)
-    #         top = max(x.top for x in rects)
-    #         right = max(x.right for x in rects)
-    #         bottom = min(x.bottom for x in rects)
-    #         return Rect.from_sides(left, top, right, bottom)
+    @staticmethod
+    def from_union(*rects: Rect) -> Rect:
+        """Create the smallest rectangle that contains all the given ones."""
+        left = min(r.x for r in rects)
+        top = min(r.y for r in rects)
+        right = max(r.right for r in rects)
+        bottom = max(r.bottom for r in rects)
+        return Rect(left, top, right - left, bottom - top)
 
     #     @staticmethod
     #     def from_intersection(*inputs):
@@ -603,30 +700,26 @@ class Rect:
 
     def touching(self, other: Rect) -> bool:
         """Return true if this rectangle is touching the given shape."""
-        if self.y > other.bottom:
-            return False
-        if self.bottom < other.y:
-            return False
-
-        if self.x > other.right:
-            return False
-        if self.right < other.x:
-            return False
-
-        return True
+        return not (
+            self.y > other.y + other.height
+            or self.y + self.height < other.y
+            or self.x > other.x + other.width
+            or self.x + self.width < other.x
+        )
 
     def contains(self, other: Union[Vec2, Rect]) -> bool:
         """Return true if the other Vec2 or Rect is inside this rectangle."""
         if isinstance(other, Vec2):
-            return (self.x <= other.x < self.right) and (
-                self.y <= other.y < self.bottom
+            return (
+                self.x <= other.x < self.x + self.width
+                and self.y <= other.y < self.y + self.height
             )
         else:
             return (
                 self.x <= other.x
-                and self.right >= other.right
-                and self.y >= other.y
-                and self.bottom <= other.bottom
+                and self.x + self.width >= other.x + other.width
+                and self.y <= other.y
+                and self.y + self.height >= other.y + other.height
             )
 
     #     @accept_anything_as_rectangle
@@ -770,8 +863,15 @@ class Rect:
 
     @property
     def center(self) -> Vec2:
+        """A new vector; center_into() reuses one."""
         return Vec2(self.center_x, self.center_y)
 
+    def center_into(self, out: Vec2) -> Vec2:
+        """Write the center of this rectangle into `out`, and return it."""
+        out.x = self.x + self.width / 2
+        out.y = self.y + self.height / 2
+        return out
+
     #     @accept_anything_as_vector
     #     def set_center(self, point):
     #         self.center_y = point[1]
@@ -861,14 +961,142 @@ class Rect:
     #         result.round(digits)
     #         return result
 
-    def floor(self) -> None:
+    def floor(self) -> Rect:
+        """Like Vec2.floor(): in place, returning the rectangle itself."""
         self.x = math.floor(self.x)
         self.y = math.floor(self.y)
         self.width = math.floor(self.width)
         self.height = math.floor(self.height)
+        return self
 
     @property
     def floored(self) -> Rect:
+        """A floored copy; floor() works in place."""
         result = self.copy()
         result.floor()
         return result
+
+
+class Vec2Array:
+    """
+    Many vectors at once, as an (n, 2) array, for when doing the same thing to
+    each of them one by one would be slow.
+    """
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: Optional[np.ndarray] = None) -> None:
+        self.data = np.zeros((0, 2)) if data is None else data
+
+    @staticmethod
+    def from_vec2s(vec2s: Iterable[Vec2]) -> Vec2Array:
+        return Vec2Array(np.array([v.xy for v in vec2s], dtype=float).reshape(-1, 2))
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __getitem__(self, i: int) -> Vec2:
+        x, y = self.data[i]
+        return Vec2(float(x), float(y))
+
+    def __repr__(self) -> str:
+        return f"Vec2Array({self.data!r})"
+
+    @property
+    def x(self) -> np.ndarray:
+        return self.data[:, 0]
+
+    @property
+    def y(self) -> np.ndarray:
+        return self.data[:, 1]
+
+    def transform(self, scale: Vec2Operand, offset: Vec2) -> None:
+        """Scale then offset every vector, in place."""
+        self.data *= scale.xy if isinstance(scale, Vec2) else scale
+        self.data += offset.xy
+
+    def transformed(self, scale: Vec2Operand, offset: Vec2) -> Vec2Array:
+        result = Vec2Array(self.data.copy())
+        result.transform(scale, offset)
+        return result
+
+    @property
+    def floored(self) -> Vec2Array:
+        return Vec2Array(np.floor(self.data))
+
+
+class RectArray:
+    """
+    Many rectangles at once, as an (n, 4) array of x, y, width, height, with
+    batch versions of Rect's tests.
+    """
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: Optional[np.ndarray] = None) -> None:
+        self.data = np.zeros((0, 4)) if data is None else data
+
+    @staticmethod
+    def from_rects(rects: Iterable[Rect]) -> RectArray:
+        return RectArray(np.array([r.xywh for r in rects], dtype=float).reshape(-1, 4))
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __getitem__(self, i: int) -> Rect:
+        x, y, width, height = self.data[i]
+        return Rect(float(x), float(y), float(width), float(height))
+
+    def __repr__(self) -> str:
+        return f"RectArray({self.data!r})"
+
+    @property
+    def x(self) -> np.ndarray:
+        return self.data[:, 0]
+
+    @property
+    def y(self) -> np.ndarray:
+        return self.data[:, 1]
+
+    @property
+    def width(self) -> np.ndarray:
+        return self.data[:, 2]
+
+    @property
+    def height(self) -> np.ndarray:
+        return self.data[:, 3]
+
+    @property
+    def right(self) -> np.ndarray:
+        return self.data[:, 0] + self.data[:, 2]
+
+    @property
+    def bottom(self) -> np.ndarray:
+        return self.data[:, 1] + self.data[:, 3]
+
+    def contains(self, point: Vec2) -> np.ndarray:
+        """Which rectangles contain the given point, as a boolean array."""
+        x, y = point.x, point.y
+        return (
+            (self.x <= x) & (x < self.right) & (self.y <= y) & (y < self.bottom)
+        )
+
+    def touching(self, rect: Rect) -> np.ndarray:
+        """Which rectangles touch the given one, as a boolean array."""
+        return ~(
+            (self.y > rect.y + rect.height)
+            | (self.bottom < rect.y)
+            | (self.x > rect.x + rect.width)
+            | (self.right < rect.x)
+        )
+
+    def transform(self, scale: Vec2Operand, offset: Vec2) -> None:
+        """Scale then offset every rectangle, in place."""
+        scale_xy = scale.xy if isinstance(scale, Vec2) else (scale, scale)
+        self.data *= scale_xy * 2
+        self.data[:, :2] += offset.xy
+
+    def transformed(self, scale: Vec2Operand, offset: Vec2) -> RectArray:
+        result = RectArray(self.data.copy())
+        result.transform(scale, offset)
+        return result
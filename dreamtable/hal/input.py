@@ -0,0 +1,70 @@
+"""
+Per-frame input event queue shared by the HAL backends.
+"""
+
+from typing import Dict, List, Set, Type, TypeVar
+
+from dreamtable.hal.geom import Vec2
+from dreamtable.hal.types import (
+    InputEvent,
+    KeyPressed,
+    KeyReleased,
+    KeySet,
+    MouseButton,
+    MouseButtonPressed,
+    MouseButtonReleased,
+    MouseMoved,
+)
+
+E = TypeVar("E", bound=InputEvent)
+
+NO_EVENTS: List = []
+
+
+class InputQueue:
+    """
+    Collects the input events that arrive during a frame, bucketed by event
+    type, and tracks what is currently held down.
+
+    Backends call begin_frame() before polling and push() for each event;
+    processors then only look at the buckets they care about, so the cost of
+    a frame depends on how much input there was rather than on how many keys
+    exist.
+    """
+
+    def __init__(self) -> None:
+        self.events: List[InputEvent] = []
+        self.held_keys = KeySet()
+        self.held_buttons: Set[MouseButton] = set()
+        self.mouse_position = Vec2()
+        self.mouse_delta = Vec2()
+        self._by_type: Dict[type, List[InputEvent]] = {}
+
+    def begin_frame(self) -> None:
+        self.events.clear()
+        self._by_type.clear()
+        self.mouse_delta = Vec2()
+
+    def push(self, event: InputEvent) -> None:
+        self.events.append(event)
+        self._by_type.setdefault(type(event), []).append(event)
+
+        if isinstance(event, MouseMoved):
+            self.mouse_position = event.position
+            self.mouse_delta = self.mouse_delta + event.delta
+        elif isinstance(event, KeyPressed):
+            self.held_keys.add(event.key)
+        elif isinstance(event, KeyReleased):
+            self.held_keys.discard(event.key)
+        elif isinstance(event, MouseButtonPressed):
+            self.held_buttons.add(event.button)
+        elif isinstance(event, MouseButtonReleased):
+            self.held_buttons.discard(event.button)
+
+    def move_mouse(self, position: Vec2) -> None:
+        """Queue a MouseMoved event if the pointer is no longer at `position`."""
+        if position != self.mouse_position:
+            self.push(MouseMoved(position, position - self.mouse_position))
+
+    def get(self, event_type: Type[E]) -> List[E]:
+        return self._by_type.get(event_type, NO_EVENTS)  # type: ignore
@@ -0,0 +1,230 @@
+"""
+Images kept in main memory as NumPy arrays, for backends whose graphics library
+has no image type of its own (or none worth using).
+"""
+
+import math
+from typing import Dict, Optional, Sequence, Tuple, Union
+import uuid
+
+import numpy as np
+
+from dreamtable.hal.bundle import ResourceBundle, resource_file
+from dreamtable.hal.geom import Vec2
+from dreamtable.hal.png import decode_png, encode_png
+from dreamtable.hal.types import (
+    Color,
+    ImageHandle,
+    TextureFormat,
+    TextureHandle,
+)
+
+# uint8 arrays of R8G8B8A8 pixels, shaped (height, width, 4)
+Pixels = np.ndarray
+
+# Part of an image: left, top, right, bottom, in whole pixels
+Box = Tuple[int, int, int, int]
+
+
+def pixels_from_data(data: Union[bytes, memoryview], size: Vec2) -> Pixels:
+    """A (writable) array of the R8G8B8A8 pixels in `data`."""
+    shape = (int(size.y), int(size.x), 4)
+    return np.frombuffer(data, dtype=np.uint8).reshape(shape).copy()
+
+
+def _union(box: Optional[Box], other: Box) -> Box:
+    if box is None:
+        return other
+    return (
+        min(box[0], other[0]),
+        min(box[1], other[1]),
+        max(box[2], other[2]),
+        max(box[3], other[3]),
+    )
+
+
+def premultiply(pixels: Pixels) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pixels as float colors with their alpha multiplied in, and their alphas,
+    both from 0 to 1: ready to be composited, over and over.
+    """
+    alpha = pixels[..., 3:] * np.float32(1 / 255)
+    return pixels[..., :3] * np.float32(1 / 255) * alpha, alpha
+
+
+def composite(dest: Pixels, color: np.ndarray, alpha: np.ndarray) -> None:
+    """
+    Put premultiplied pixels over `dest` in place, with alpha compositing;
+    either one may be translucent.
+    """
+    below_alpha = dest[..., 3:] * np.float32(1 / 255) * (1 - alpha)
+    out_alpha = alpha + below_alpha
+    out_color = dest[..., :3] * np.float32(1 / 255) * below_alpha
+    out_color += color
+    np.divide(out_color, out_alpha, out=out_color, where=out_alpha > 0)
+    dest[..., :3] = out_color * 255 + 0.5
+    dest[..., 3:] = out_alpha * 255 + 0.5
+
+
+class NumPyImages:
+    """
+    The image half of a HAL, with every image a Pixels array. Mix it in ahead
+    of HAL; the backend still makes and draws the textures.
+
+    It also keeps track of which part of an image each texture made from it
+    is missing, so that update_texture_from_image() can copy only that part.
+    Backends call _track_texture() when they make a texture from an image,
+    _take_changes() when they update one, and _forget_texture() when they
+    unload one.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._images: Dict[ImageHandle, Pixels] = {}
+        self._bundle = ResourceBundle.builtin()
+
+        # For each image, the textures made from it, and the part of the
+        # image each has yet to catch up on (None if it's up to date)
+        self._changes: Dict[ImageHandle, Dict[TextureHandle, Optional[Box]]] = {}
+        self._texture_sources: Dict[TextureHandle, ImageHandle] = {}
+
+    def _load_pixels(self, resource_path: str) -> Pixels:
+        bundled = self._bundle and self._bundle.get(resource_path)
+        if bundled:
+            return pixels_from_data(*bundled)
+        with open(resource_file(resource_path), "rb") as file:
+            width, height, data = decode_png(file)
+        return pixels_from_data(data, Vec2(width, height))
+
+    # Change tracking
+
+    def _track_texture(
+        self, texture_handle: TextureHandle, image_handle: ImageHandle
+    ) -> None:
+        """Note that a texture was just made from (all of) an image."""
+        self._forget_texture(texture_handle)
+        self._changes.setdefault(image_handle, {})[texture_handle] = None
+        self._texture_sources[texture_handle] = image_handle
+
+    def _forget_texture(self, texture_handle: TextureHandle) -> None:
+        image_handle = self._texture_sources.pop(texture_handle, None)
+        if image_handle in self._changes:
+            self._changes[image_handle].pop(texture_handle, None)
+
+    def _take_changes(
+        self, texture_handle: TextureHandle, image_handle: ImageHandle
+    ) -> Optional[Box]:
+        """
+        The part of an image a texture has to be updated with, or None if
+        it's up to date. A texture that wasn't made from this image needs all
+        of it. Either way, the texture counts as up to date afterwards.
+        """
+        textures = self._changes.get(image_handle, {})
+        if texture_handle in textures:
+            box = textures[texture_handle]
+        else:
+            height, width = self._images[image_handle].shape[:2]
+            box = (0, 0, width, height)
+        self._track_texture(texture_handle, image_handle)
+        return box
+
+    def _mark_changed(self, image_handle: ImageHandle, box: Box) -> None:
+        textures = self._changes.get(image_handle, {})
+        for texture_handle, changed in textures.items():
+            textures[texture_handle] = _union(changed, box)
+
+    # Loading / unloading
+
+    def load_image(self, resource_path: str) -> ImageHandle:
+        image_handle = str(uuid.uuid4())
+        self._images[image_handle] = self._load_pixels(resource_path)
+        return image_handle
+
+    def gen_image_from_color(self, size: Vec2, color: Color) -> ImageHandle:
+        image_handle = str(uuid.uuid4())
+        image = np.empty((int(size.y), int(size.x), 4), dtype=np.uint8)
+        image[...] = color.rgba
+        self._images[image_handle] = image
+        return image_handle
+
+    def load_image_from_data(self, data: bytes, size: Vec2) -> ImageHandle:
+        image_handle = str(uuid.uuid4())
+        self._images[image_handle] = pixels_from_data(data, size)
+        return image_handle
+
+    def unload_image(self, image_handle: ImageHandle) -> None:
+        del self._images[image_handle]
+        for texture_handle in self._changes.pop(image_handle, {}):
+            del self._texture_sources[texture_handle]
+
+    # Reading / writing
+
+    def set_image_format(
+        self, image_handle: ImageHandle, format: TextureFormat
+    ) -> None:
+        if format != TextureFormat.UNCOMPRESSED_R8G8B8A8:
+            raise NotImplementedError("NumPy images are always R8G8B8A8")
+
+    def draw_image_line(
+        self, image_handle: ImageHandle, start: Vec2, end: Vec2, color: Color
+    ) -> None:
+        image = self._images[image_handle]
+        steps = int(max(abs(end.x - start.x), abs(end.y - start.y)))
+        t = np.linspace(0, 1, steps + 1)
+        xs = np.floor(start.x + (end.x - start.x) * t + 0.5).astype(np.intp)
+        ys = np.floor(start.y + (end.y - start.y) * t + 0.5).astype(np.intp)
+        height, width = image.shape[:2]
+        inside = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+        xs, ys = xs[inside], ys[inside]
+        if not len(xs):
+            return
+        image[ys, xs] = color.rgba
+        box = (int(xs.min()), int(ys.min()), int(xs.max()) + 1, int(ys.max()) + 1)
+        self._mark_changed(image_handle, box)
+
+    def stamp_image(
+        self,
+        image_handle: ImageHandle,
+        brush_handle: ImageHandle,
+        positions: Sequence[Vec2],
+    ) -> None:
+        image = self._images[image_handle]
+        height, width = image.shape[:2]
+        brush = self._images[brush_handle]
+        brush_height, brush_width = brush.shape[:2]
+
+        # The brush is premultiplied once for all of its stamps. (That makes a
+        # copy, too, so it can be stamped on itself.)
+        color, alpha = premultiply(brush)
+
+        # Each stamp only touches where it overlaps the image, and together
+        # they make one change
+        box: Optional[Box] = None
+        for pos in positions:
+            left, top = math.floor(pos.x), math.floor(pos.y)
+            x0, x1 = max(left, 0), min(left + brush_width, width)
+            y0, y1 = max(top, 0), min(top + brush_height, height)
+            if x0 >= x1 or y0 >= y1:
+                continue
+            part = (slice(y0 - top, y1 - top), slice(x0 - left, x1 - left))
+            composite(image[y0:y1, x0:x1], color[part], alpha[part])
+            box = _union(box, (x0, y0, x1, y1))
+        if box is not None:
+            self._mark_changed(image_handle, box)
+
+    def get_image_size(self, image_handle: ImageHandle) -> Vec2:
+        height, width = self._images[image_handle].shape[:2]
+        return Vec2(width, height)
+
+    def get_image_color(self, image_handle: ImageHandle, pos: Vec2) -> Color:
+        r, g, b, a = self._images[image_handle][int(pos.y), int(pos.x)]
+        return Color(int(r), int(g), int(b), int(a))
+
+    def get_image_data(self, image_handle: ImageHandle) -> bytes:
+        return self._images[image_handle].tobytes()
+
+    def export_image(self, image_handle: ImageHandle, filename: str) -> None:
+        image = self._images[image_handle]
+        height, width = image.shape[:2]
+        with open(filename, "wb") as file:
+            file.write(encode_png(width, height, image.tobytes()))
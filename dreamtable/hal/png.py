@@ -0,0 +1,216 @@
+"""
+A small PNG decoder (and encoder), for backends and build steps that can't lean
+on a graphics library to read and write images.
+
+Handles every color type and bit depth the format allows, including palettes
+and tRNS transparency, but not interlacing. Pixels come out as R8G8B8A8 rows
+from the top down, the same layout as HAL.get_image_data().
+"""
+
+import struct
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
+import zlib
+
+SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# Channels per pixel, by color type
+CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+
+GRAYSCALE = 0
+TRUECOLOR = 2
+INDEXED = 3
+GRAYSCALE_ALPHA = 4
+TRUECOLOR_ALPHA = 6
+
+
+class PNGError(ValueError):
+    pass
+
+
+def read_chunks(data: bytes) -> Dict[bytes, List[bytes]]:
+    """The chunks of a PNG file, by type, in order."""
+    if not data.startswith(SIGNATURE):
+        raise PNGError("Not a PNG file")
+
+    chunks: Dict[bytes, List[bytes]] = {}
+    offset = len(SIGNATURE)
+    while offset < len(data):
+        length, chunk_type = struct.unpack_from(">I4s", data, offset)
+        start = offset + 8
+        end = start + length
+        if end + 4 > len(data):
+            raise PNGError("Truncated PNG file")
+        chunks.setdefault(chunk_type, []).append(data[start:end])
+        offset = end + 4  # skip the CRC
+        if chunk_type == b"IEND":
+            break
+    return chunks
+
+
+def _unfilter(raw: bytes, height: int, stride: int, bpp: int) -> bytearray:
+    """Undo the per-row filters, returning the packed rows back to back."""
+    out = bytearray(height * stride)
+    prior = bytearray(stride)
+    pos = 0
+    for y in range(height):
+        filter_type = raw[pos]
+        row_start = pos + 1
+        row_end = row_start + stride
+        row = bytearray(raw[row_start:row_end])
+        pos = row_end
+
+        if filter_type == 1:  # Sub
+            for i in range(bpp, stride):
+                row[i] = (row[i] + row[i - bpp]) & 0xFF
+        elif filter_type == 2:  # Up
+            row = bytearray((a + b) & 0xFF for a, b in zip(row, prior))
+        elif filter_type == 3:  # Average
+            for i in range(stride):
+                left = row[i - bpp] if i >= bpp else 0
+                row[i] = (row[i] + ((left + prior[i]) >> 1)) & 0xFF
+        elif filter_type == 4:  # Paeth
+            for i in range(stride):
+                a = row[i - bpp] if i >= bpp else 0
+                b = prior[i]
+                c = prior[i - bpp] if i >= bpp else 0
+                p = a + b - c
+                pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+                if pa <= pb and pa <= pc:
+                    predictor = a
+                elif pb <= pc:
+                    predictor = b
+                else:
+                    predictor = c
+                row[i] = (row[i] + predictor) & 0xFF
+        elif filter_type != 0:
+            raise PNGError(f"Unknown filter type {filter_type}")
+
+        row_out = y * stride
+        row_out_end = row_out + stride
+        out[row_out:row_out_end] = row
+        prior = row
+    return out
+
+
+def _samples(
+    rows: bytearray, width: int, height: int, depth: int, channels: int
+) -> List[int]:
+    """
+    Unpack rows of samples into one int per sample. 16 bit samples are cut
+    down to their high byte; smaller ones are left as they are.
+    """
+    if depth == 8:
+        return list(rows)
+    if depth == 16:
+        return list(rows[::2])
+
+    stride = (width * channels * depth + 7) // 8
+    per_byte = 8 // depth
+    mask = (1 << depth) - 1
+    samples = []
+    count = width * channels
+    for y in range(height):
+        row_start = y * stride
+        row_end = row_start + stride
+        row = rows[row_start:row_end]
+        unpacked = [
+            (byte >> (8 - depth * (i + 1))) & mask
+            for byte in row
+            for i in range(per_byte)
+        ]
+        samples.extend(unpacked[:count])
+    return samples
+
+
+def decode_png(file: Union[bytes, BinaryIO]) -> Tuple[int, int, bytes]:
+    """Decode a PNG, returning (width, height, R8G8B8A8 pixels)."""
+    data = file if isinstance(file, bytes) else file.read()
+    chunks = read_chunks(data)
+    if b"IHDR" not in chunks or b"IDAT" not in chunks:
+        raise PNGError("PNG file is missing its header or data")
+
+    width, height, depth, color_type, _, _, interlace = struct.unpack(
+        ">IIBBBBB", chunks[b"IHDR"][0]
+    )
+    if color_type not in CHANNELS:
+        raise PNGError(f"Unknown color type {color_type}")
+    if interlace:
+        raise PNGError("Interlaced PNGs aren't supported")
+
+    channels = CHANNELS[color_type]
+    bits_per_pixel = channels * depth
+    stride = (width * bits_per_pixel + 7) // 8
+    bpp = max(1, bits_per_pixel // 8)
+
+    raw = zlib.decompress(b"".join(chunks[b"IDAT"]))
+    rows = _unfilter(raw, height, stride, bpp)
+
+    transparency = chunks.get(b"tRNS", [b""])[0]
+    if color_type == INDEXED:
+        palette = chunks[b"PLTE"][0]
+        colors = [
+            bytes(rgb) + bytes([transparency[i] if i < len(transparency) else 255])
+            for i, rgb in enumerate(struct.iter_unpack("3B", palette))
+        ]
+        indices = _samples(rows, width, height, depth, 1) if depth < 8 else rows
+        return width, height, b"".join(colors[i] for i in indices)
+
+    samples = _samples(rows, width, height, depth, channels)
+    if depth < 8:
+        # Scale up to the full 8 bit range
+        scale = 255 // ((1 << depth) - 1)
+        samples = [s * scale for s in samples]
+
+    key = _transparent_key(transparency, depth)
+    pixels = bytearray(width * height * 4)
+
+    if color_type == GRAYSCALE:
+        pixels[0::4] = pixels[1::4] = pixels[2::4] = bytes(samples)
+        pixels[3::4] = bytes(0 if (s,) == key else 255 for s in samples)
+    elif color_type == GRAYSCALE_ALPHA:
+        gray = bytes(samples[0::2])
+        pixels[0::4] = pixels[1::4] = pixels[2::4] = gray
+        pixels[3::4] = bytes(samples[1::2])
+    elif color_type == TRUECOLOR:
+        for channel in range(3):
+            pixels[channel::4] = bytes(samples[channel::3])
+        rgb = zip(samples[0::3], samples[1::3], samples[2::3])
+        pixels[3::4] = bytes(0 if color == key else 255 for color in rgb)
+    else:
+        pixels[:] = bytes(samples)
+
+    return width, height, bytes(pixels)
+
+
+def _transparent_key(transparency: bytes, depth: int) -> Optional[Tuple[int, ...]]:
+    """The one color that tRNS marks as transparent, scaled to 8 bits."""
+    if not transparency:
+        return None
+    values = struct.unpack(f">{len(transparency) // 2}H", transparency)
+    if depth == 16:
+        return tuple(v >> 8 for v in values)
+    if depth < 8:
+        scale = 255 // ((1 << depth) - 1)
+        return tuple(v * scale for v in values)
+    return values
+
+
+def _chunk(chunk_type: bytes, data: bytes) -> bytes:
+    crc = zlib.crc32(chunk_type + data)
+    return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", crc)
+
+
+def encode_png(width: int, height: int, pixels: bytes) -> bytes:
+    """Encode R8G8B8A8 pixels as an (unfiltered) RGBA PNG."""
+    stride = width * 4
+    rows = bytearray()
+    for start in range(0, height * stride, stride):
+        end = start + stride
+        rows += b"\x00" + pixels[start:end]
+    header = struct.pack(">IIBBBBB", width, height, 8, TRUECOLOR_ALPHA, 0, 0, 0)
+    return (
+        SIGNATURE
+        + _chunk(b"IHDR", header)
+        + _chunk(b"IDAT", zlib.compress(bytes(rows)))
+        + _chunk(b"IEND", b"")
+    )
@@ -2,28 +2,41 @@
 A "hardware abstraction layer" that uses PyRay from python-raylib-cffi.
 """
 
-from pathlib import Path
-from typing import Any, Dict, Set, cast
+from typing import Any, Dict, List, Sequence, Type, Union, cast
 from typing_extensions import Protocol
 import uuid
 
 from esper import World
+from raylib import ffi
 from raylib.pyray import PyRay
 
-from dreamtable.hal.base import HAL
+from dreamtable.hal.base import E, HAL, SETTLE_FRAMES
+from dreamtable.hal.bundle import ResourceBundle, resource_file
 from dreamtable.hal.geom import Rect, Vec2
+from dreamtable.hal.input import InputQueue
 from dreamtable.hal.types import (
+    KEYS_BY_VALUE,
     Camera,
     Color,
     FontHandle,
     ImageHandle,
-    Key,
+    InputEvent,
+    KeyPressed,
+    KeyReleased,
+    KeySet,
     MouseButton,
+    MouseButtonPressed,
+    MouseButtonReleased,
+    MouseWheelMoved,
     TextureFormat,
     TextureHandle,
 )
 
-PACKAGE_PATH = Path(__file__).parents[1]
+# How raylib finds the glyphs in an image font
+FONT_KEY_COLOR = Color(255, 0, 255, 255)
+FONT_FIRST_CHAR = 32
+
+Buffer = Union[bytes, memoryview]
 
 
 def _vec2(v: Any) -> Vec2:
@@ -41,27 +54,33 @@ class PyRayImage(Protocol):
 
 
 class PyRayTexture(Protocol):
-    pass
+    width: int
+    height: int
+
+
+class PyRayRenderTexture(Protocol):
+    texture: PyRayTexture
 
 
 class PyRayHAL(HAL):
-    def __init__(self) -> None:
+    def __init__(self, target_fps: int = 60) -> None:
         self.pyray = PyRay()
         # self.pyray.set_config_flags(pyray.FLAG_WINDOW_RESIZABLE)
-        self.pyray.set_target_fps(60)
+        # 0 draws frames as fast as possible
+        self.pyray.set_target_fps(target_fps)
 
         self._clear_color = Color(0, 0, 0, 255)
         self._fonts: Dict[FontHandle, PyRayFont] = {}
         self._images: Dict[ImageHandle, PyRayImage] = {}
         self._textures: Dict[TextureHandle, PyRayTexture] = {}
+        self._render_textures: Dict[TextureHandle, PyRayRenderTexture] = {}
 
-        self._cleared_key_presses: Set[Key] = set()
-        self._cleared_key_releases: Set[Key] = set()
-        self._cleared_mouse_button_presses: Set[MouseButton] = set()
-        self._cleared_mouse_button_releases: Set[MouseButton] = set()
-        self._is_mouse_wheel_move_cleared = False
-        self._mouse_delta = Vec2()
-        self._mouse_position = Vec2()
+        self._input = InputQueue()
+        self._bundle = ResourceBundle.builtin()
+
+        self._is_frame_requested = False
+        self._is_event_waiting = False
+        self._settle_frames = SETTLE_FRAMES
 
     # Window and screen
 
@@ -98,35 +117,53 @@ class PyRayHAL(HAL):
     # Resource loading / unloading
 
     # todo: whoops, these aren't idempotent
-    # duplicate will clobber already-loaded resources
-    # if we share the resmap, how do we know when to free? reference counting?
+    # Every load gets a handle of its own, like the other backends: whoever
+    # loaded a resource owns it, and unloading it can't pull it out from under
+    # anyone else who loaded the same file
+
     def load_font(self, resource_path: str) -> FontHandle:
-        if not resource_path.startswith("res://"):
-            raise ValueError("Invalid resource path")
-        path = PACKAGE_PATH / "resources" / resource_path[6:]
-        self._fonts[resource_path] = self.pyray.load_font(str(path))
-        return resource_path
+        font_handle = str(uuid.uuid4())
+        bundled = self._bundle and self._bundle.get(resource_path)
+        if bundled:
+            # What raylib's LoadFont() does with an image font
+            image = self._image_from_data(*bundled)
+            self._fonts[font_handle] = self.pyray.load_font_from_image(
+                image, FONT_KEY_COLOR.rgba, FONT_FIRST_CHAR
+            )
+            self.pyray.unload_image(image)
+        else:
+            path = resource_file(resource_path)
+            self._fonts[font_handle] = self.pyray.load_font(str(path))
+        return font_handle
 
     def load_image(self, resource_path: str) -> ImageHandle:
-        if not resource_path.startswith("res://"):
-            raise ValueError("Invalid resource path")
-        path = PACKAGE_PATH / "resources" / resource_path[6:]
-        self._images[resource_path] = self.pyray.load_image(str(path))
-        self.set_image_format(resource_path, TextureFormat.UNCOMPRESSED_R8G8B8A8)
-        return resource_path
+        image_handle = str(uuid.uuid4())
+        bundled = self._bundle and self._bundle.get(resource_path)
+        if bundled:
+            self._images[image_handle] = self._image_from_data(*bundled)
+        else:
+            path = resource_file(resource_path)
+            self._images[image_handle] = self.pyray.load_image(str(path))
+            self.set_image_format(image_handle, TextureFormat.UNCOMPRESSED_R8G8B8A8)
+        return image_handle
 
     def load_texture_from_image(self, image_handle: ImageHandle) -> TextureHandle:
-        self._textures[image_handle] = self.pyray.load_texture_from_image(
+        texture_handle = str(uuid.uuid4())
+        self._textures[texture_handle] = self.pyray.load_texture_from_image(
             self._images[image_handle]
         )
-        return image_handle
+        return texture_handle
 
     def unload_image(self, image_handle: ImageHandle) -> None:
         self.pyray.unload_image(self._images[image_handle])
         del self._images[image_handle]
 
     def unload_texture(self, texture_handle: TextureHandle) -> None:
-        self.pyray.unload_texture(self._textures[texture_handle])
+        if texture_handle in self._render_textures:
+            self.pyray.unload_render_texture(self._render_textures[texture_handle])
+            del self._render_textures[texture_handle]
+        else:
+            self.pyray.unload_texture(self._textures[texture_handle])
         del self._textures[texture_handle]
 
     def gen_image_from_color(self, size: Vec2, color: Color) -> ImageHandle:
@@ -136,6 +173,23 @@ class PyRayHAL(HAL):
         )
         return image_handle
 
+    def load_image_from_data(self, data: bytes, size: Vec2) -> ImageHandle:
+        image_handle = str(uuid.uuid4())
+        self._images[image_handle] = self._image_from_data(data, size)
+        return image_handle
+
+    def _image_from_data(self, data: Buffer, size: Vec2) -> PyRayImage:
+        image = self.pyray.gen_image_color(int(size.x), int(size.y), (0, 0, 0, 0))
+        ffi.memmove(image.data, data, len(data))
+        return cast(PyRayImage, image)
+
+    def load_render_texture(self, size: Vec2) -> TextureHandle:
+        texture_handle = str(uuid.uuid4())
+        render_texture = self.pyray.load_render_texture(int(size.x), int(size.y))
+        self._render_textures[texture_handle] = render_texture
+        self._textures[texture_handle] = render_texture.texture
+        return texture_handle
+
     # Resource reading / writing
 
     def update_texture_from_image(
@@ -184,6 +238,28 @@ class PyRayHAL(HAL):
                 err += dx
                 y1 += sy
 
+    def stamp_image(
+        self,
+        image_handle: ImageHandle,
+        brush_handle: ImageHandle,
+        positions: Sequence[Vec2],
+    ) -> None:
+        image_ptr = self.pyray.pointer(self._images[image_handle])
+        brush = self._images[brush_handle]
+        if brush_handle == image_handle:
+            brush = self.pyray.image_copy(brush)
+        source = (0, 0, brush.width, brush.height)
+        for pos in positions:
+            self.pyray.image_draw(
+                image_ptr,
+                brush,
+                source,
+                (int(pos.x), int(pos.y), brush.width, brush.height),
+                (255, 255, 255, 255),
+            )
+        if brush_handle == image_handle:
+            self.pyray.unload_image(brush)
+
     def get_image_size(self, image_handle: ImageHandle) -> Vec2:
         image = self._images[image_handle]
         return Vec2(image.width, image.height)
@@ -193,11 +269,23 @@ class PyRayHAL(HAL):
         color = self.pyray.get_image_data(image)[image.width * int(pos.y) + int(pos.x)]
         return Color(color.r, color.g, color.b, color.a)
 
+    def get_image_data(self, image_handle: ImageHandle) -> bytes:
+        self.set_image_format(image_handle, TextureFormat.UNCOMPRESSED_R8G8B8A8)
+        image = self._images[image_handle]
+        return bytes(ffi.buffer(image.data, image.width * image.height * 4))
+
     def export_image(self, image_handle: ImageHandle, filename: str) -> None:
         self.pyray.export_image(self._images[image_handle], filename)
 
     # Screen drawing
 
+    def begin_texture_mode(self, texture_handle: TextureHandle) -> None:
+        self.pyray.begin_texture_mode(self._render_textures[texture_handle])
+        self.pyray.clear_background((0, 0, 0, 0))
+
+    def end_texture_mode(self) -> None:
+        self.pyray.end_texture_mode()
+
     def draw_text(
         self,
         font: FontHandle,
@@ -231,6 +319,11 @@ class PyRayHAL(HAL):
         pos: Vec2,
         tint: Color = Color(255, 255, 255, 255),
     ) -> None:
+        if texture_handle in self._render_textures:
+            texture = self._textures[texture_handle]
+            source_rect = Rect.from_size(texture.width, texture.height)
+            self.draw_texture_rect(texture_handle, source_rect, pos, tint)
+            return
         self.pyray.draw_texture_v(self._textures[texture_handle], pos.xy, tint.rgba)
 
     def draw_texture_rect(
@@ -240,8 +333,39 @@ class PyRayHAL(HAL):
         pos: Vec2,
         tint: Color = Color(255, 255, 255, 255),
     ) -> None:
-        self.pyray.draw_texture_rec(
-            self._textures[texture_handle], source_rect.xywh, pos.xy, tint.rgba
+        texture = self._textures[texture_handle]
+
+        # Render textures are stored upside down (OpenGL's origin is bottom-left)
+        if texture_handle in self._render_textures:
+            source_rect = Rect(
+                source_rect.x,
+                texture.height - source_rect.y - source_rect.height,
+                source_rect.width,
+                -source_rect.height,
+            )
+
+        self.pyray.draw_texture_rec(texture, source_rect.xywh, pos.xy, tint.rgba)
+
+    def draw_texture_pro(
+        self,
+        texture_handle: TextureHandle,
+        source_rect: Rect,
+        dest_rect: Rect,
+        tint: Color = Color(255, 255, 255, 255),
+    ) -> None:
+        texture = self._textures[texture_handle]
+
+        # Render textures are stored upside down (OpenGL's origin is bottom-left)
+        if texture_handle in self._render_textures:
+            source_rect = Rect(
+                source_rect.x,
+                texture.height - source_rect.y - source_rect.height,
+                source_rect.width,
+                -source_rect.height,
+            )
+
+        self.pyray.draw_texture_pro(
+            texture, source_rect.xywh, dest_rect.xywh, (0, 0), 0, tint.rgba
         )
 
     def measure_text(
@@ -249,81 +373,107 @@ class PyRayHAL(HAL):
     ) -> Vec2:
         return _vec2(self.pyray.measure_text_ex(self._fonts[font], text, size, spacing))
 
-    # Keyboard
+    # Input
 
-    def is_key_down(self, key: Key) -> bool:
-        return cast(bool, self.pyray.is_key_down(key.value))
+    def get_input_events(self, event_type: Type[E]) -> List[E]:
+        return self._input.get(event_type)
 
-    def is_key_pressed(self, key: Key) -> bool:
-        if key in self._cleared_key_presses:
-            return False
-        return cast(bool, self.pyray.is_key_pressed(key.value))
+    def get_all_input_events(self) -> List[InputEvent]:
+        return self._input.events
 
-    def is_key_released(self, key: Key) -> bool:
-        if key in self._cleared_key_releases:
-            return False
-        return cast(bool, self.pyray.is_key_released(key.value))
-
-    def clear_key_pressed(self, key: Key) -> None:
-        self._cleared_key_presses.add(key)
-
-    def clear_key_releases(self, key: Key) -> None:
-        self._cleared_key_releases.add(key)
-
-    # Mouse
+    def get_held_keys(self) -> KeySet:
+        return self._input.held_keys
 
     def is_mouse_button_down(self, mouse_button: MouseButton) -> bool:
-        return cast(bool, self.pyray.is_mouse_button_down(mouse_button.value))
-
-    def is_mouse_button_pressed(self, mouse_button: MouseButton) -> bool:
-        if mouse_button in self._cleared_mouse_button_presses:
-            return False
-        return cast(bool, self.pyray.is_mouse_button_pressed(mouse_button.value))
-
-    def is_mouse_button_released(self, mouse_button: MouseButton) -> bool:
-        if mouse_button in self._cleared_mouse_button_releases:
-            return False
-        return cast(bool, self.pyray.is_mouse_button_released(mouse_button.value))
-
-    def clear_mouse_button_pressed(self, mouse_button: MouseButton) -> None:
-        self._cleared_mouse_button_presses.add(mouse_button)
-
-    def clear_mouse_button_released(self, mouse_button: MouseButton) -> None:
-        self._cleared_mouse_button_releases.add(mouse_button)
+        return mouse_button in self._input.held_buttons
 
     def get_mouse_position(self) -> Vec2:
-        return self._mouse_position.copy()
+        return self._input.mouse_position.copy()
 
     def get_mouse_delta(self) -> Vec2:
-        return self._mouse_delta.copy()
-
-    def get_mouse_wheel_move(self) -> float:
-        if self._is_mouse_wheel_move_cleared:
-            return 0
-        return cast(float, self.pyray.get_mouse_wheel_move())
-
-    def clear_mouse_wheel_move(self) -> None:
-        self._is_mouse_wheel_move_cleared = True
-
-    def _reset_cleared_inputs(self) -> None:
-        self._is_mouse_wheel_move_cleared = False
-        self._cleared_key_presses.clear()
-        self._cleared_key_releases.clear()
-        self._cleared_mouse_button_presses.clear()
-        self._cleared_mouse_button_releases.clear()
-
-    def _update_mouse(self) -> None:
-        last_mouse_position = self._mouse_position.copy()
-        self._mouse_position = _vec2(self.pyray.get_mouse_position())
-        self._mouse_delta = self._mouse_position - last_mouse_position
+        return self._input.mouse_delta.copy()
+
+    def _poll_input(self) -> None:
+        """
+        Turn this frame's raylib input state into events. raylib has no event
+        queue of its own except for key presses, so only ask about the things
+        that can have changed: queued presses, releases of held keys, and the
+        three mouse buttons.
+        """
+        pyray = self.pyray
+        queue = self._input
+        queue.begin_frame()
+
+        queue.move_mouse(_vec2(pyray.get_mouse_position()))
+
+        while keycode := pyray.get_key_pressed():
+            if key := KEYS_BY_VALUE.get(keycode):
+                queue.push(KeyPressed(key))
+
+        for key in list(queue.held_keys):
+            if not pyray.is_key_down(key.value):
+                queue.push(KeyReleased(key))
+
+        for button in MouseButton:
+            if pyray.is_mouse_button_pressed(button.value):
+                queue.push(MouseButtonPressed(button, queue.mouse_position))
+            if pyray.is_mouse_button_released(button.value):
+                queue.push(MouseButtonReleased(button, queue.mouse_position))
+
+        if wheel_move := pyray.get_mouse_wheel_move():
+            queue.push(MouseWheelMoved(wheel_move))
+
+    # Main loop
+
+    def request_frame(self) -> None:
+        self._is_frame_requested = True
+
+    def is_frame_requested(self) -> bool:
+        return self._is_frame_requested
+
+    def get_frame_time(self) -> float:
+        return cast(float, self.pyray.get_frame_time())
+
+    def _update_event_waiting(self) -> None:
+        if self._is_frame_requested:
+            self._settle_frames = SETTLE_FRAMES
+        elif self._settle_frames:
+            self._settle_frames -= 1
+
+        # With event waiting enabled, end_drawing() blocks in its input poll
+        # until something happens, so an idle window costs (almost) nothing
+        # and keeps showing the last frame.
+        should_wait = self._settle_frames == 0
+        if should_wait != self._is_event_waiting:
+            if should_wait:
+                self.pyray.enable_event_waiting()
+            else:
+                self.pyray.disable_event_waiting()
+            self._is_event_waiting = should_wait
+
+    def draw_frame(self, world: World) -> None:
+        """
+        Process and draw one frame of the world, with whatever input has been
+        queued, and show it. Unlike run(), never waits for input.
+        """
+        self._is_frame_requested = False
+        self.pyray.begin_drawing()
+        self.pyray.clear_background(self._clear_color.rgba)
+        world.process(self)
+        self.pyray.end_drawing()
 
     def run(self, world: World) -> None:
         while not self.pyray.window_should_close():
-            self._reset_cleared_inputs()
-            self._update_mouse()
+            self._poll_input()
+            self._is_frame_requested = False
             self.pyray.begin_drawing()
             self.pyray.clear_background(self._clear_color.rgba)
             world.process(self)
             # self.pyray.draw_fps(0, 0)
+            self._update_event_waiting()
             self.pyray.end_drawing()
+
+            # If we just blocked, we were woken up by input
+            if self._is_event_waiting:
+                self._settle_frames = SETTLE_FRAMES
         self.pyray.close_window()
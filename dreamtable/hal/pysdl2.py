@@ -1,174 +1,316 @@
 """
 A "hardware abstraction layer" that uses PySDL2.
+
+Images live in main memory as NumPy arrays (see NumPyImages), and textures made
+from them are SDL streaming textures. When an image changes, only the part of
+it that changed is copied across, into a locked region of the texture. Text is
+drawn from a BitmapFont, whose atlas is uploaded as a texture like any other.
+
+SDL batches consecutive copies from the same texture into one draw call, so a
+run of sprites or glyphs costs about as much as drawing one of them. Input is
+taken from SDL's event queue, and an idle window sleeps until the next event.
+
+Cameras can pan and zoom, but not rotate.
 """
 
-from typing import Dict
+import ctypes
+import math
+import time
+from typing import Any, Dict, List, Tuple, Type
+import uuid
 
 import esper
+import numpy as np
+import sdl2
+import sdl2.ext
 
-# from dreamtable.hal.base import HAL
+from dreamtable.hal.base import E, HAL, SETTLE_FRAMES
+from dreamtable.hal.bitmap_font import BitmapFont
+from dreamtable.hal.geom import Rect, Vec2
+from dreamtable.hal.input import InputQueue
+from dreamtable.hal.numpy_images import Box, NumPyImages, Pixels
 from dreamtable.hal.types import (
-    FontHandle,
-    ImageHandle,
-    TextureHandle,
     Camera,
     Color,
+    FontHandle,
+    ImageHandle,
+    InputEvent,
     Key,
+    KeyPressed,
+    KeyReleased,
+    KeySet,
     MouseButton,
-    TextureFormat,
+    MouseButtonPressed,
+    MouseButtonReleased,
+    MouseWheelMoved,
+    TextureHandle,
 )
-from dreamtable.hal.geom import Vec2, Rect
-from dreamtable.hal.debug import DebugHAL
 
-import sdl2
-import sdl2.ext
-import sdl2.sdlgfx
-
-import uuid
+WHITE = Color(255, 255, 255, 255)
 
+# R8G8B8A8 bytes, whatever the byte order of the machine
+PIXEL_FORMAT = sdl2.SDL_PIXELFORMAT_RGBA32
 
-def _sdl2_color(c: Color) -> sdl2.ext.Color:
-    return sdl2.ext.Color(c.r, c.g, c.b, c.a)
+SDL_BUTTON_TO_MOUSEBUTTON = {
+    sdl2.SDL_BUTTON_LEFT: MouseButton.LEFT,
+    sdl2.SDL_BUTTON_RIGHT: MouseButton.RIGHT,
+    sdl2.SDL_BUTTON_MIDDLE: MouseButton.MIDDLE,
+}
 
+SDL_KEYCODE_TO_KEY = {
+    sdl2.SDLK_QUOTE: Key.APOSTROPHE,
+    sdl2.SDLK_COMMA: Key.COMMA,
+    sdl2.SDLK_MINUS: Key.MINUS,
+    sdl2.SDLK_PERIOD: Key.PERIOD,
+    sdl2.SDLK_SLASH: Key.SLASH,
+    sdl2.SDLK_0: Key.ZERO,
+    sdl2.SDLK_1: Key.ONE,
+    sdl2.SDLK_2: Key.TWO,
+    sdl2.SDLK_3: Key.THREE,
+    sdl2.SDLK_4: Key.FOUR,
+    sdl2.SDLK_5: Key.FIVE,
+    sdl2.SDLK_6: Key.SIX,
+    sdl2.SDLK_7: Key.SEVEN,
+    sdl2.SDLK_8: Key.EIGHT,
+    sdl2.SDLK_9: Key.NINE,
+    sdl2.SDLK_SEMICOLON: Key.SEMICOLON,
+    sdl2.SDLK_EQUALS: Key.EQUAL,
+    sdl2.SDLK_SPACE: Key.SPACE,
+    sdl2.SDLK_ESCAPE: Key.ESCAPE,
+    sdl2.SDLK_RETURN: Key.ENTER,
+    sdl2.SDLK_TAB: Key.TAB,
+    sdl2.SDLK_BACKSPACE: Key.BACKSPACE,
+    sdl2.SDLK_INSERT: Key.INSERT,
+    sdl2.SDLK_DELETE: Key.DELETE,
+    sdl2.SDLK_RIGHT: Key.RIGHT,
+    sdl2.SDLK_LEFT: Key.LEFT,
+    sdl2.SDLK_DOWN: Key.DOWN,
+    sdl2.SDLK_UP: Key.UP,
+    sdl2.SDLK_PAGEUP: Key.PAGE_UP,
+    sdl2.SDLK_PAGEDOWN: Key.PAGE_DOWN,
+    sdl2.SDLK_HOME: Key.HOME,
+    sdl2.SDLK_END: Key.END,
+    sdl2.SDLK_CAPSLOCK: Key.CAPS_LOCK,
+    sdl2.SDLK_SCROLLLOCK: Key.SCROLL_LOCK,
+    sdl2.SDLK_NUMLOCKCLEAR: Key.NUM_LOCK,
+    sdl2.SDLK_PRINTSCREEN: Key.PRINT_SCREEN,
+    sdl2.SDLK_PAUSE: Key.PAUSE,
+    sdl2.SDLK_LSHIFT: Key.LEFT_SHIFT,
+    sdl2.SDLK_LCTRL: Key.LEFT_CONTROL,
+    sdl2.SDLK_LALT: Key.LEFT_ALT,
+    sdl2.SDLK_LGUI: Key.LEFT_SUPER,
+    sdl2.SDLK_RSHIFT: Key.RIGHT_SHIFT,
+    sdl2.SDLK_RCTRL: Key.RIGHT_CONTROL,
+    sdl2.SDLK_RALT: Key.RIGHT_ALT,
+    sdl2.SDLK_RGUI: Key.RIGHT_SUPER,
+    sdl2.SDLK_MENU: Key.KB_MENU,
+    sdl2.SDLK_LEFTBRACKET: Key.LEFT_BRACKET,
+    sdl2.SDLK_BACKSLASH: Key.BACKSLASH,
+    sdl2.SDLK_RIGHTBRACKET: Key.RIGHT_BRACKET,
+    sdl2.SDLK_BACKQUOTE: Key.GRAVE,
+    sdl2.SDLK_KP_PERIOD: Key.KP_DECIMAL,
+    sdl2.SDLK_KP_DIVIDE: Key.KP_DIVIDE,
+    sdl2.SDLK_KP_MULTIPLY: Key.KP_MULTIPLY,
+    sdl2.SDLK_KP_MINUS: Key.KP_SUBTRACT,
+    sdl2.SDLK_KP_PLUS: Key.KP_ADD,
+    sdl2.SDLK_KP_ENTER: Key.KP_ENTER,
+    sdl2.SDLK_KP_EQUALS: Key.KP_EQUAL,
+}
+# The rest follow a pattern: letters (SDL's keycodes are lowercase), function
+# keys and the keypad's digits
+SDL_KEYCODE_TO_KEY.update(
+    (getattr(sdl2, f"SDLK_{letter.lower()}"), Key[letter])
+    for letter in "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+)
+SDL_KEYCODE_TO_KEY.update(
+    (getattr(sdl2, f"SDLK_F{n}"), Key[f"F{n}"]) for n in range(1, 13)
+)
+SDL_KEYCODE_TO_KEY.update(
+    (getattr(sdl2, f"SDLK_KP_{n}"), Key[f"KP_{n}"]) for n in range(10)
+)
 
-def _transformed_rect(rect: Rect, camera: Camera) -> Rect:
-    rect = rect.copy()
-    rect.x = (rect.x - camera.target.x) * camera.zoom + camera.offset.x
-    rect.y = (rect.y - camera.target.y) * camera.zoom + camera.offset.y
-    rect.width *= camera.zoom
-    rect.height *= camera.zoom
-    return rect
 
+def _check(result: int) -> None:
+    if result != 0:
+        raise RuntimeError(sdl2.SDL_GetError().decode())
 
-def _transformed_vec2(vec2: Vec2, camera: Camera) -> Vec2:
-    vec2 = vec2.copy()
-    vec2.x = (vec2.x - camera.target.x) * camera.zoom + camera.offset.x
-    vec2.y = (vec2.y - camera.target.y) * camera.zoom + camera.offset.y
-    return vec2
 
+def _sdl2_rect(rect: Rect) -> sdl2.SDL_Rect:
+    return sdl2.SDL_Rect(int(rect.x), int(rect.y), int(rect.width), int(rect.height))
 
-def _untransformed_vec2(vec2: Vec2, camera: Camera) -> Vec2:
-    vec2 = vec2.copy()
-    vec2.x = (vec2.x - camera.offset.x) / camera.zoom + camera.target.x
-    vec2.y = (vec2.y - camera.offset.y) / camera.zoom + camera.target.y
-    return vec2
 
+def _upload(texture: Any, pixels: Pixels, box: Box) -> None:
+    """Copy one part of `pixels` to the same part of a streaming texture."""
+    left, top, right, bottom = box
+    width, height = right - left, bottom - top
+    rect = sdl2.SDL_Rect(left, top, width, height)
+    address = ctypes.c_void_p()
+    pitch = ctypes.c_int()
+    _check(
+        sdl2.SDL_LockTexture(
+            texture, ctypes.byref(rect), ctypes.byref(address), ctypes.byref(pitch)
+        )
+    )
+    try:
+        # The locked rows are `pitch` bytes apart; the last one only has to
+        # be as long as the box is wide
+        length = (height - 1) * pitch.value + width * 4
+        locked = np.ndarray(
+            (height, width, 4),
+            dtype=np.uint8,
+            buffer=(ctypes.c_uint8 * length).from_address(address.value),
+            strides=(pitch.value, 4, 1),
+        )
+        locked[...] = pixels[top:bottom, left:right]
+    finally:
+        sdl2.SDL_UnlockTexture(texture)
 
-SDL_BUTTON_TO_MOUSEBUTTON = {
-    sdl2.SDL_BUTTON_LEFT: MouseButton.LEFT,
-    sdl2.SDL_BUTTON_RIGHT: MouseButton.RIGHT,
-    sdl2.SDL_BUTTON_MIDDLE: MouseButton.MIDDLE,
-}
 
-SDL_KEYCODE_TO_KEY = {
-    # todo lots more
-    sdl2.SDLK_a: Key.A,
-    sdl2.SDLK_b: Key.B,
-    sdl2.SDLK_c: Key.C,
-    sdl2.SDLK_d: Key.D,
-    sdl2.SDLK_e: Key.E,
-    sdl2.SDLK_f: Key.F,
-    sdl2.SDLK_g: Key.G,
-    sdl2.SDLK_h: Key.H,
-    sdl2.SDLK_i: Key.I,
-    sdl2.SDLK_j: Key.J,
-    sdl2.SDLK_k: Key.K,
-    sdl2.SDLK_l: Key.L,
-    sdl2.SDLK_m: Key.M,
-    sdl2.SDLK_n: Key.N,
-    sdl2.SDLK_o: Key.O,
-    sdl2.SDLK_p: Key.P,
-    sdl2.SDLK_q: Key.Q,
-    sdl2.SDLK_r: Key.R,
-    sdl2.SDLK_s: Key.S,
-    sdl2.SDLK_t: Key.T,
-    sdl2.SDLK_u: Key.U,
-    sdl2.SDLK_v: Key.V,
-    sdl2.SDLK_w: Key.W,
-    sdl2.SDLK_x: Key.X,
-    sdl2.SDLK_y: Key.Y,
-    sdl2.SDLK_z: Key.Z,
-}
+class PySDL2HAL(NumPyImages, HAL):
+    def __init__(self, vsync: bool = True) -> None:
+        super().__init__()
 
+        # Wait for the display's refresh between frames
+        self.vsync = vsync
 
-class PySDL2HAL(DebugHAL):
-    def __init__(self) -> None:
         self._clear_color = Color(0, 0, 0, 255)
-        self._camera = Camera()
-        self._mouse_position = Vec2()
-        self._mouse_wheel_move = 0
-        self._is_mouse_button_down: Dict[MouseButton, bool] = {}
-        self._is_mouse_button_pressed: Dict[MouseButton, bool] = {}
-        self._is_mouse_button_released: Dict[MouseButton, bool] = {}
-        self._is_key_down: Dict[Key, bool] = {}
-        self._is_key_pressed: Dict[Key, bool] = {}
-        self._is_key_released: Dict[Key, bool] = {}
+        self._fonts: Dict[FontHandle, Tuple[BitmapFont, Any]] = {}
+        self._textures: Dict[TextureHandle, Tuple[Any, Vec2]] = {}
+
+        # Cameras apply to the screen and to render textures separately, as
+        # in raylib
+        self._cameras: List[Camera] = []
+        self._saved_cameras: List[Camera] = []
+
+        self._input = InputQueue()
+        self._is_frame_requested = False
+        self._settle_frames = SETTLE_FRAMES
+        self._frame_time = 0.0
+        self._last_frame = time.perf_counter()
+
+    # Window and screen
 
     def init_window(self, width: int, height: int, title: str) -> None:
+        # Nearest-neighbor scaling, and batched draw calls
+        sdl2.SDL_SetHint(sdl2.SDL_HINT_RENDER_SCALE_QUALITY, b"0")
+        sdl2.SDL_SetHint(sdl2.SDL_HINT_RENDER_BATCHING, b"1")
+
         sdl2.ext.init()
         self.window = sdl2.ext.Window(title, size=(width, height))
         self.window.show()
 
-        renderflags = (
-            sdl2.render.SDL_RENDERER_ACCELERATED | sdl2.render.SDL_RENDERER_PRESENTVSYNC
-        )
+        renderflags = sdl2.SDL_RENDERER_ACCELERATED
+        if self.vsync:
+            renderflags |= sdl2.SDL_RENDERER_PRESENTVSYNC
         self.context = sdl2.ext.Renderer(self.window, flags=renderflags)
+        self._renderer = self.context.sdlrenderer
+        sdl2.SDL_SetRenderDrawBlendMode(self._renderer, sdl2.SDL_BLENDMODE_BLEND)
 
-    def load_font(self, resource_path: str) -> FontHandle:
-        return str(uuid.uuid4())
-
-    def load_image(self, resource_path: str) -> ImageHandle:
-        return str(uuid.uuid4())
+    def get_screen_size(self) -> Vec2:
+        return Vec2(self.window.size[0], self.window.size[1])
 
-    def load_texture_from_image(self, image_handle: ImageHandle) -> TextureHandle:
-        return str(uuid.uuid4())
+    def get_screen_rect(self) -> Rect:
+        return Rect.from_size(self.window.size[0], self.window.size[1])
 
-    def set_image_format(
-        self, image_handle: ImageHandle, format: TextureFormat
-    ) -> None:
-        pass
+    def set_clear_color(self, color: Color) -> None:
+        self._clear_color = color
 
-    def gen_image_from_color(self, size: Vec2, color: Color) -> ImageHandle:
-        return str(uuid.uuid4())
+    def push_camera(self, camera: Camera) -> None:
+        if camera.rotation:
+            raise NotImplementedError("PySDL2HAL can't rotate cameras")
+        self._cameras.append(camera)
 
-    def draw_image_line(
-        self, image_handle: ImageHandle, start: Vec2, end: Vec2, color: Color
-    ) -> None:
-        pass
+    def pop_camera(self) -> None:
+        self._cameras.pop()
 
-    def get_image_size(self, image_handle: ImageHandle) -> Vec2:
-        return Vec2()
+    def get_screen_to_world(self, pos: Vec2, camera: Camera) -> Vec2:
+        return (pos - camera.offset) / camera.zoom + camera.target
+
+    def _to_target(self, pos: Vec2) -> Tuple[float, float, float]:
+        """Where `pos` lands on the render target, and the current zoom."""
+        if not self._cameras:
+            return pos.x, pos.y, 1.0
+        camera = self._cameras[-1]
+        return (
+            (pos.x - camera.target.x) * camera.zoom + camera.offset.x,
+            (pos.y - camera.target.y) * camera.zoom + camera.offset.y,
+            camera.zoom,
+        )
 
-    def get_image_color(self, image_handle: ImageHandle, pos: Vec2) -> Color:
-        return Color()
+    # Resource loading / unloading
 
-    def update_texture_from_image(
-        self, texture_handle: TextureHandle, image_handle: ImageHandle
-    ) -> None:
-        pass
+    def _create_texture(self, size: Vec2, access: int) -> Any:
+        texture = sdl2.SDL_CreateTexture(
+            self._renderer, PIXEL_FORMAT, access, int(size.x), int(size.y)
+        )
+        if not texture:
+            raise RuntimeError(sdl2.SDL_GetError().decode())
+        sdl2.SDL_SetTextureBlendMode(texture, sdl2.SDL_BLENDMODE_BLEND)
+        return texture
 
-    def export_image(self, image_handle: ImageHandle, filename: str) -> None:
-        pass
+    def load_font(self, resource_path: str) -> FontHandle:
+        font = BitmapFont.from_image(self._load_pixels(resource_path))
+        height, width = font.atlas.shape[:2]
+        texture = self._create_texture(
+            Vec2(width, height), sdl2.SDL_TEXTUREACCESS_STATIC
+        )
+        atlas = np.ascontiguousarray(font.atlas)
+        _check(
+            sdl2.SDL_UpdateTexture(
+                texture, None, atlas.ctypes.data_as(ctypes.c_void_p), width * 4
+            )
+        )
+        self._fonts[resource_path] = (font, texture)
+        return resource_path
 
-    def unload_image(self, image_handle: ImageHandle) -> None:
-        pass
+    def load_texture_from_image(self, image_handle: ImageHandle) -> TextureHandle:
+        texture_handle = str(uuid.uuid4())
+        image = self._images[image_handle]
+        height, width = image.shape[:2]
+        size = Vec2(width, height)
+        texture = self._create_texture(size, sdl2.SDL_TEXTUREACCESS_STREAMING)
+        _upload(texture, image, (0, 0, width, height))
+        self._textures[texture_handle] = (texture, size)
+        self._track_texture(texture_handle, image_handle)
+        return texture_handle
 
     def unload_texture(self, texture_handle: TextureHandle) -> None:
-        pass
+        texture, _ = self._textures.pop(texture_handle)
+        sdl2.SDL_DestroyTexture(texture)
+        self._forget_texture(texture_handle)
 
-    def push_camera(self, camera: Camera) -> None:
-        self._camera = camera
+    def load_render_texture(self, size: Vec2) -> TextureHandle:
+        texture_handle = str(uuid.uuid4())
+        texture = self._create_texture(size, sdl2.SDL_TEXTUREACCESS_TARGET)
+        self._textures[texture_handle] = (texture, size.floored)
+        return texture_handle
 
-    def pop_camera(self) -> None:
-        self._camera = Camera()
+    # Resource reading / writing
 
-    def get_screen_to_world(self, pos: Vec2, camera: Camera) -> Vec2:
-        return _untransformed_vec2(pos, camera)
-
-    def set_clear_color(self, color: Color) -> None:
-        self._clear_color = color
+    def update_texture_from_image(
+        self, texture_handle: TextureHandle, image_handle: ImageHandle
+    ) -> None:
+        box = self._take_changes(texture_handle, image_handle)
+        if box is not None:
+            texture, _ = self._textures[texture_handle]
+            _upload(texture, self._images[image_handle], box)
+
+    # Screen drawing
+
+    def begin_texture_mode(self, texture_handle: TextureHandle) -> None:
+        texture, _ = self._textures[texture_handle]
+        sdl2.SDL_SetRenderTarget(self._renderer, texture)
+        sdl2.SDL_SetRenderDrawColor(self._renderer, 0, 0, 0, 0)
+        sdl2.SDL_RenderClear(self._renderer)
+        # Like raylib, start from screen space, whatever camera was active
+        self._saved_cameras = self._cameras
+        self._cameras = []
+
+    def end_texture_mode(self) -> None:
+        sdl2.SDL_SetRenderTarget(self._renderer, None)
+        self._cameras = self._saved_cameras
+        self._saved_cameras = []
 
-    # todo reorder these: text, position, font, color, size=8, spacing=1
     def draw_text(
         self,
         font: FontHandle,
@@ -178,169 +320,249 @@ class PySDL2HAL(DebugHAL):
         spacing: float,
         color: Color,
     ) -> None:
-        pass
+        bitmap_font, texture = self._fonts[font]
+        x, y, zoom = self._to_target(position)
+        scale = size / bitmap_font.base_size * zoom
+        sdl2.SDL_SetTextureColorMod(texture, color.r, color.g, color.b)
+        sdl2.SDL_SetTextureAlphaMod(texture, color.a)
+        for glyph, offset in bitmap_font.layout(text, size, spacing):
+            dest = sdl2.SDL_FRect(
+                x + offset.x * zoom,
+                y + offset.y * zoom,
+                glyph.width * scale,
+                glyph.height * scale,
+            )
+            source = _sdl2_rect(glyph)
+            sdl2.SDL_RenderCopyF(
+                self._renderer, texture, ctypes.byref(source), ctypes.byref(dest)
+            )
+
+    def _set_draw_color(self, color: Color) -> None:
+        sdl2.SDL_SetRenderDrawColor(self._renderer, color.r, color.g, color.b, color.a)
 
     def draw_rectangle(self, rect: Rect, color: Color) -> None:
-        rect = _transformed_rect(rect, self._camera)
-        sdl2.sdlgfx.boxRGBA(
-            self.context.sdlrenderer,
-            int(rect.x),
-            int(rect.y),
-            int(rect.right),
-            int(rect.bottom),
-            color.r,
-            color.g,
-            color.b,
-            color.a,
-        )
+        x, y, zoom = self._to_target(Vec2(rect.x, rect.y))
+        dest = sdl2.SDL_FRect(x, y, rect.width * zoom, rect.height * zoom)
+        self._set_draw_color(color)
+        sdl2.SDL_RenderFillRectF(self._renderer, ctypes.byref(dest))
 
     def draw_rectangle_lines(self, rect: Rect, thickness: int, color: Color) -> None:
-        # todo thiccness
-        rect = _transformed_rect(rect, self._camera)
-        sdl2.sdlgfx.rectangleRGBA(
-            self.context.sdlrenderer,
-            int(rect.x),
-            int(rect.y),
-            int(rect.right),
-            int(rect.bottom),
-            color.r,
-            color.g,
-            color.b,
-            color.a,
-        )
+        x, y, width, height = rect.xywh
+        thickness = min(thickness, width / 2, height / 2)
+        inner = height - 2 * thickness
+        for side in (
+            Rect(x, y, width, thickness),
+            Rect(x, y + height - thickness, width, thickness),
+            Rect(x, y + thickness, thickness, inner),
+            Rect(x + width - thickness, y + thickness, thickness, inner),
+        ):
+            self.draw_rectangle(side, color)
 
     def draw_line(self, start: Vec2, end: Vec2, color: Color) -> None:
-        start = _transformed_vec2(start, self._camera)
-        end = _transformed_vec2(end, self._camera)
-        sdl2.sdlgfx.lineRGBA(
-            self.context.sdlrenderer,
-            int(start.x),
-            int(start.y),
-            int(end.x),
-            int(end.y),
-            color.r,
-            color.g,
-            color.b,
-            color.a,
-        )
+        # One pixel wide whatever the zoom, like raylib's
+        x0, y0, _ = self._to_target(start)
+        x1, y1, _ = self._to_target(end)
+        self._set_draw_color(color)
+        sdl2.SDL_RenderDrawLineF(self._renderer, x0, y0, x1, y1)
 
     def draw_line_width(
         self, start: Vec2, end: Vec2, width: float, color: Color
     ) -> None:
-        start = _transformed_vec2(start, self._camera)
-        end = _transformed_vec2(end, self._camera)
-        sdl2.sdlgfx.thickLineRGBA(
-            self.context.sdlrenderer,
-            int(start.x),
-            int(start.y),
-            int(end.x),
-            int(end.y),
-            int(width),
-            color.r,
-            color.g,
-            color.b,
-            color.a,
+        x0, y0, zoom = self._to_target(start)
+        x1, y1, _ = self._to_target(end)
+        length = math.hypot(x1 - x0, y1 - y0)
+        if not length:
+            return
+
+        # A quad around the line, as two triangles
+        half = max(width * zoom, 1.0) / 2
+        nx, ny = (y0 - y1) / length * half, (x1 - x0) / length * half
+        sdl_color = sdl2.SDL_Color(color.r, color.g, color.b, color.a)
+        vertices = (sdl2.SDL_Vertex * 4)(
+            *(
+                sdl2.SDL_Vertex(sdl2.SDL_FPoint(px, py), sdl_color)
+                for px, py in (
+                    (x0 + nx, y0 + ny),
+                    (x1 + nx, y1 + ny),
+                    (x1 - nx, y1 - ny),
+                    (x0 - nx, y0 - ny),
+                )
+            )
         )
+        indices = (ctypes.c_int * 6)(0, 1, 2, 2, 3, 0)
+        sdl2.SDL_RenderGeometry(self._renderer, None, vertices, 4, indices, 6)
 
     def draw_texture(
         self,
         texture_handle: TextureHandle,
         pos: Vec2,
-        tint: Color = Color(255, 255, 255, 255),
+        tint: Color = WHITE,
     ) -> None:
-        pass
+        _, size = self._textures[texture_handle]
+        self.draw_texture_rect(
+            texture_handle, Rect.from_size(size.x, size.y), pos, tint
+        )
 
     def draw_texture_rect(
         self,
         texture_handle: TextureHandle,
         source_rect: Rect,
         pos: Vec2,
-        tint: Color = Color(255, 255, 255, 255),
+        tint: Color = WHITE,
+    ) -> None:
+        width, height = abs(source_rect.width), abs(source_rect.height)
+        self.draw_texture_pro(
+            texture_handle, source_rect, Rect(pos.x, pos.y, width, height), tint
+        )
+
+    def draw_texture_pro(
+        self,
+        texture_handle: TextureHandle,
+        source_rect: Rect,
+        dest_rect: Rect,
+        tint: Color = WHITE,
     ) -> None:
-        pass
+        texture, _ = self._textures[texture_handle]
+        x, y, zoom = self._to_target(Vec2(dest_rect.x, dest_rect.y))
+        width, height = abs(source_rect.width), abs(source_rect.height)
+        source = sdl2.SDL_Rect(
+            int(source_rect.x), int(source_rect.y), int(width), int(height)
+        )
+        dest = sdl2.SDL_FRect(x, y, dest_rect.width * zoom, dest_rect.height * zoom)
+
+        sdl2.SDL_SetTextureColorMod(texture, tint.r, tint.g, tint.b)
+        sdl2.SDL_SetTextureAlphaMod(texture, tint.a)
+
+        # A negative source width or height flips the source, as in raylib
+        flip = sdl2.SDL_FLIP_NONE
+        if source_rect.width < 0:
+            flip |= sdl2.SDL_FLIP_HORIZONTAL
+        if source_rect.height < 0:
+            flip |= sdl2.SDL_FLIP_VERTICAL
+        if flip == sdl2.SDL_FLIP_NONE:
+            sdl2.SDL_RenderCopyF(
+                self._renderer, texture, ctypes.byref(source), ctypes.byref(dest)
+            )
+        else:
+            sdl2.SDL_RenderCopyExF(
+                self._renderer,
+                texture,
+                ctypes.byref(source),
+                ctypes.byref(dest),
+                0.0,
+                None,
+                flip,
+            )
 
     def measure_text(
         self, font: FontHandle, text: str, size: int, spacing: int
     ) -> Vec2:
-        return Vec2()
+        bitmap_font, _ = self._fonts[font]
+        return bitmap_font.measure(text, size, spacing)
 
-    def get_mouse_position(self) -> Vec2:
-        return self._mouse_position.copy()
-
-    def get_mouse_wheel_move(self) -> float:
-        return self._mouse_wheel_move
-
-    def get_screen_size(self) -> Vec2:
-        return Vec2(self.window.size[0], self.window.size[1])
+    # Input
 
-    def get_screen_rect(self) -> Rect:
-        return Rect(0, 0, self.window.size[0], self.window.size[1])
+    def get_input_events(self, event_type: Type[E]) -> List[E]:
+        return self._input.get(event_type)
 
-    def is_key_pressed(self, key: Key) -> bool:
-        return self._is_key_pressed.get(key, False)
+    def get_all_input_events(self) -> List[InputEvent]:
+        return self._input.events
 
-    def is_key_down(self, key: Key) -> bool:
-        return self._is_key_down.get(key, False)
-
-    def is_key_released(self, key: Key) -> bool:
-        return self._is_key_released.get(key, False)
+    def get_held_keys(self) -> KeySet:
+        return self._input.held_keys
 
     def is_mouse_button_down(self, mouse_button: MouseButton) -> bool:
-        return self._is_mouse_button_down.get(mouse_button, False)
-
-    def is_mouse_button_pressed(self, mouse_button: MouseButton) -> bool:
-        return self._is_mouse_button_pressed.get(mouse_button, False)
-
-    def is_mouse_button_released(self, mouse_button: MouseButton) -> bool:
-        return self._is_mouse_button_released.get(mouse_button, False)
+        return mouse_button in self._input.held_buttons
 
-    def _reset_frame_inputs(self) -> None:
-        self._mouse_wheel_move = 0
-        for button in MouseButton:
-            self._is_mouse_button_pressed[button] = False
-            self._is_mouse_button_released[button] = False
-        for key in Key:
-            self._is_key_pressed[key] = False
-            self._is_key_released[key] = False
+    def get_mouse_position(self) -> Vec2:
+        return self._input.mouse_position.copy()
+
+    def get_mouse_delta(self) -> Vec2:
+        return self._input.mouse_delta.copy()
+
+    def _handle_event(self, event: sdl2.SDL_Event) -> bool:
+        """Queue the input event for `event`, if any. False means quit."""
+        queue = self._input
+        if event.type == sdl2.SDL_QUIT:
+            return False
+        elif event.type == sdl2.SDL_MOUSEMOTION:
+            queue.move_mouse(Vec2(event.motion.x, event.motion.y))
+        elif event.type in (sdl2.SDL_MOUSEBUTTONDOWN, sdl2.SDL_MOUSEBUTTONUP):
+            mouse_button = SDL_BUTTON_TO_MOUSEBUTTON.get(event.button.button)
+            if mouse_button is None:
+                return True
+            if event.type == sdl2.SDL_MOUSEBUTTONDOWN:
+                queue.push(MouseButtonPressed(mouse_button, queue.mouse_position))
+            else:
+                queue.push(MouseButtonReleased(mouse_button, queue.mouse_position))
+        elif event.type == sdl2.SDL_MOUSEWHEEL:
+            queue.push(MouseWheelMoved(event.wheel.y))
+        elif event.type == sdl2.SDL_KEYDOWN:
+            key = SDL_KEYCODE_TO_KEY.get(event.key.keysym.sym)
+            # Ignore key repeat, like the other backends do
+            if key is not None and not event.key.repeat:
+                queue.push(KeyPressed(key))
+        elif event.type == sdl2.SDL_KEYUP:
+            key = SDL_KEYCODE_TO_KEY.get(event.key.keysym.sym)
+            if key is not None:
+                queue.push(KeyReleased(key))
+        elif event.type == sdl2.SDL_WINDOWEVENT:
+            # Resized, exposed etc.: whatever it was, draw again
+            self._settle_frames = SETTLE_FRAMES
+        return True
+
+    def _poll_input(self) -> bool:
+        """
+        Queue this frame's input events. Once the world has settled, first
+        sleeps until there is an event. False means quit.
+        """
+        self._input.begin_frame()
+        event = sdl2.SDL_Event()
+        if self._settle_frames == 0:
+            if not sdl2.SDL_WaitEvent(ctypes.byref(event)):
+                return True
+            self._settle_frames = SETTLE_FRAMES
+            if not self._handle_event(event):
+                return False
+        while sdl2.SDL_PollEvent(ctypes.byref(event)):
+            if not self._handle_event(event):
+                return False
+        return True
+
+    # Main loop
+
+    def request_frame(self) -> None:
+        self._is_frame_requested = True
+
+    def is_frame_requested(self) -> bool:
+        return self._is_frame_requested
+
+    def get_frame_time(self) -> float:
+        return self._frame_time
+
+    def draw_frame(self, world: esper.World) -> None:
+        """
+        Process and draw one frame of the world, with whatever input has been
+        queued, and show it. Unlike run(), never waits for input.
+        """
+        now = time.perf_counter()
+        self._frame_time = now - self._last_frame
+        self._last_frame = now
+
+        self._is_frame_requested = False
+        self._cameras = []
+        self._set_draw_color(self._clear_color)
+        sdl2.SDL_RenderClear(self._renderer)
+        world.process(self)
+        sdl2.SDL_RenderPresent(self._renderer)
 
     def run(self, world: esper.World) -> None:
-        running = True
-        while running:
-            self._reset_frame_inputs()
-
-            events = sdl2.ext.get_events()
-            for event in events:
-                if event.type == sdl2.SDL_QUIT:
-                    running = False
-                    break
-                elif event.type == sdl2.SDL_MOUSEMOTION:
-                    self._mouse_position.x = event.motion.x
-                    self._mouse_position.y = event.motion.y
-                elif event.type == sdl2.SDL_MOUSEBUTTONDOWN:
-                    mouse_button = SDL_BUTTON_TO_MOUSEBUTTON[event.button.button]
-                    self._is_mouse_button_down[mouse_button] = True
-                    self._is_mouse_button_pressed[mouse_button] = True
-                elif event.type == sdl2.SDL_MOUSEBUTTONUP:
-                    mouse_button = SDL_BUTTON_TO_MOUSEBUTTON[event.button.button]
-                    self._is_mouse_button_down[mouse_button] = False
-                    self._is_mouse_button_released[mouse_button] = True
-                elif event.type == sdl2.SDL_MOUSEWHEEL:
-                    self._mouse_wheel_move = event.wheel.y
-                elif event.type == sdl2.SDL_KEYDOWN:
-                    key = SDL_KEYCODE_TO_KEY.get(event.key.keysym.sym)
-                    if key is None:
-                        continue
-                    self._is_key_down[key] = True
-                    self._is_key_pressed[key] = True
-                elif event.type == sdl2.SDL_KEYUP:
-                    key = SDL_KEYCODE_TO_KEY.get(event.key.keysym.sym)
-                    if key is None:
-                        continue
-                    self._is_key_down[key] = False
-                    self._is_key_released[key] = True
-
-            self.context.clear(_sdl2_color(self._clear_color))
-            world.process(self)
-            self.context.present()
+        while self._poll_input():
+            self.draw_frame(world)
+
+            if self._is_frame_requested:
+                self._settle_frames = SETTLE_FRAMES
+            elif self._settle_frames:
+                self._settle_frames -= 1
 
         sdl2.ext.quit()
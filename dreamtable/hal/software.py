@@ -0,0 +1,459 @@
+"""
+A "hardware abstraction layer" that draws into a NumPy framebuffer.
+
+It needs no window, display or GPU, so it's good for rendering thumbnails and
+previews headlessly, and for measuring what the renderers cost without a
+graphics driver in the way. Every draw call is a handful of whole-array
+operations, which keeps it fast enough to be interactive at modest sizes.
+
+Cameras can pan and zoom, but not rotate. There is no window to take input
+from, so input events only arrive if something pushes them into the queue.
+"""
+
+import math
+from typing import Dict, List, Optional, Set, Tuple, Type
+import uuid
+
+import esper
+import numpy as np
+
+from dreamtable.hal.base import E, HAL, SETTLE_FRAMES
+from dreamtable.hal.bitmap_font import BitmapFont
+from dreamtable.hal.geom import Rect, Vec2
+from dreamtable.hal.input import InputQueue
+from dreamtable.hal.numpy_images import NumPyImages, Pixels
+from dreamtable.hal.png import encode_png
+from dreamtable.hal.types import (
+    Camera,
+    Color,
+    FontHandle,
+    ImageHandle,
+    InputEvent,
+    KeySet,
+    MouseButton,
+    TextureHandle,
+)
+
+WHITE = Color(255, 255, 255, 255)
+
+
+def _span(start: float, end: float, limit: int) -> Tuple[int, int]:
+    """The pixels whose centers fall in [start, end), clipped to [0, limit)."""
+    first = max(0, math.floor(start + 0.5))
+    last = min(limit, math.floor(end + 0.5))
+    return first, max(first, last)
+
+
+def blend(dest: Pixels, source: Pixels) -> None:
+    """Draw `source` over `dest` in place, with alpha blending."""
+    alpha = source[..., 3]
+    opaque = alpha == 255
+    if opaque.all():
+        dest[...] = source
+        return
+
+    # Most pixels of most textures are either opaque or fully transparent, so
+    # copy those whole (as one uint32 per pixel) and only blend the rest
+    np.copyto(dest.view(np.uint32), source.view(np.uint32), where=opaque[..., None])
+    partial = (alpha != 0) & ~opaque
+    if not partial.any():
+        return
+    below = dest[partial].astype(np.uint32)
+    above = source[partial].astype(np.uint32)
+    above_alpha = above[:, 3:]
+    inverse = 255 - above_alpha
+    below[:, :3] = (above[:, :3] * above_alpha + below[:, :3] * inverse + 127) // 255
+    below[:, 3:] = above_alpha + (below[:, 3:] * inverse + 127) // 255
+    dest[partial] = below
+
+
+def blend_color(dest: Pixels, color: Color) -> None:
+    """Draw a solid color over `dest` in place, with alpha blending."""
+    if color.a == 255:
+        dest[...] = color.rgba
+    elif color.a:
+        inverse = 255 - color.a
+        rgb = np.array(color.rgba[:3], dtype=np.uint32) * color.a
+        dest[..., :3] = (rgb + dest[..., :3] * np.uint32(inverse) + 127) // 255
+        dest[..., 3] = color.a + (dest[..., 3] * np.uint32(inverse) + 127) // 255
+
+
+class SoftwareHAL(NumPyImages, HAL):
+    def __init__(
+        self, max_frames: Optional[int] = None, frame_time: float = 1 / 60
+    ) -> None:
+        super().__init__()
+
+        # Upper bound on how many frames run() draws, for worlds that never
+        # settle (e.g. because something is always moving)
+        self.max_frames = max_frames
+
+        # Simulated time between frames, so runs are repeatable
+        self.frame_time = frame_time
+
+        # Textures and the framebuffer are Pixels, like images
+        self.framebuffer: Pixels = np.zeros((0, 0, 4), dtype=np.uint8)
+
+        self._clear_color = Color(0, 0, 0, 255)
+        self._fonts: Dict[FontHandle, BitmapFont] = {}
+        self._textures: Dict[TextureHandle, Pixels] = {}
+        self._render_textures: Set[TextureHandle] = set()
+
+        # Where draws go (the framebuffer or a render texture), and through
+        # which cameras
+        self._target = self.framebuffer
+        self._cameras: List[Camera] = []
+        self._saved_cameras: List[Camera] = []
+
+        self._input = InputQueue()
+        self._is_frame_requested = False
+
+    # Window and screen
+
+    def init_window(self, width: int, height: int, title: str) -> None:
+        self.framebuffer = np.zeros((height, width, 4), dtype=np.uint8)
+        self._target = self.framebuffer
+
+    def get_screen_size(self) -> Vec2:
+        height, width = self.framebuffer.shape[:2]
+        return Vec2(width, height)
+
+    def get_screen_rect(self) -> Rect:
+        height, width = self.framebuffer.shape[:2]
+        return Rect.from_size(width, height)
+
+    def get_screen_data(self) -> bytes:
+        """The last frame's pixels, as R8G8B8A8 rows from the top down."""
+        return self.framebuffer.tobytes()
+
+    def export_screen(self, filename: str) -> None:
+        """Save the last frame as a PNG."""
+        height, width = self.framebuffer.shape[:2]
+        with open(filename, "wb") as file:
+            file.write(encode_png(width, height, self.get_screen_data()))
+
+    def set_clear_color(self, color: Color) -> None:
+        self._clear_color = color
+
+    def push_camera(self, camera: Camera) -> None:
+        if camera.rotation:
+            raise NotImplementedError("SoftwareHAL can't rotate cameras")
+        self._cameras.append(camera)
+
+    def pop_camera(self) -> None:
+        self._cameras.pop()
+
+    def get_screen_to_world(self, pos: Vec2, camera: Camera) -> Vec2:
+        return (pos - camera.offset) / camera.zoom + camera.target
+
+    def _to_target(self, pos: Vec2) -> Tuple[float, float, float]:
+        """Where `pos` lands on the draw target, and the current zoom."""
+        if not self._cameras:
+            return pos.x, pos.y, 1.0
+        camera = self._cameras[-1]
+        return (
+            (pos.x - camera.target.x) * camera.zoom + camera.offset.x,
+            (pos.y - camera.target.y) * camera.zoom + camera.offset.y,
+            camera.zoom,
+        )
+
+    # Resource loading / unloading
+
+    def load_font(self, resource_path: str) -> FontHandle:
+        self._fonts[resource_path] = BitmapFont.from_image(
+            self._load_pixels(resource_path)
+        )
+        return resource_path
+
+    def load_texture_from_image(self, image_handle: ImageHandle) -> TextureHandle:
+        texture_handle = str(uuid.uuid4())
+        self._textures[texture_handle] = self._images[image_handle].copy()
+        self._track_texture(texture_handle, image_handle)
+        return texture_handle
+
+    def unload_texture(self, texture_handle: TextureHandle) -> None:
+        del self._textures[texture_handle]
+        self._render_textures.discard(texture_handle)
+        self._forget_texture(texture_handle)
+
+    def load_render_texture(self, size: Vec2) -> TextureHandle:
+        texture_handle = str(uuid.uuid4())
+        shape = (int(size.y), int(size.x), 4)
+        self._textures[texture_handle] = np.zeros(shape, dtype=np.uint8)
+        self._render_textures.add(texture_handle)
+        return texture_handle
+
+    # Resource reading / writing
+
+    def update_texture_from_image(
+        self, texture_handle: TextureHandle, image_handle: ImageHandle
+    ) -> None:
+        box = self._take_changes(texture_handle, image_handle)
+        if box is None:
+            return
+        left, top, right, bottom = box
+        image = self._images[image_handle]
+        texture = self._textures[texture_handle]
+        texture[top:bottom, left:right] = image[top:bottom, left:right]
+
+    # Screen drawing
+
+    def begin_texture_mode(self, texture_handle: TextureHandle) -> None:
+        self._target = self._textures[texture_handle]
+        self._target[...] = 0
+        # Like raylib, start from screen space, whatever camera was active
+        self._saved_cameras = self._cameras
+        self._cameras = []
+
+    def end_texture_mode(self) -> None:
+        self._target = self.framebuffer
+        self._cameras = self._saved_cameras
+        self._saved_cameras = []
+
+    def draw_text(
+        self,
+        font: FontHandle,
+        text: str,
+        position: Vec2,
+        size: float,
+        spacing: float,
+        color: Color,
+    ) -> None:
+        bitmap_font = self._fonts[font]
+        scale = size / bitmap_font.base_size
+        for glyph, offset in bitmap_font.layout(text, size, spacing):
+            self._blit(bitmap_font.atlas, glyph, position + offset, color, scale)
+
+    def draw_rectangle(self, rect: Rect, color: Color) -> None:
+        x, y, zoom = self._to_target(Vec2(rect.x, rect.y))
+        width, height = rect.width * zoom, rect.height * zoom
+        target_height, target_width = self._target.shape[:2]
+        x0, x1 = _span(min(x, x + width), max(x, x + width), target_width)
+        y0, y1 = _span(min(y, y + height), max(y, y + height), target_height)
+        blend_color(self._target[y0:y1, x0:x1], color)
+
+    def draw_rectangle_lines(self, rect: Rect, thickness: int, color: Color) -> None:
+        x, y, width, height = rect.xywh
+        thickness = min(thickness, width / 2, height / 2)
+        inner = height - 2 * thickness
+        for side in (
+            Rect(x, y, width, thickness),
+            Rect(x, y + height - thickness, width, thickness),
+            Rect(x, y + thickness, thickness, inner),
+            Rect(x + width - thickness, y + thickness, thickness, inner),
+        ):
+            self.draw_rectangle(side, color)
+
+    def draw_line(self, start: Vec2, end: Vec2, color: Color) -> None:
+        # Like a GPU line, one pixel wide whatever the zoom
+        x0, y0, _ = self._to_target(start)
+        x1, y1, _ = self._to_target(end)
+        self._stroke(x0, y0, x1, y1, 1.0, color)
+
+    def draw_line_width(
+        self, start: Vec2, end: Vec2, width: float, color: Color
+    ) -> None:
+        x0, y0, zoom = self._to_target(start)
+        x1, y1, _ = self._to_target(end)
+        self._stroke(x0, y0, x1, y1, width * zoom, color)
+
+    def _stroke(
+        self, x0: float, y0: float, x1: float, y1: float, width: float, color: Color
+    ) -> None:
+        """Fill the pixels whose centers are inside a line's rectangle."""
+        dx, dy = x1 - x0, y1 - y0
+        length = math.hypot(dx, dy)
+        if not length:
+            return
+        half = max(width, 1.0) / 2
+
+        target_height, target_width = self._target.shape[:2]
+        bx0 = max(0, math.floor(min(x0, x1) - half))
+        bx1 = min(target_width, math.ceil(max(x0, x1) + half))
+        by0 = max(0, math.floor(min(y0, y1) - half))
+        by1 = min(target_height, math.ceil(max(y0, y1) + half))
+        if bx0 >= bx1 or by0 >= by1:
+            return
+
+        # Distances of each pixel center along the line, and across it
+        xs = np.arange(bx0, bx1) + 0.5 - x0
+        ys = np.arange(by0, by1)[:, None] + 0.5 - y0
+        along = (xs * dx + ys * dy) / length
+        across = (ys * dx - xs * dy) / length
+        mask = (along >= 0) & (along < length) & (across >= -half) & (across < half)
+
+        region = self._target[by0:by1, bx0:bx1]
+        painted = region.copy()
+        blend_color(painted, color)
+        region[mask] = painted[mask]
+
+    def draw_texture(
+        self,
+        texture_handle: TextureHandle,
+        pos: Vec2,
+        tint: Color = WHITE,
+    ) -> None:
+        texture = self._textures[texture_handle]
+        height, width = texture.shape[:2]
+        self._blit(texture, Rect.from_size(width, height), pos, tint)
+
+    def draw_texture_rect(
+        self,
+        texture_handle: TextureHandle,
+        source_rect: Rect,
+        pos: Vec2,
+        tint: Color = WHITE,
+    ) -> None:
+        self._blit(self._textures[texture_handle], source_rect, pos, tint)
+
+    def draw_texture_pro(
+        self,
+        texture_handle: TextureHandle,
+        source_rect: Rect,
+        dest_rect: Rect,
+        tint: Color = WHITE,
+    ) -> None:
+        source_width, source_height = abs(source_rect.width), abs(source_rect.height)
+        if not (source_width and source_height):
+            return
+        self._blit(
+            self._textures[texture_handle],
+            source_rect,
+            Vec2(dest_rect.x, dest_rect.y),
+            tint,
+            dest_rect.width / source_width,
+            dest_rect.height / source_height,
+        )
+
+    def _blit(
+        self,
+        pixels: Pixels,
+        source: Rect,
+        pos: Vec2,
+        tint: Color,
+        scale: float = 1.0,
+        scale_y: Optional[float] = None,
+    ) -> None:
+        """
+        Draw part of `pixels` at `pos`, scaled by `scale` (across, and down too
+        unless `scale_y` is given) and the camera's zoom, with nearest-neighbor
+        sampling. A negative source width or height flips the source, as in
+        raylib.
+        """
+        x, y, zoom = self._to_target(pos)
+        scale_x = scale * zoom
+        scale_y = (scale if scale_y is None else scale_y) * zoom
+        source_width, source_height = int(abs(source.width)), int(abs(source.height))
+        if not (source_width and source_height and scale_x > 0 and scale_y > 0):
+            return
+
+        target_height, target_width = self._target.shape[:2]
+        x0, x1 = _span(x, x + source_width * scale_x, target_width)
+        y0, y1 = _span(y, y + source_height * scale_y, target_height)
+        if x0 == x1 or y0 == y1:
+            return
+
+        height, width = pixels.shape[:2]
+        left = int(source.x) + x0 - math.floor(x + 0.5)
+        top = int(source.y) + y0 - math.floor(y + 0.5)
+        right, bottom = left + x1 - x0, top + y1 - y0
+        if (
+            scale_x == 1
+            and scale_y == 1
+            and source.width > 0
+            and source.height > 0
+            and 0 <= left <= right <= width
+            and 0 <= top <= bottom <= height
+        ):
+            # Pixel for pixel: just a slice of the source
+            patch = pixels[top:bottom, left:right]
+        else:
+            # The source pixel under each target pixel's center, clamped to
+            # the edges of the texture
+            columns = ((np.arange(x0, x1) + 0.5 - x) / scale_x).astype(np.intp)
+            rows = ((np.arange(y0, y1) + 0.5 - y) / scale_y).astype(np.intp)
+            np.clip(columns, 0, source_width - 1, out=columns)
+            np.clip(rows, 0, source_height - 1, out=rows)
+            if source.width < 0:
+                columns = source_width - 1 - columns
+            if source.height < 0:
+                rows = source_height - 1 - rows
+            columns += int(source.x)
+            rows += int(source.y)
+            patch = pixels.take(rows, axis=0, mode="clip").take(
+                columns, axis=1, mode="clip"
+            )
+
+        if tint != WHITE:
+            patch = patch.copy()
+            if tint.rgba[:3] == WHITE.rgba[:3]:
+                # Only fading, which is common and only touches one channel
+                channels = patch[..., 3:]
+                color = np.array(tint.a, dtype=np.uint16)
+            else:
+                channels = patch
+                color = np.array(tint.rgba, dtype=np.uint16)
+            channels[...] = (channels.astype(np.uint16) * color + 127) // 255
+        blend(self._target[y0:y1, x0:x1], patch)
+
+    def measure_text(
+        self, font: FontHandle, text: str, size: int, spacing: int
+    ) -> Vec2:
+        return self._fonts[font].measure(text, size, spacing)
+
+    # Input
+
+    def get_input_events(self, event_type: Type[E]) -> List[E]:
+        return self._input.get(event_type)
+
+    def get_all_input_events(self) -> List[InputEvent]:
+        return self._input.events
+
+    def get_held_keys(self) -> KeySet:
+        return self._input.held_keys
+
+    def is_mouse_button_down(self, mouse_button: MouseButton) -> bool:
+        return mouse_button in self._input.held_buttons
+
+    def get_mouse_position(self) -> Vec2:
+        return self._input.mouse_position.copy()
+
+    def get_mouse_delta(self) -> Vec2:
+        return self._input.mouse_delta.copy()
+
+    # Main loop
+
+    def request_frame(self) -> None:
+        self._is_frame_requested = True
+
+    def is_frame_requested(self) -> bool:
+        return self._is_frame_requested
+
+    def get_frame_time(self) -> float:
+        return self.frame_time
+
+    def draw_frame(self, world: esper.World) -> None:
+        """Process one frame of the world, drawing it into the framebuffer."""
+        self._is_frame_requested = False
+        self._target = self.framebuffer
+        self._cameras = []
+        self.framebuffer[...] = self._clear_color.rgba
+        world.process(self)
+        # Events pushed between frames belong to the next one
+        self._input.begin_frame()
+
+    def run(self, world: esper.World) -> None:
+        """
+        Draw frames until the world settles: when nothing has asked for a new
+        frame in a while, the framebuffer holds what a window would keep
+        showing. Stops after `max_frames`, if set, even if it hasn't settled.
+        """
+        frames = 0
+        settle_frames = SETTLE_FRAMES
+        while settle_frames and (self.max_frames is None or frames < self.max_frames):
+            self.draw_frame(world)
+            frames += 1
+            if self._is_frame_requested:
+                settle_frames = SETTLE_FRAMES
+            else:
+                settle_frames -= 1
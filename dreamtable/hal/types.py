@@ -1,6 +1,6 @@
 from dataclasses import dataclass, field
 import enum
-from typing import Tuple
+from typing import Dict, Iterator, Tuple, Union
 
 from dreamtable.hal.geom import Vec2
 
@@ -9,7 +9,8 @@ ImageHandle = object
 TextureHandle = object
 
 
-@dataclass
+# Immutable, so one instance can safely be shared (e.g. as a default)
+@dataclass(frozen=True, slots=True)
 class Color:
     r: int = 0
     g: int = 0
@@ -21,7 +22,7 @@ class Color:
         return self.r, self.g, self.b, self.a
 
 
-@dataclass
+@dataclass(slots=True)
 class Camera:
     target: Vec2 = field(default_factory=Vec2)
     offset: Vec2 = field(default_factory=Vec2)
@@ -147,6 +148,100 @@ class Key(enum.Enum):
     KP_EQUAL: int = 336
 
 
+KEYS_BY_VALUE: Dict[int, Key] = {key.value: key for key in Key}
+
+
+class KeySet:
+    """
+    A set of Keys packed into the bits of a single int, where bit n stands for
+    the key whose value is n.
+    """
+
+    __slots__ = ("bits",)
+
+    def __init__(self, bits: int = 0) -> None:
+        self.bits = bits
+
+    def __contains__(self, key: Key) -> bool:
+        return bool(self.bits >> key.value & 1)
+
+    def __iter__(self) -> Iterator[Key]:
+        bits = self.bits
+        while bits:
+            low = bits & -bits
+            yield KEYS_BY_VALUE[low.bit_length() - 1]
+            bits ^= low
+
+    def __len__(self) -> int:
+        return bin(self.bits).count("1")
+
+    def __bool__(self) -> bool:
+        return self.bits != 0
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, KeySet):
+            return NotImplemented
+        return self.bits == other.bits
+
+    def __repr__(self) -> str:
+        return f"KeySet({{{', '.join(key.name for key in self)}}})"
+
+    def add(self, key: Key) -> None:
+        self.bits |= 1 << key.value
+
+    def discard(self, key: Key) -> None:
+        self.bits &= ~(1 << key.value)
+
+    def copy(self) -> "KeySet":
+        return KeySet(self.bits)
+
+
+# Input events, queued by the HAL as they arrive during a frame
+
+
+@dataclass(frozen=True, slots=True)
+class KeyPressed:
+    key: Key
+
+
+@dataclass(frozen=True, slots=True)
+class KeyReleased:
+    key: Key
+
+
+@dataclass(frozen=True, slots=True)
+class MouseButtonPressed:
+    button: MouseButton
+    position: Vec2
+
+
+@dataclass(frozen=True, slots=True)
+class MouseButtonReleased:
+    button: MouseButton
+    position: Vec2
+
+
+@dataclass(frozen=True, slots=True)
+class MouseMoved:
+    position: Vec2
+    delta: Vec2
+
+
+@dataclass(frozen=True, slots=True)
+class MouseWheelMoved:
+    amount: float
+
+
+InputEvent = Union[
+    KeyPressed,
+    KeyReleased,
+    MouseButtonPressed,
+    MouseButtonReleased,
+    MouseMoved,
+    MouseWheelMoved,
+]
+
+
 class TextureFormat(enum.Enum):
     UNCOMPRESSED_GRAYSCALE: int = 1  # 8 bit per pixel (no alpha)
     UNCOMPRESSED_GRAY_ALPHA: int = 2
@@ -0,0 +1,34 @@
+"""
+Routed input: processors that want input events subscribe to them here
+instead of polling the HAL.
+"""
+
+from typing import Optional, Tuple, Type
+
+from dreamtable.constants import InputLayer
+from dreamtable.hal import HAL, InputEvent
+
+
+class InputHandler:
+    """
+    Mixin for processors that handle routed input events.
+
+    Each frame, every event of a type listed in `input_events` is offered to
+    the handlers that subscribed to it, top layer first and then by descending
+    priority. The first handler that returns True from handle_input() consumes
+    the event, and nobody below it sees it.
+
+    A processor that only reacts to input can leave out process(); World then
+    doesn't run it every frame.
+    """
+
+    input_events: Tuple[Type[InputEvent], ...] = ()
+    input_layer: InputLayer = InputLayer.WORLD
+    input_priority: int = 0
+
+    def handle_input(self, hal: HAL, event: InputEvent, target: Optional[int]) -> bool:
+        """
+        Handle one event. `target` is the topmost Hoverable entity under the
+        pointer, if any. Return True to stop the event from propagating.
+        """
+        raise NotImplementedError
@@ -0,0 +1,194 @@
+"""
+Columnar (struct-of-arrays) storage for simulated entities.
+"""
+
+from typing import Dict, List, Optional
+from typing_extensions import Protocol
+
+import numpy as np
+
+from dreamtable.hal import Vec2
+
+COLUMNS = (
+    "entities",
+    "position",
+    "previous",
+    "velocity",
+    "friction",
+    "wandering",
+    "wander_interval",
+    "wander_tick",
+    "wander_force",
+)
+
+
+class WanderState(Protocol):
+    interval: int
+    tick: int
+    force: float
+
+
+class ArrayVec2(Vec2):
+    """
+    A Vec2 that reads and writes one row of a MotionStore column.
+
+    Once its entity leaves the store, the view detaches and keeps the last
+    value it had, so stray references stay usable.
+    """
+
+    __slots__ = ("_store", "_column", "_entity", "_x", "_y")
+
+    def __init__(self, store: "MotionStore", column: str, entity: int) -> None:
+        self._store: Optional[MotionStore] = store
+        self._column = column
+        self._entity = entity
+        self._x = 0.0
+        self._y = 0.0
+
+    def _row(self) -> np.ndarray:
+        assert self._store is not None
+        store = self._store
+        return getattr(store, self._column)[store.rows[self._entity]]  # type: ignore
+
+    def detach(self) -> None:
+        self._x, self._y = self.x, self.y
+        self._store = None
+
+    @property  # type: ignore
+    def x(self) -> float:  # type: ignore
+        if self._store is None:
+            return self._x
+        return float(self._row()[0])
+
+    @x.setter
+    def x(self, x: float) -> None:
+        if self._store is None:
+            self._x = x
+        else:
+            self._row()[0] = x
+
+    @property  # type: ignore
+    def y(self) -> float:  # type: ignore
+        if self._store is None:
+            return self._y
+        return float(self._row()[1])
+
+    @y.setter
+    def y(self, y: float) -> None:
+        if self._store is None:
+            self._y = y
+        else:
+            self._row()[1] = y
+
+
+class MotionStore:
+    """
+    Struct-of-arrays storage for entities with a Position and a Velocity, so
+    the simulation can update all of them at once with array operations.
+
+    While an entity is in the store, the store owns its position, velocity,
+    friction and wandering state. The entity's Vec2 components are rebound to
+    ArrayVec2 views, so everything else can keep treating them as Vec2s. Its
+    wandering state's tick is copied back when it leaves the store or stops
+    wandering.
+
+    Rows are kept packed: removing an entity moves the last row into its place.
+    Only the first `size` rows of each column are meaningful.
+    """
+
+    def __init__(self, capacity: int = 64) -> None:
+        self.size = 0
+        self.rows: Dict[int, int] = {}
+
+        # Bumped whenever rows are added or removed
+        self.version = 0
+
+        # Whether the last simulation step moved anything. Things are drawn
+        # between their previous and current positions, so while this is set
+        # where they're drawn changes from frame to frame.
+        self.moving = False
+
+        self._views: Dict[int, List[ArrayVec2]] = {}
+        self._wanderers: Dict[int, WanderState] = {}
+        self._allocate(capacity)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, entity: int) -> bool:
+        return entity in self.rows
+
+    def _allocate(self, capacity: int) -> None:
+        columns = {
+            "entities": np.zeros(capacity, dtype=np.int64),
+            "position": np.zeros((capacity, 2)),
+            "previous": np.zeros((capacity, 2)),
+            "velocity": np.zeros((capacity, 2)),
+            "friction": np.ones(capacity),
+            "wandering": np.zeros(capacity, dtype=bool),
+            "wander_interval": np.zeros(capacity, dtype=np.int64),
+            "wander_tick": np.zeros(capacity, dtype=np.int64),
+            "wander_force": np.zeros(capacity),
+        }
+        for name, column in columns.items():
+            if hasattr(self, name):
+                column[: self.size] = getattr(self, name)[: self.size]
+            setattr(self, name, column)
+        self.capacity = capacity
+
+    def add(self, entity: int, position: Vec2, velocity: Vec2, friction: float) -> None:
+        if entity in self.rows:
+            raise ValueError(f"Entity {entity} is already in the store")
+
+        if self.size == self.capacity:
+            self._allocate(self.capacity * 2)
+
+        row = self.size
+        self.size += 1
+        self.version += 1
+        self.rows[entity] = row
+
+        self.entities[row] = entity
+        self.position[row] = position.xy
+        self.previous[row] = position.xy
+        self.velocity[row] = velocity.xy
+        self.friction[row] = friction
+        self.wandering[row] = False
+
+    def remove(self, entity: int) -> None:
+        for view in self._views.pop(entity, []):
+            view.detach()
+        self.clear_wandering(entity)
+
+        row = self.rows.pop(entity)
+        last = self.size - 1
+
+        if row != last:
+            for name in COLUMNS:
+                column = getattr(self, name)
+                column[row] = column[last]
+            self.rows[int(self.entities[row])] = row
+
+        self.size -= 1
+        self.version += 1
+
+    def view(self, column: str, entity: int) -> ArrayVec2:
+        """Return a Vec2 bound to this entity's row in the given column."""
+        view = ArrayVec2(self, column, entity)
+        self._views.setdefault(entity, []).append(view)
+        return view
+
+    def set_wandering(self, entity: int, state: WanderState) -> None:
+        row = self.rows[entity]
+        self.wandering[row] = True
+        self.wander_interval[row] = state.interval
+        self.wander_tick[row] = state.tick
+        self.wander_force[row] = state.force
+        self._wanderers[entity] = state
+
+    def clear_wandering(self, entity: int) -> None:
+        row = self.rows[entity]
+        state = self._wanderers.pop(entity, None)
+        if state is not None:
+            state.tick = int(self.wander_tick[row])
+        self.wandering[row] = False
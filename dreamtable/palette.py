@@ -0,0 +1,209 @@
+"""
+Palettes: remapping images to the nearest colors of a palette, and swapping
+one palette for another.
+
+Pixels that are exactly a palette color map to that color. For the rest,
+the palette colors that could be nearest to some color in each cell of a 3D
+grid (at a slightly lower bit depth) are worked out ahead of time, so most
+pixels only need a lookup, and the rest only need comparing to a few colors.
+"""
+
+from functools import lru_cache
+from typing import Tuple
+
+import numpy as np
+
+from dreamtable.constants import ColorDistance
+
+# Bits per channel of the lookup table's colors: 64x64x64 entries
+LUT_BITS = 6
+LUT_SHIFT = 8 - LUT_BITS
+
+# Lookup table entries worked out at a time, to bound memory use with big
+# palettes
+LUT_BLOCK = 4096
+
+# sRGB (D65) to CIE XYZ, and the D65 white point
+SRGB_TO_XYZ = np.array(
+    [
+        [0.4124564, 0.3575761, 0.1804375],
+        [0.2126729, 0.7151522, 0.0721750],
+        [0.0193339, 0.1191920, 0.9503041],
+    ],
+    dtype=np.float32,
+)
+WHITE_POINT = np.array([0.95047, 1.0, 1.08883], dtype=np.float32)
+
+
+def to_lab(rgb: np.ndarray) -> np.ndarray:
+    """CIELAB coordinates of sRGB colors, given as floats from 0 to 255."""
+    srgb = rgb.astype(np.float32) / 255
+    linear = np.where(
+        srgb <= 0.04045, srgb / 12.92, ((srgb + 0.055) / 1.055) ** 2.4
+    ).astype(np.float32)
+    xyz = linear @ SRGB_TO_XYZ.T / WHITE_POINT
+    f = np.where(xyz > (6 / 29) ** 3, np.cbrt(xyz), xyz / (3 * (6 / 29) ** 2) + 4 / 29)
+    return np.stack(
+        [
+            116 * f[..., 1] - 16,
+            500 * (f[..., 0] - f[..., 1]),
+            200 * (f[..., 1] - f[..., 2]),
+        ],
+        axis=-1,
+    )
+
+
+def palette_colors(pixels: np.ndarray) -> np.ndarray:
+    """
+    The distinct opaque colors of a palette image, as (colors, 4), in the
+    order they first appear (by row).
+    """
+    flat = pixels.reshape(-1, 4)
+    flat = flat[flat[:, 3] == 255]
+    if not len(flat):
+        return np.zeros((0, 4), np.uint8)
+    _, first = np.unique(flat.view(np.uint32).ravel(), return_index=True)
+    return flat[np.sort(first)]
+
+
+def _space(rgb: np.ndarray, distance: ColorDistance) -> np.ndarray:
+    if distance is ColorDistance.PERCEPTUAL:
+        return to_lab(rgb)
+    return rgb.astype(np.float32)
+
+
+def _codes(rgb: np.ndarray) -> np.ndarray:
+    """Colors packed into one integer each, to compare them exactly."""
+    rgb = rgb.astype(np.uint32)
+    return (rgb[..., 0] << 16) | (rgb[..., 1] << 8) | rgb[..., 2]
+
+
+@lru_cache(maxsize=8)
+def _lookup_table(
+    colors: bytes, distance: ColorDistance
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    palette = _space(np.frombuffer(colors, np.uint8).reshape(-1, 4)[:, :3], distance)
+
+    # The bounds of each cell's range, and the color in the middle of it
+    bounds = np.clip((np.arange((1 << LUT_BITS) + 1) << LUT_SHIFT) - 0.5, 0, 255)
+    r, g, b = np.meshgrid(bounds, bounds, bounds, indexing="ij")
+    grid = np.stack([r, g, b], axis=-1)
+    corners = _space(grid.reshape(-1, 3), distance).reshape(grid.shape)
+    middle = (grid[:-1, :-1, :-1] + grid[1:, 1:, 1:]) / 2
+    entries = _space(middle.reshape(-1, 3), distance)
+
+    # How far the colors in each cell can be from its middle, in `distance`
+    size = 1 << LUT_BITS
+    radius = np.zeros(len(entries), np.float32)
+    for i, j, k in np.ndindex(2, 2, 2):
+        cube = slice(i, i + size), slice(j, j + size), slice(k, k + size)
+        corner = corners[cube].reshape(-1, 3)
+        np.maximum(radius, np.linalg.norm(corner - entries, axis=1), out=radius)
+
+    # A color can only be nearest to something in a cell if it's no further
+    # from the middle than the nearest color is, give or take the radius
+    # both ways (and a little for rounding)
+    lengths = (palette**2).sum(axis=1)
+    dtype = np.uint8 if len(palette) <= 256 else np.uint16
+    counts = np.empty(len(entries), np.intp)
+    candidates = []
+    for start in range(0, len(entries), LUT_BLOCK):
+        block = slice(start, start + LUT_BLOCK)
+        squared = (
+            lengths
+            - 2 * entries[block] @ palette.T
+            + (entries[block] ** 2).sum(axis=1)[:, np.newaxis]
+        )
+        distances = np.sqrt(np.maximum(squared, 0))
+        bound = distances.min(axis=1) + 2 * radius[block] + 1e-3
+        cells, indices = np.nonzero(distances <= bound[:, np.newaxis])
+        counts[block] = np.bincount(cells, minlength=len(distances))
+        candidates.append(indices.astype(dtype))
+
+    starts = np.zeros(len(entries) + 1, np.intp)
+    np.cumsum(counts, out=starts[1:])
+    candidates = np.concatenate(candidates)
+    only = np.full(len(entries), -1, np.int32)
+    only[counts == 1] = candidates[starts[:-1][counts == 1]]
+    return only, starts, candidates, palette
+
+
+def lookup_table(
+    colors: np.ndarray, distance: ColorDistance
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    For every cell of colors (at LUT_BITS per channel, as a flat index: see
+    nearest()), the indices of `colors` that could be nearest to something in
+    it: cell i's are candidates[starts[i] : starts[i + 1]], and only[i] is
+    the one candidate, or -1 if there are more. Returned as (only, starts,
+    candidates, colors in `distance`'s space).
+    """
+    return _lookup_table(np.ascontiguousarray(colors).tobytes(), distance)
+
+
+def nearest(
+    pixels: np.ndarray, colors: np.ndarray, distance: ColorDistance
+) -> np.ndarray:
+    """The index of the nearest palette color to each pixel."""
+    rgb = pixels[..., :3].reshape(-1, 3) >> LUT_SHIFT
+    cell = rgb[:, 0].astype(np.intp) << (2 * LUT_BITS)
+    cell |= rgb[:, 1].astype(np.intp) << LUT_BITS
+    cell |= rgb[:, 2]
+
+    # Most pixels only have one candidate in their cell, which a palette
+    # color always is if it's alone
+    only, starts, candidates, palette = lookup_table(colors, distance)
+    index = only[cell].astype(np.intp)
+    rest = np.flatnonzero(index < 0)
+    if not len(rest):
+        return index.reshape(pixels.shape[:-1])
+
+    # The others are compared to each of their cell's candidates, once per
+    # distinct color, and are themselves if they're a palette color
+    codes = _codes(pixels[..., :3].reshape(-1, 3)[rest])
+    unique, first, inverse = np.unique(codes, return_index=True, return_inverse=True)
+    cell = cell[rest[first]]
+    counts = starts[cell + 1] - starts[cell]
+    offsets = np.cumsum(counts) - counts
+    owner = np.repeat(np.arange(len(unique)), counts)
+    pairs = candidates[starts[cell][owner] + np.arange(counts.sum()) - offsets[owner]]
+    points = _space(np.stack([(unique >> s) & 0xFF for s in (16, 8, 0)], -1), distance)
+    squared = ((points[owner] - palette[pairs]) ** 2).sum(axis=1)
+    squared[_codes(colors[pairs, :3]) == unique[owner]] = -1
+
+    # Each color's first candidate as near as the nearest one
+    hits = np.flatnonzero(squared == np.minimum.reduceat(squared, offsets)[owner])
+    firsts = np.ones(len(hits), bool)
+    firsts[1:] = owner[hits[1:]] != owner[hits[:-1]]
+    best = pairs[hits[firsts]]
+    index[rest] = best[inverse.ravel()]
+    return index.reshape(pixels.shape[:-1])
+
+
+def remap(
+    pixels: np.ndarray, colors: np.ndarray, distance: ColorDistance
+) -> np.ndarray:
+    """An image's pixels, each replaced by the nearest palette color."""
+    return swap(pixels, colors, colors, distance)
+
+
+def swap(
+    pixels: np.ndarray,
+    old_colors: np.ndarray,
+    new_colors: np.ndarray,
+    distance: ColorDistance,
+) -> np.ndarray:
+    """
+    An image's pixels, each replaced by the color in `new_colors` at the
+    index of its nearest color in `old_colors`. Old colors past the end of
+    the new palette are swapped for their nearest new color instead. Alpha
+    is left as it is.
+    """
+    mapping = np.arange(len(old_colors))
+    extra = mapping >= len(new_colors)
+    if extra.any():
+        mapping[extra] = nearest(old_colors[extra], new_colors, distance)
+
+    remapped = new_colors[mapping[nearest(pixels, old_colors, distance)]]
+    remapped[..., 3] = pixels[..., 3]
+    return remapped
@@ -1,2 +1,21 @@
-from .controllers import *  # noqa
-from .renderers import *  # noqa
+"""
+All of the processors, by name, imported lazily from the controllers and
+renderers packages.
+"""
+
+from typing import Any, List
+
+from . import controllers, renderers
+
+__all__ = controllers.__all__ + renderers.__all__
+
+
+def __getattr__(name: str) -> Any:
+    for package in (controllers, renderers):
+        if name in package.PROCESSORS:
+            return getattr(package, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -1,19 +1,54 @@
-from .box_selection import BoxSelectionController
-from .camera_context import CameraContextController
-from .camera import CameraController
-from .canvas_delete import CanvasDeleteController
-from .canvas_export import CanvasExportController
-from .drag import DragController
-from .dropper_tool import DropperToolController
-from .egg_timer import EggTimerController
-from .egg_tool import EggToolController
-from .final_delete import FinalDeleteController
-from .grid_tool import GridToolController
-from .hover import HoverController
-from .image import ImageController
-from .motion import MotionController
-from .pencil_tool import PencilToolController
-from .selectable_delete import SelectableDeleteController
-from .tiny_friend import TinyFriendController
-from .tool_switcher import ToolSwitcherController
-from .wandering import WanderingController
+"""
+The controller classes, by name. Each one's module is imported the first time
+the class is looked up, so only the processors that are actually used pay for
+their imports, and only when they're needed.
+"""
+
+from importlib import import_module
+from typing import Any, List
+
+PROCESSORS = {
+    "AnimationController": "animation",
+    "AutotileController": "autotile",
+    "BoxSelectionController": "box_selection",
+    "BrushToolController": "brush_tool",
+    "CameraContextController": "camera_context",
+    "CameraController": "camera",
+    "CanvasPagerController": "canvas_pager",
+    "CanvasExportController": "canvas_export",
+    "DeletionController": "deletion",
+    "DragController": "drag",
+    "DropperToolController": "dropper_tool",
+    "EggTimerController": "egg_timer",
+    "EggToolController": "egg_tool",
+    "GridToolController": "grid_tool",
+    "HoverController": "hover",
+    "ImageController": "image",
+    "InputRouterController": "input_router",
+    "MagnifierController": "magnifier",
+    "MotionController": "motion",
+    "PaletteController": "palette",
+    "PencilToolController": "pencil_tool",
+    "SelectableDeleteController": "selectable_delete",
+    "StartupController": "startup",
+    "TextCacheController": "text_cache",
+    "TextureResidencyController": "texture_residency",
+    "TinyFriendController": "tiny_friend",
+    "ToolSwitcherController": "tool_switcher",
+    "VisibilityController": "visibility",
+    "WanderingController": "wandering",
+}
+
+__all__ = list(PROCESSORS)
+
+
+def __getattr__(name: str) -> Any:
+    if name not in PROCESSORS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    processor_class = getattr(import_module(f".{PROCESSORS[name]}", __name__), name)
+    globals()[name] = processor_class
+    return processor_class
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(PROCESSORS))
@@ -0,0 +1,140 @@
+import heapq
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+import esper
+
+from dreamtable import components as c
+from dreamtable.hal import HAL
+from dreamtable.timeline import FrameSchedule
+
+# Animations of the same Timeline with the same phase always show the same
+# frame, so they're updated together: (timeline entity, phase)
+TrackKey = Tuple[int, float]
+
+
+class AnimationController(esper.Processor):
+    """
+    Play Timelines, and show their frames in the SpriteRegions of the entities
+    Animated by them.
+
+    Each Timeline is compiled into a FrameSchedule, and its Animations are
+    grouped into tracks by phase. A Timeline keeps its tracks in a heap,
+    ordered by when their frame next changes, so a step only touches the
+    tracks that change on it, and the sprites in those: thousands of
+    animated sprites cost nothing on the steps in between.
+    """
+
+    def __init__(self) -> None:
+        self._source: Optional[List[Any]] = None
+        self._timeline_source: Optional[List[Any]] = None
+        self._timelines: Dict[int, c.Timeline] = {}
+
+        # The (version, loop) each schedule was compiled from
+        self._versions: Dict[int, Tuple[int, bool]] = {}
+        self._schedules: Dict[int, FrameSchedule] = {}
+
+        self._tracks: Dict[TrackKey, List[Tuple[c.Animation, c.SpriteRegion]]] = {}
+        self._timeline_tracks: Dict[int, List[TrackKey]] = {}
+
+        # The frame each track shows
+        self._frames: Dict[TrackKey, int] = {}
+
+        # For each timeline, its tracks by when they next change, in timeline
+        # time (tracks that never will again aren't in it)
+        self._heaps: Dict[int, List[Tuple[float, TrackKey]]] = {}
+
+        # Each timeline's time as of the last step, to notice seeking
+        self._times: Dict[int, float] = {}
+
+    def _sync(self) -> None:
+        timelines = self.world.get_component(c.Timeline)
+        query = self.world.get_components(c.Animation, c.SpriteRegion)
+        if (
+            query is self._source
+            and timelines is self._timeline_source
+            and all(
+                self._versions.get(ent) == (timeline.version, timeline.loop)
+                for ent, timeline in timelines
+            )
+        ):
+            return
+        self._source = query
+        self._timeline_source = timelines
+
+        self._timelines = dict(timelines)
+        self._versions = {
+            ent: (timeline.version, timeline.loop) for ent, timeline in timelines
+        }
+        self._schedules = {
+            ent: FrameSchedule(timeline.frames, timeline.loop)
+            for ent, timeline in timelines
+            if timeline.frames
+        }
+
+        self._tracks = {}
+        for _, (anim, spr) in query:
+            if anim.timeline in self._schedules:
+                key = (anim.timeline, anim.phase)
+                self._tracks.setdefault(key, []).append((anim, spr))
+        self._timeline_tracks = {ent: [] for ent in self._schedules}
+        for key in self._tracks:
+            self._timeline_tracks[key[0]].append(key)
+
+        # Show every track's current frame, and schedule what comes next
+        self._frames = {}
+        self._heaps = {}
+        self._times = {}
+        for ent in self._schedules:
+            self._reschedule(ent, self._timelines[ent].time)
+
+    def _reschedule(self, timeline_ent: int, time: float) -> None:
+        self._heaps[timeline_ent] = []
+        self._times[timeline_ent] = time
+        for key in self._timeline_tracks[timeline_ent]:
+            self._show(key, time)
+
+    def _show(self, key: TrackKey, time: float) -> None:
+        """Show a track's frame at `time`, and schedule its next change."""
+        timeline_ent, phase = key
+        schedule = self._schedules[timeline_ent]
+        index, wait = schedule.frame_at(time + phase)
+
+        if self._frames.get(key) != index:
+            self._frames[key] = index
+            self.world.context.scene_version += 1
+            x, y = schedule.cells[index]
+            for anim, spr in self._tracks[key]:
+                spr.x = int(anim.origin.x) + x
+                spr.y = int(anim.origin.y) + y
+
+        if wait < math.inf:
+            heapq.heappush(self._heaps[timeline_ent], (time + wait, key))
+
+    def process(self, hal: HAL) -> None:
+        self._sync()
+
+        is_playing = False
+        for ent, heap in self._heaps.items():
+            timeline = self._timelines[ent]
+            if timeline.time != self._times[ent]:
+                # Something moved the playhead: start over from there
+                self._reschedule(ent, timeline.time)
+                heap = self._heaps[ent]
+
+            if not (timeline.playing and timeline.speed > 0 and heap):
+                continue
+            timeline.time += self.world.timestep * timeline.speed
+            self._times[ent] = timeline.time
+
+            # Take everything that's due before showing any of it, so a track
+            # whose next change rounds to now waits for the next step
+            due = []
+            while heap and heap[0][0] <= timeline.time:
+                due.append(heapq.heappop(heap)[1])
+            for key in due:
+                self._show(key, timeline.time)
+            is_playing = True
+
+        if is_playing:
+            hal.request_frame()
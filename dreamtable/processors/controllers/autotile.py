@@ -0,0 +1,143 @@
+import esper
+import numpy as np
+
+from dreamtable import autotile
+from dreamtable import components as c
+from dreamtable.canvas_pager import CanvasPager
+from dreamtable.constants import Autotiling
+from dreamtable.hal import HAL, Key, KeyPressed, Vec2
+
+# Space left between a canvas and what's made from it
+MARGIN = 8
+
+
+def image_pixels(hal: HAL, pager: CanvasPager, ent: int, img: c.Image) -> np.ndarray:
+    image = pager.image(hal, ent, img)
+    size = hal.get_image_size(image)
+    return np.frombuffer(hal.get_image_data(image), np.uint8).reshape(
+        int(size.y), int(size.x), 4
+    )
+
+
+class AutotileController(esper.Processor):
+    """
+    Generates autotile sets, fills masks with them, and keeps the Tilemaps
+    filled from masks up to date as the masks are drawn on.
+
+    G makes a blob tile set (Shift+G, a Wang one) from each selected Canvas
+    with a CellGrid, out of its first five cells (see autotile.py). F fills
+    each selected Canvas with a selected tile set: a Tilemap below it, with a
+    tile wherever it's painted.
+
+    Runs before ImageController, while the masks drawn on this frame are
+    still dirty.
+    """
+
+    def process(self, hal: HAL) -> None:
+        pressed = {e.key for e in hal.get_input_events(KeyPressed)}
+        if Key.G in pressed:
+            held_keys = hal.get_held_keys()
+            if Key.LEFT_SHIFT in held_keys or Key.RIGHT_SHIFT in held_keys:
+                self.generate(hal, Autotiling.WANG)
+            else:
+                self.generate(hal, Autotiling.BLOB)
+        if Key.F in pressed:
+            self.fill(hal)
+
+        self.retile(hal)
+
+    def generate(self, hal: HAL, kind: Autotiling) -> None:
+        pager = self.world.context.pager
+        for ent, (_, sel, img, cells, pos, ext) in self.world.get_components(
+            c.Canvas, c.Selectable, c.Image, c.CellGrid, c.Position, c.Extent
+        ):
+            if not sel.selected or cells.x * cells.y < autotile.SOURCE_CELLS:
+                continue
+
+            # Not loaded yet
+            if not (img.image or ent in pager):
+                continue
+
+            source = autotile.split_cells(
+                image_pixels(hal, pager, ent, img), cells.x, cells.y
+            )[: autotile.SOURCE_CELLS]
+            if not source.size:
+                continue
+            sheet = autotile.generate(source, kind)
+            size = Vec2(sheet.shape[1], sheet.shape[0])
+
+            self.world.create_entity(
+                c.Name(f"{kind.name.capitalize()} tiles"),
+                c.Position(
+                    Vec2(pos.position.x + ext.extent.x + MARGIN, pos.position.y)
+                ),
+                c.Extent(size.copy()),
+                c.Canvas(),
+                c.Image(image=hal.load_image_from_data(sheet.tobytes(), size)),
+                c.CellGrid(autotile.COLUMNS[kind], sheet.shape[0] // source.shape[1]),
+                c.TileSet(kind),
+                c.Draggable(),
+                c.Hoverable(),
+                c.Selectable(),
+                c.Deletable(),
+            )
+
+    def fill(self, hal: HAL) -> None:
+        tile_sets = [
+            ent
+            for ent, (_, sel, _) in self.world.get_components(
+                c.TileSet, c.Selectable, c.CellGrid
+            )
+            if sel.selected
+        ]
+        if not tile_sets:
+            return
+        tile_set = tile_sets[-1]
+        kind = self.world.component_for_entity(tile_set, c.TileSet).kind
+
+        pager = self.world.context.pager
+        for ent, (_, sel, img, pos, ext) in self.world.get_components(
+            c.Canvas, c.Selectable, c.Image, c.Position, c.Extent
+        ):
+            if not sel.selected or self.world.has_component(ent, c.TileSet):
+                continue
+
+            # Not loaded yet
+            if not (img.image or ent in pager):
+                continue
+
+            mask = autotile.mask_from_pixels(image_pixels(hal, pager, ent, img))
+            self.world.create_entity(
+                c.Name("Tilemap"),
+                c.Position(
+                    Vec2(pos.position.x, pos.position.y + ext.extent.y + MARGIN)
+                ),
+                c.Extent(),  # sized by TilemapRenderer
+                c.Tilemap(tile_set, autotile.autotile(mask, kind)),
+                c.Autotile(ent),
+                c.Draggable(),
+                c.Hoverable(),
+                c.Selectable(),
+                c.Deletable(),
+            )
+
+    def retile(self, hal: HAL) -> None:
+        pager = self.world.context.pager
+        query = self.world.get_components(c.Tilemap, c.Autotile)
+        if not query:
+            return
+
+        # Masks and tile sets may have been deleted out from under their tilemaps
+        images = dict(self.world.get_component(c.Image))
+        tile_sets = dict(self.world.get_component(c.TileSet))
+        for _, (tilemap, auto) in query:
+            mask_img = images.get(auto.mask)
+            tile_set = tile_sets.get(tilemap.source)
+            if mask_img is None or tile_set is None or not mask_img.dirty:
+                continue
+
+            mask = autotile.mask_from_pixels(
+                image_pixels(hal, pager, auto.mask, mask_img)
+            )
+            tilemap.tiles = autotile.autotile(mask, tile_set.kind)
+            tilemap.version += 1
@@ -1,66 +1,65 @@
-from typing import Dict, List, Tuple
+from typing import Optional
 
 import esper
 
 from dreamtable import components as c
-from dreamtable.constants import PositionSpace, SelectionType
+from dreamtable.constants import InputLayer, PositionSpace, SelectionType
 from dreamtable.utils import get_aabb
-from dreamtable.hal import HAL, MouseButton, Rect, Vec2
+from dreamtable.hal import HAL, InputEvent, MouseButton, MouseButtonPressed, Vec2
+from dreamtable.input_handler import InputHandler
+from dreamtable.spatial import EntityBounds
 
 
-class BoxSelectionController(esper.Processor):
+class BoxSelectionController(esper.Processor, InputHandler):
     """Updates selection regions."""
 
-    def process(self, hal: HAL) -> None:
+    # Clicks that nothing else wanted end up here
+    input_events = (MouseButtonPressed,)
+    input_layer = InputLayer.WORLD
+
+    def __init__(self) -> None:
+        self.selectables = {space: EntityBounds(space) for space in PositionSpace}
+
+    def handle_input(self, hal: HAL, event: InputEvent, target: Optional[int]) -> bool:
         context = self.world.context
-        mouse_pos = hal.get_mouse_position()
+        assert isinstance(event, MouseButtonPressed)
 
         # Are we hovering over anything? If so, we can't create selections
-        hovering_any = False
-        for ent, hover in self.world.get_component(c.Hoverable):
-            if hover.hovered:
-                hovering_any = True
+        if target is not None:
+            if event.button is not MouseButton.LEFT:
+                return False
 
-                # If we just clicked, select only this.
-                # todo if we're holding shift, don't deselect other stuff
-                if hal.is_mouse_button_pressed(MouseButton.LEFT):
-                    hal.clear_mouse_button_pressed(MouseButton.LEFT)
-                    for sel_ent, sel in self.world.get_component(c.Selectable):
-                        sel.selected = ent == sel_ent
-
-                break
+            # If we just clicked, select only this.
+            # todo if we're holding shift, don't deselect other stuff
+            for sel_ent, sel in self.world.get_component(c.Selectable):
+                sel.selected = target == sel_ent
+            context.selection_version += 1
+            return True
 
         # Create new selections
-        if not hovering_any:
-            # New selections always go into world space
-            # Maybe change this someday? idk
-            space = PositionSpace.WORLD
-            start_pos = hal.get_screen_to_world(mouse_pos, context.cameras[space])
-            if hal.is_mouse_button_pressed(MouseButton.LEFT):
-                hal.clear_mouse_button_pressed(MouseButton.LEFT)
-                self.world.create_entity(
-                    c.Position(space=space),
-                    c.Extent(),
-                    c.BoxSelection(start_pos=start_pos),
-                )
-            elif hal.is_mouse_button_pressed(MouseButton.RIGHT):
-                hal.clear_mouse_button_pressed(MouseButton.RIGHT)
-                self.world.create_entity(
-                    c.Position(space=space),
-                    c.Extent(),
-                    c.BoxSelection(type=SelectionType.CREATE, start_pos=start_pos,),
-                )
+        # New selections always go into world space
+        # Maybe change this someday? idk
+        space = PositionSpace.WORLD
+        start_pos = hal.get_screen_to_world(event.position, context.cameras[space])
+        if event.button is MouseButton.LEFT:
+            self.world.create_entity(
+                c.Position(space=space),
+                c.Extent(),
+                c.BoxSelection(start_pos=start_pos),
+            )
+        elif event.button is MouseButton.RIGHT:
+            self.world.create_entity(
+                c.Position(space=space),
+                c.Extent(),
+                c.BoxSelection(type=SelectionType.CREATE, start_pos=start_pos,),
+            )
+        else:
+            return False
+        return True
 
-        # Identify selectables
-        selectables_by_space: Dict[PositionSpace, List[Tuple[c.Selectable, Rect]]] = {
-            PositionSpace.WORLD: [],
-            PositionSpace.SCREEN: [],
-        }
-        for ent, (pos, ext, selectable) in self.world.get_components(
-            c.Position, c.Extent, c.Selectable
-        ):
-            rect = c.rect(pos.position, ext.extent)
-            selectables_by_space[pos.space].append((selectable, rect))
+    def process(self, hal: HAL) -> None:
+        context = self.world.context
+        mouse_pos = hal.get_mouse_position()
 
         # Update pos/ext, selectables, and handle release actions
         for ent, (pos, ext, selection) in self.world.get_components(
@@ -94,9 +93,17 @@ class BoxSelectionController(esper.Processor):
 
             # Update selectable entities
             if selection.type == SelectionType.NORMAL:
-                selection_rect = c.rect(pos.position, ext.extent)
-                for selectable, selectable_rect in selectables_by_space[pos.space]:
-                    selectable.selected = selection_rect.touching(selectable_rect)
+                selectables = self.selectables[pos.space]
+                selectables.update(
+                    self.world.get_components(c.Position, c.Extent, c.Selectable),
+                    context.motion,
+                )
+                touching = selectables.rects.touching(c.rect(pos.position, ext.extent))
+                for selectable, selected in zip(
+                    selectables.components, touching.tolist()
+                ):
+                    selectable.selected = selected
+                context.selection_version += 1
 
             # Handle selection complete
             if selection.type == SelectionType.NORMAL and hal.is_mouse_button_released(
@@ -0,0 +1,126 @@
+import math
+from typing import List, Optional
+
+import esper
+
+from dreamtable import components as c
+from dreamtable.constants import InputLayer, Tool
+from dreamtable.hal import (
+    HAL,
+    InputEvent,
+    MouseButton,
+    MouseButtonPressed,
+    Rect,
+    Vec2,
+)
+from dreamtable.input_handler import InputHandler
+
+# Space between stamps along a stroke, as a fraction of the brush's size
+SPACING = 0.25
+
+
+class BrushToolController(esper.Processor, InputHandler):
+    """
+    Uses a canvas as a brush: right-click a canvas to pick it up, then drag
+    across another one to stamp it along the way.
+
+    The stamps made during a frame are drawn together, so the canvas gets one
+    change (and one texture upload) per frame however many there are.
+    """
+
+    input_events = (MouseButtonPressed,)
+    input_layer = InputLayer.TOOL
+
+    def __init__(self) -> None:
+        # The canvas being stroked, and the entity whose Image that draws on
+        self._target: Optional[int] = None
+        self._target_image: Optional[int] = None
+
+        # Where the stroke has got to, in image pixels, and how much further
+        # along it the next stamp goes
+        self._last_pos: Optional[Vec2] = None
+        self._next_stamp = 0.0
+
+    def _image_ent(self, ent: int) -> int:
+        """Magnifiers draw on their source's Image."""
+        for mag in self.world.try_component(ent, c.Magnifier):
+            return mag.source
+        return ent
+
+    def handle_input(self, hal: HAL, event: InputEvent, target: Optional[int]) -> bool:
+        context = self.world.context
+        if context.tool != Tool.BRUSH or self._target is not None:
+            return False
+        if target is None or not self.world.has_component(target, c.Canvas):
+            return False
+
+        assert isinstance(event, MouseButtonPressed)
+        if event.button is MouseButton.RIGHT:
+            context.brush = self._image_ent(target)
+        elif event.button is MouseButton.LEFT and context.brush is not None:
+            self._target = target
+            self._target_image = self._image_ent(target)
+            self._last_pos = None
+            self._next_stamp = 0.0
+        else:
+            return False
+        return True
+
+    def process(self, hal: HAL) -> None:
+        context = self.world.context
+        if context.tool != Tool.BRUSH or hal.is_mouse_button_released(MouseButton.LEFT):
+            self._target = None
+        if self._target is None:
+            return
+
+        images = dict(self.world.get_component(c.Image))
+        canvases = dict(self.world.get_components(c.Canvas, c.Position))
+        img = images.get(self._target_image)
+        brush_img = images.get(context.brush) if context.brush is not None else None
+        if img is None or brush_img is None or self._target not in canvases:
+            # Something was deleted mid-stroke
+            self._target = None
+            return
+
+        # Not loaded yet
+        pager = context.pager
+        if not (img.image or self._target_image in pager):
+            return
+        if not (brush_img.image or context.brush in pager):
+            return
+        brush = pager.image(hal, context.brush, brush_img)
+        image = pager.image(hal, self._target_image, img)
+
+        canvas, pos = canvases[self._target]
+        camera = context.cameras[pos.space]
+        mouse_pos = hal.get_screen_to_world(hal.get_mouse_position(), camera)
+        stroke_pos = (mouse_pos - pos.position) / canvas.scale
+
+        brush_size = hal.get_image_size(brush)
+        positions = self._stamps(stroke_pos, brush_size)
+        if positions:
+            hal.stamp_image(image, brush, positions)
+            left = math.floor(min(p.x for p in positions))
+            top = math.floor(min(p.y for p in positions))
+            right = math.floor(max(p.x for p in positions)) + brush_size.x
+            bottom = math.floor(max(p.y for p in positions)) + brush_size.y
+            c.mark_drawn(img, Rect(left, top, right - left, bottom - top))
+
+    def _stamps(self, stroke_pos: Vec2, brush_size: Vec2) -> List[Vec2]:
+        """Where to stamp (top left corners) to take the stroke to `stroke_pos`."""
+        start = self._last_pos if self._last_pos is not None else stroke_pos
+        self._last_pos = stroke_pos.copy()
+
+        spacing = max(min(brush_size.x, brush_size.y) * SPACING, 1.0)
+        delta = stroke_pos - start
+        length = math.hypot(delta.x, delta.y)
+        half = brush_size / 2
+
+        positions = []
+        distance = self._next_stamp
+        while distance <= length:
+            along = distance / length if length else 0.0
+            positions.append((start + delta * along - half).floor())
+            distance += spacing
+        self._next_stamp = distance - length
+        return positions
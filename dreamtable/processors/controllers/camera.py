@@ -1,39 +1,64 @@
+from typing import Optional
+
 import esper
 
 from dreamtable import components as c
-from dreamtable.constants import EPSILON
-from dreamtable.hal import HAL, Key, MouseButton
+from dreamtable.constants import EPSILON, InputLayer
+from dreamtable.hal import (
+    HAL,
+    InputEvent,
+    Key,
+    KeyPressed,
+    MouseButton,
+    MouseWheelMoved,
+)
+from dreamtable.input_handler import InputHandler
+
+# Keys that jump straight to a zoom level
+ZOOM_HOTKEYS = {
+    Key.ONE: 1,
+    Key.TWO: 2,
+    Key.THREE: 3,
+    Key.FOUR: 4,
+}
 
 
-class CameraController(esper.Processor):
+class CameraController(esper.Processor, InputHandler):
     """Update cameras in response to events."""
 
+    input_events = (MouseWheelMoved, KeyPressed)
+    input_layer = InputLayer.WORLD
+
+    def handle_input(self, hal: HAL, event: InputEvent, target: Optional[int]) -> bool:
+        handled = False
+        for _, cam in self.world.get_component(c.Camera):
+            if not cam.active:
+                continue
+
+            # smooth zoom
+            if isinstance(event, MouseWheelMoved):
+                cam.zoom_velocity += cam.zoom_speed * event.amount
+                handled = True
+
+            # global hotkeys
+            elif isinstance(event, KeyPressed):
+                if event.key is Key.HOME:
+                    cam.camera.target.zero()
+                    handled = True
+                elif zoom := ZOOM_HOTKEYS.get(event.key):
+                    cam.camera.zoom = zoom
+                    handled = True
+
+        return handled
+
     def process(self, hal: HAL) -> None:
         screen_size = hal.get_screen_size()
         mouse_delta = hal.get_mouse_delta()
 
         for _, cam in self.world.get_component(c.Camera):
-            if cam.active:
-                # pan
-                if hal.is_mouse_button_down(MouseButton.MIDDLE):
-                    cam.camera.target -= mouse_delta / cam.camera.zoom
-
-                # smooth zoom
-                if wheel_move := hal.get_mouse_wheel_move():
-                    cam.zoom_velocity += cam.zoom_speed * wheel_move
-                    hal.clear_mouse_wheel_move()
-
-                # global hotkeys
-                if hal.is_key_pressed(Key.HOME):
-                    cam.camera.target.zero()
-                if hal.is_key_pressed(Key.ONE):
-                    cam.camera.zoom = 1
-                if hal.is_key_pressed(Key.TWO):
-                    cam.camera.zoom = 2
-                if hal.is_key_pressed(Key.THREE):
-                    cam.camera.zoom = 3
-                if hal.is_key_pressed(Key.FOUR):
-                    cam.camera.zoom = 4
+            # pan
+            if cam.active and hal.is_mouse_button_down(MouseButton.MIDDLE):
+                cam.camera.target -= mouse_delta / cam.camera.zoom
 
             cam.camera.offset = screen_size / 2
             cam.camera.zoom += cam.zoom_velocity * cam.camera.zoom
@@ -41,3 +66,5 @@ class CameraController(esper.Processor):
             cam.zoom_velocity *= cam.zoom_friction
             if abs(cam.zoom_velocity) < EPSILON:
                 cam.zoom_velocity = 0
+            else:
+                hal.request_frame()
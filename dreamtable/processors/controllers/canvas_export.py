@@ -3,28 +3,43 @@ from datetime import datetime
 import esper
 
 from dreamtable import components as c
-from dreamtable.hal import HAL, Key
+from dreamtable.canvas_images import CanvasImages
+from dreamtable.hal import HAL, Key, KeyPressed
 
 
 class CanvasExportController(esper.Processor):
-    """Export selected Canvas images to a directory"""
+    """
+    Export selected Canvas images to a directory. A Magnifier exports its
+    source's image.
+    """
+
+    def __init__(self) -> None:
+        self._images = CanvasImages()
 
     def process(self, hal: HAL) -> None:
-        is_control_down = hal.is_key_down(Key.LEFT_CONTROL) or hal.is_key_down(
-            Key.RIGHT_CONTROL
-        )
+        if not any(e.key is Key.S for e in hal.get_input_events(KeyPressed)):
+            return
 
-        if not (is_control_down and hal.is_key_pressed(Key.S)):
+        held_keys = hal.get_held_keys()
+        if not (Key.LEFT_CONTROL in held_keys or Key.RIGHT_CONTROL in held_keys):
             return
 
-        for _, (_, sel, img) in self.world.get_components(
-            c.Canvas, c.Selectable, c.Image
-        ):
-            if not sel.selected:
+        pager = self.world.context.pager
+        self._images.update(self.world)
+        exported = set()
+        for ent, (_, sel) in self.world.get_components(c.Canvas, c.Selectable):
+            found = self._images.get(ent)
+            if not sel.selected or found is None:
+                continue
+
+            # Not loaded yet, or already exported through another magnifier
+            image_ent, img = found
+            if not (img.image or image_ent in pager) or image_ent in exported:
                 continue
+            exported.add(image_ent)
 
+            image = pager.image(hal, image_ent, img)
+            size = hal.get_image_size(image)
             timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-            filename = (
-                f"save/thingy_{img.image.width}x{img.image.height}_{timestamp}.png"
-            )
-            hal.export_image(img.image, filename)
+            filename = f"save/thingy_{int(size.x)}x{int(size.y)}_{timestamp}.png"
+            hal.export_image(image, filename)
@@ -0,0 +1,50 @@
+import time
+from typing import Any, Dict, List, Optional
+
+import esper
+
+from dreamtable import components as c
+from dreamtable.hal import HAL
+
+# Seconds between looking for idle canvases
+CHECK_INTERVAL = 1.0
+
+# Seconds per frame to spend paging canvases out; whatever doesn't fit waits
+# for the next frame
+PAGE_OUT_BUDGET = 0.002
+
+
+class CanvasPagerController(esper.Processor):
+    """Pages out the pixels of canvases that haven't been used in a while."""
+
+    def __init__(self) -> None:
+        self._source: Optional[List[Any]] = None
+        self._canvases: Dict[int, c.Image] = {}
+        self._next_check = 0.0
+
+    def process(self, hal: HAL) -> None:
+        pager = self.world.context.pager
+
+        query = self.world.get_components(c.Canvas, c.Image)
+        if query is not self._source:
+            self._source = query
+            self._canvases = {ent: img for ent, (_, img) in query}
+            pager.retain(self._canvases)
+
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + CHECK_INTERVAL
+
+        deadline = time.perf_counter() + PAGE_OUT_BUDGET
+        for ent in pager.idle(now):
+            img = self._canvases[ent]
+
+            # Unsaved changes still need to make it into the texture
+            if not img.image or img.dirty:
+                continue
+
+            pager.page_out(hal, ent, img)
+            if time.perf_counter() >= deadline:
+                self._next_check = now
+                break
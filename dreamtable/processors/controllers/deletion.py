@@ -0,0 +1,35 @@
+import esper
+
+from dreamtable import components as c
+from dreamtable.hal import HAL
+
+# Seconds per frame to spend unloading the images and textures of deleted
+# entities; whatever doesn't fit waits for the next frame
+RELEASE_BUDGET = 0.002
+
+
+class DeletionController(esper.Processor):
+    """
+    Deletes the entities marked in the DeletionQueue this frame, and releases
+    their resources within a per-frame time budget.
+    """
+
+    def process(self, hal: HAL) -> None:
+        queue = self.world.context.deletions
+
+        for ent in queue.take_marked():
+            for img in self.world.try_component(ent, c.Image):
+                if img.texture:
+                    queue.release_texture(img.texture)
+                    img.texture = None
+                if img.image:
+                    queue.release_image(img.image)
+                    img.image = None
+            for tilemap in self.world.try_component(ent, c.Tilemap):
+                for texture in tilemap.chunks.values():
+                    queue.release_texture(texture)
+                tilemap.chunks = {}
+            self.world.delete_entity(ent)
+
+        if queue.flush(hal, RELEASE_BUDGET):
+            hal.request_frame()
@@ -1,27 +1,49 @@
+from typing import Optional
+
 import esper
 
 from dreamtable import components as c
-from dreamtable.constants import Tool
-from dreamtable.hal import HAL, MouseButton
+from dreamtable.constants import InputLayer, Tool
+from dreamtable.hal import HAL, InputEvent, MouseButton, MouseButtonPressed
+from dreamtable.input_handler import InputHandler
+
+
+class DragController(esper.Processor, InputHandler):
+    input_events = (MouseButtonPressed,)
+    input_layer = InputLayer.TOOL
+
+    def handle_input(self, hal: HAL, event: InputEvent, target: Optional[int]) -> bool:
+        if not self.world.context.tool == Tool.MOVE or target is None:
+            return False
+
+        assert isinstance(event, MouseButtonPressed)
+        if event.button is not MouseButton.LEFT:
+            return False
 
+        for pos, drag in self.world.try_components(target, c.Position, c.Draggable):
+            camera = self.world.context.cameras[pos.space]
+            drag.dragging = True
+            drag.offset = hal.get_screen_to_world(event.position, camera) - pos.position
+
+        # Let the click through, so whatever we grabbed also gets selected
+        return False
 
-class DragController(esper.Processor):
     def process(self, hal: HAL) -> None:
         if not self.world.context.tool == Tool.MOVE:
             return
 
-        for _, (pos, ext, drag) in self.world.get_components(
-            c.Position, c.Extent, c.Draggable
-        ):
-            camera = self.world.context.cameras[pos.space]
-            drag_pos = hal.get_screen_to_world(hal.get_mouse_position(), camera)
-            rect = c.rect(pos.position, ext.extent)
-            if hal.is_mouse_button_pressed(MouseButton.LEFT) and drag_pos in rect:
-                drag.dragging = True
-                drag.offset = drag_pos - pos.position
-
+        for _, (pos, drag) in self.world.get_components(c.Position, c.Draggable):
             if drag.dragging:
-                pos.position.assign((drag_pos - drag.offset).floored)
+                # The camera may move under a still pointer, so this isn't
+                # just input
+                self.world.context.scene_version += 1
+                camera = self.world.context.cameras[pos.space]
+                drag_pos = hal.get_screen_to_world(hal.get_mouse_position(), camera)
+                pos.position.assign((drag_pos - drag.offset).floor())
+
+                # Don't interpolate from wherever the simulation last had it
+                if pos.previous is not None:
+                    pos.previous.assign(pos.position)
 
                 # todo snap to grid
 
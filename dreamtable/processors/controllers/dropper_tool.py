@@ -1,35 +1,61 @@
+from typing import Optional
+
 import esper
 
-from dreamtable.constants import Tool
+from dreamtable.constants import InputLayer, Tool
 from dreamtable import components as c
-from dreamtable.hal import HAL, MouseButton, Color
+from dreamtable.canvas_images import CanvasImages
+from dreamtable.hal import HAL, InputEvent, MouseButton, MouseButtonPressed, Color
+from dreamtable.input_handler import InputHandler
+
+
+class DropperToolController(esper.Processor, InputHandler):
+    input_events = (MouseButtonPressed,)
+    input_layer = InputLayer.TOOL
+
+    def __init__(self) -> None:
+        self._images = CanvasImages()
 
+    def handle_input(self, hal: HAL, event: InputEvent, target: Optional[int]) -> bool:
+        context = self.world.context
+        if context.tool != Tool.DROPPER:
+            return False
+
+        assert isinstance(event, MouseButtonPressed)
+        if event.button is MouseButton.LEFT:
+            context.color_primary = context.color_dropper
+        elif event.button is MouseButton.RIGHT:
+            context.color_secondary = context.color_dropper
+        else:
+            return False
+        return True
 
-class DropperToolController(esper.Processor):
     def process(self, hal: HAL) -> None:
         context = self.world.context
 
         if context.tool != Tool.DROPPER:
             return
 
-        for _, (pos, ext, canvas, img) in self.world.get_components(
-            c.Position, c.Extent, c.Canvas, c.Image
+        # Magnifiers show their source's pixels
+        self._images.update(self.world)
+
+        for ent, (pos, ext, canvas) in self.world.get_components(
+            c.Position, c.Extent, c.Canvas
         ):
+            found = self._images.get(ent)
+            if found is None:
+                continue
+            image_ent, img = found
+
             camera = self.world.context.cameras[pos.space]
             rect = c.rect(pos.position, ext.extent)
             dropper_pos = hal.get_screen_to_world(hal.get_mouse_position(), camera)
 
             if dropper_pos in rect:
                 context.color_dropper = hal.get_image_color(
-                    img.image, dropper_pos - pos.position
+                    context.pager.image(hal, image_ent, img),
+                    ((dropper_pos - pos.position) / canvas.scale).floor(),
                 )
                 break
         else:
             context.color_dropper = Color(0, 0, 0, 0)
-
-        if hal.is_mouse_button_pressed(MouseButton.LEFT):
-            hal.clear_mouse_button_pressed(MouseButton.LEFT)
-            context.color_primary = context.color_dropper
-        if hal.is_mouse_button_pressed(MouseButton.RIGHT):
-            hal.clear_mouse_button_pressed(MouseButton.RIGHT)
-            context.color_secondary = context.color_dropper
@@ -9,6 +9,7 @@ from dreamtable.hal import HAL
 class EggTimerController(esper.Processor):
     def process(self, hal: HAL) -> None:
         for ent, egg in self.world.get_component(c.EggTimer):
+            hal.request_frame()
             egg.time_left -= 1
 
             if egg.time_left <= 0:
@@ -1,34 +1,43 @@
 import random
+from typing import Optional
 
 import esper
 
 from dreamtable import components as c
-from dreamtable.constants import PositionSpace, Tool
-from dreamtable.hal import HAL, MouseButton, Vec2
+from dreamtable.constants import InputLayer, PositionSpace, Tool
+from dreamtable.hal import HAL, InputEvent, MouseButton, MouseButtonPressed, Vec2
+from dreamtable.input_handler import InputHandler
 
 
-class EggToolController(esper.Processor):
-    def process(self, hal: HAL) -> None:
+class EggToolController(esper.Processor, InputHandler):
+    input_events = (MouseButtonPressed,)
+    input_layer = InputLayer.TOOL
+
+    def handle_input(self, hal: HAL, event: InputEvent, target: Optional[int]) -> bool:
         if not self.world.context.tool == Tool.EGG:
-            return
+            return False
+
+        assert isinstance(event, MouseButtonPressed)
+        if event.button is not MouseButton.LEFT:
+            return False
 
         camera = self.world.context.cameras[PositionSpace.WORLD]
-        click_pos = hal.get_screen_to_world(hal.get_mouse_position(), camera)
-
-        if hal.is_mouse_button_pressed(MouseButton.LEFT):
-            # todo lots of duplicate loading of images/textures
-            # should share these somehow / unload them on exit!
-            # can't currently share them because Image component manages lifecycle :|
-            image = hal.load_image("res://sprites/16x16babies.png")
-            self.world.create_entity(
-                c.Name("Mystery egg"),
-                c.Position(click_pos - Vec2(8, 12)),
-                c.Extent(Vec2(16, 16)),
-                c.Draggable(),
-                c.Hoverable(),
-                c.Selectable(),
-                c.Deletable(),
-                c.EggTimer(time_left=random.randint(200, 500)),
-                c.Image(image),
-                c.SpriteRegion(88, 65),
-            )
+        click_pos = hal.get_screen_to_world(event.position, camera)
+
+        # todo lots of duplicate loading of images/textures
+        # Each egg loads its own copy of the sheet, since the Image component
+        # owns (and on deletion, releases) its image and texture
+        image = hal.load_image("res://sprites/16x16babies.png")
+        self.world.create_entity(
+            c.Name("Mystery egg"),
+            c.Position(click_pos - Vec2(8, 12)),
+            c.Extent(Vec2(16, 16)),
+            c.Draggable(),
+            c.Hoverable(),
+            c.Selectable(),
+            c.Deletable(),
+            c.EggTimer(time_left=random.randint(200, 500)),
+            c.Image(image),
+            c.SpriteRegion(88, 65),
+        )
+        return True
@@ -1,14 +1,57 @@
+from typing import Dict
+
 import esper
+import numpy as np
 
 from dreamtable import components as c
+from dreamtable.constants import Layer, PositionSpace
 from dreamtable.hal import HAL
+from dreamtable.spatial import EntityBounds
 
 
 class HoverController(esper.Processor):
+    """
+    Tests every Hoverable against the mouse at once, one array per space, and
+    records the topmost hit as the target for routed input.
+    """
+
+    def __init__(self) -> None:
+        self.bounds = {space: EntityBounds(space) for space in PositionSpace}
+        self._hovered: Dict[PositionSpace, np.ndarray] = {}
+
     def process(self, hal: HAL) -> None:
-        for _, (pos, ext, hov) in self.world.get_components(
-            c.Position, c.Extent, c.Hoverable
-        ):
-            camera = self.world.context.cameras[pos.space]
-            hover_pos = hal.get_screen_to_world(hal.get_mouse_position(), camera)
-            hov.hovered = hover_pos in c.rect(pos.position, ext.extent)
+        context = self.world.context
+        query = self.world.get_components(c.Position, c.Extent, c.Hoverable)
+        mouse_pos = hal.get_mouse_position()
+        target = None
+
+        # Screen space is drawn over world space, so it gets first pick
+        for space in (PositionSpace.SCREEN, PositionSpace.WORLD):
+            bounds = self.bounds[space]
+            resynced = bounds.update(query, context.motion)
+
+            camera = context.cameras[space]
+            hover_pos = hal.get_screen_to_world(mouse_pos, camera)
+            hovered = bounds.rects.contains(hover_pos)
+
+            # Only touch the components whose state actually changed
+            if resynced:
+                changed = np.arange(len(hovered))
+            else:
+                changed = np.flatnonzero(hovered != self._hovered[space])
+            self._hovered[space] = hovered
+
+            for i in changed.tolist():
+                bounds.components[i].hovered = bool(hovered[i])
+
+            if target is None and hovered.any():
+                hits = [bounds.entities[i] for i in np.flatnonzero(hovered).tolist()]
+                target = max(hits, key=lambda ent: (self._layer(ent), ent))
+
+        context.pointer_target = target
+
+    def _layer(self, ent: int) -> Layer:
+        """Roughly which layer an entity is drawn on, to break ties between hits."""
+        if self.world.has_component(ent, c.Canvas):
+            return Layer.CANVASES
+        return Layer.SPRITES
@@ -1,20 +1,44 @@
+import time
+
 import esper
 
 from dreamtable import components as c
 from dreamtable.hal import HAL
 
+# Seconds per frame to spend loading images from their files; whatever doesn't
+# fit waits for the next frame
+LOAD_BUDGET = 0.004
+
 
 class ImageController(esper.Processor):
-    """Load images, create textures, and keep them in sync."""
+    """
+    Load images, and keep their textures in sync. Textures are created (and
+    dropped) by TextureResidencyController, as Images come into view.
+
+    Images created with only a filename are loaded here, a few per frame, so
+    that they don't hold up the frames around them. An Extent left at zero is
+    sized to fit its image once it loads.
+    """
 
     def process(self, hal: HAL) -> None:
+        pager = self.world.context.pager
+        deadline = None
+
         for ent, img in self.world.get_component(c.Image):
-            if not img.image and img.filename:
+            if not img.image and img.filename and ent not in pager:
+                if deadline is None:
+                    deadline = time.perf_counter() + LOAD_BUDGET
+                elif time.perf_counter() >= deadline:
+                    hal.request_frame()
+                    continue
                 img.image = hal.load_image(img.filename)
-
-            if not img.texture:
-                img.texture = hal.load_texture_from_image(img.image)
+                for extent in self.world.try_component(ent, c.Extent):
+                    if not extent.extent:
+                        extent.extent = hal.get_image_size(img.image)
+                hal.request_frame()
 
             if img.texture and img.dirty:
                 hal.update_texture_from_image(img.texture, img.image)
-                img.dirty = False
+                c.mark_updated(img)
+                self.world.context.texture_version += 1
+                hal.request_frame()
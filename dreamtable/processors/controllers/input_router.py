@@ -0,0 +1,28 @@
+import esper
+
+from dreamtable.hal import HAL
+
+
+class InputRouterController(esper.Processor):
+    """
+    Offers each input event, in the order they arrived, to the InputHandlers
+    subscribed to its type, in dispatch order, until one of them consumes it.
+
+    Runs right after HoverController, so every handler sees the same pointer
+    target instead of hit-testing for itself.
+    """
+
+    def process(self, hal: HAL) -> None:
+        context = self.world.context
+        target = context.pointer_target
+        input_handlers = self.world.input_handlers
+
+        events = hal.get_all_input_events()
+        if events:
+            # Input can change just about anything
+            context.scene_version += 1
+
+        for event in events:
+            for handler in input_handlers.get(type(event), ()):
+                if handler.handle_input(hal, event, target):
+                    break
@@ -0,0 +1,64 @@
+import esper
+
+from dreamtable import components as c
+from dreamtable.canvas_images import CanvasImages
+from dreamtable.hal import HAL, Key, KeyPressed, Vec2
+
+# How much bigger a new magnifier is than what it magnifies
+MAGNIFICATION = 4
+
+# Space left between a canvas and its magnifier
+MARGIN = 8
+
+
+class MagnifierController(esper.Processor):
+    """
+    M makes a Magnifier of each selected Canvas, beside it. Magnifiers are
+    deleted along with their source.
+    """
+
+    def __init__(self) -> None:
+        self._images = CanvasImages()
+
+    def process(self, hal: HAL) -> None:
+        images = self._images
+        images.update(self.world)
+
+        deletions = self.world.context.deletions
+        for ent in images.orphans:
+            deletions.mark(ent)
+
+        if not any(e.key is Key.M for e in hal.get_input_events(KeyPressed)):
+            return
+
+        pager = self.world.context.pager
+        for ent, (canvas, sel, pos, ext) in self.world.get_components(
+            c.Canvas, c.Selectable, c.Position, c.Extent
+        ):
+            # Magnifying a magnifier magnifies its source some more
+            found = images.get(ent)
+            if not sel.selected or found is None:
+                continue
+            source, img = found
+
+            # Not loaded yet
+            if not (img.image or source in pager):
+                continue
+
+            scale = canvas.scale * MAGNIFICATION
+            components = [
+                c.Name("Magnifier"),
+                c.Position(
+                    Vec2(pos.position.x + ext.extent.x + MARGIN, pos.position.y)
+                ),
+                c.Extent(pager.image_size(hal, source, img) * scale),
+                c.Canvas(scale=scale),
+                c.Magnifier(source),
+                c.Draggable(),
+                c.Hoverable(),
+                c.Selectable(),
+                c.Deletable(),
+            ]
+            for cells in self.world.try_component(ent, c.CellGrid):
+                components.append(c.CellGrid(cells.x, cells.y))
+            self.world.create_entity(*components)
@@ -1,18 +1,66 @@
+from typing import Any, List, Optional
+
 import esper
+import numpy as np
 
 from dreamtable import components as c
 from dreamtable.constants import EPSILON
 from dreamtable.hal import HAL
+from dreamtable.motion_store import MotionStore
 
 
 class MotionController(esper.Processor):
-    """Newtonian dynamics."""
+    """Newtonian dynamics, for every entity in the MotionStore at once."""
+
+    def __init__(self) -> None:
+        self._query: Optional[List[Any]] = None
+
+    def _sync(self, store: MotionStore) -> None:
+        """Add new Velocity + Position entities to the store, drop dead ones."""
+        query = self.world.get_components(c.Velocity, c.Position)
+
+        # esper caches queries until some component is added or removed, so an
+        # unchanged result means the set of entities is unchanged too
+        if query is self._query:
+            return
+        self._query = query
+
+        entities = set()
+        for ent, (vel, pos) in query:
+            entities.add(ent)
+            if ent in store:
+                continue
+            store.add(ent, pos.position, vel.velocity, vel.friction)
+            pos.position = store.view("position", ent)
+            pos.previous = store.view("previous", ent)
+            vel.velocity = store.view("velocity", ent)
+
+        for ent in set(store.rows) - entities:
+            store.remove(ent)
 
     def process(self, hal: HAL) -> None:
-        for _, (vel, pos) in self.world.get_components(c.Velocity, c.Position):
-            pos.position += vel.velocity
-            vel.velocity *= vel.friction
-            if abs(vel.velocity.x) < EPSILON:
-                vel.velocity.x = 0
-            if abs(vel.velocity.y) < EPSILON:
-                vel.velocity.y = 0
+        store = self.world.context.motion
+        self._sync(store)
+
+        n = store.size
+        if not n:
+            store.moving = False
+            return
+
+        position = store.position[:n]
+        velocity = store.velocity[:n]
+
+        # The step after things stop still moves them, from where they were
+        # drawn between steps to where they ended up
+        was_moving = store.moving
+        store.moving = bool(velocity.any())
+        if store.moving or was_moving:
+            self.world.context.scene_version += 1
+
+        store.previous[:n] = position
+        position += velocity
+        velocity *= store.friction[:n, np.newaxis]
+        velocity[np.abs(velocity) < EPSILON] = 0
+
+        if velocity.any():
+            hal.request_frame()
@@ -0,0 +1,112 @@
+from typing import Dict, Optional
+
+import esper
+import numpy as np
+
+from dreamtable import components as c
+from dreamtable import palette
+from dreamtable.constants import ColorDistance
+from dreamtable.hal import HAL, Key, KeyPressed, Vec2
+from dreamtable.processors.controllers.autotile import image_pixels
+
+# Space left between a canvas and its remapped copy
+MARGIN = 8
+
+
+class PaletteController(esper.Processor):
+    """
+    P remaps each selected Canvas to a selected Palette (Shift+P, comparing
+    colors perceptually), making a remapped copy beside it; the original is
+    left as it is.
+
+    A canvas that was already remapped to another Palette gets that palette
+    swapped for the new one instead: each color is replaced by the color at
+    the same place in the new palette.
+    """
+
+    def process(self, hal: HAL) -> None:
+        if not any(e.key is Key.P for e in hal.get_input_events(KeyPressed)):
+            return
+
+        held_keys = hal.get_held_keys()
+        if Key.LEFT_SHIFT in held_keys or Key.RIGHT_SHIFT in held_keys:
+            distance = ColorDistance.PERCEPTUAL
+        else:
+            distance = ColorDistance.RGB
+
+        palettes = [
+            ent
+            for ent, (_, sel) in self.world.get_components(c.Palette, c.Selectable)
+            if sel.selected
+        ]
+        if not palettes:
+            return
+        target = palettes[-1]
+
+        images = dict(self.world.get_component(c.Image))
+        colors = self._colors(hal, images, target)
+        if colors is None:
+            return
+
+        name = "Remapped"
+        for palette_name in self.world.try_component(target, c.Name):
+            name = palette_name.name
+
+        pager = self.world.context.pager
+        sources = {
+            ent: mag.source for ent, mag in self.world.get_component(c.Magnifier)
+        }
+        remapped = dict(self.world.get_component(c.Remapped))
+        for ent, (_, sel, pos, ext) in self.world.get_components(
+            c.Canvas, c.Selectable, c.Position, c.Extent
+        ):
+            # Magnifiers are remapped at their source's size
+            source = sources.get(ent, ent)
+            img = images.get(source)
+            if not sel.selected or img is None or ent in palettes:
+                continue
+
+            # Not loaded yet
+            if not (img.image or source in pager):
+                continue
+
+            pixels = image_pixels(hal, pager, source, img)
+            old = remapped.get(source)
+            old_colors = None
+            if old is not None and old.palette != target:
+                old_colors = self._colors(hal, images, old.palette)
+            if old_colors is not None:
+                pixels = palette.swap(pixels, old_colors, colors, distance)
+            else:
+                pixels = palette.remap(pixels, colors, distance)
+
+            size = Vec2(pixels.shape[1], pixels.shape[0])
+            components = [
+                c.Name(name),
+                c.Position(
+                    Vec2(pos.position.x + ext.extent.x + MARGIN, pos.position.y)
+                ),
+                c.Extent(size.copy()),
+                c.Canvas(),
+                c.Image(image=hal.load_image_from_data(pixels.tobytes(), size)),
+                c.Remapped(target),
+                c.Draggable(),
+                c.Hoverable(),
+                c.Selectable(),
+                c.Deletable(),
+            ]
+            for cells in self.world.try_component(ent, c.CellGrid):
+                components.append(c.CellGrid(cells.x, cells.y))
+            self.world.create_entity(*components)
+
+    def _colors(
+        self, hal: HAL, images: Dict[int, c.Image], ent: int
+    ) -> Optional[np.ndarray]:
+        """A palette's colors, or None if it's gone, not loaded, or empty."""
+        img = images.get(ent)
+        if img is None or not (img.image or ent in self.world.context.pager):
+            return None
+        colors = palette.palette_colors(
+            image_pixels(hal, self.world.context.pager, ent, img)
+        )
+        return colors if len(colors) else None
@@ -3,14 +3,43 @@ from typing import Optional
 import esper
 
 from dreamtable import components as c
-from dreamtable.constants import Tool
-from dreamtable.hal import HAL, MouseButton, Vec2
+from dreamtable.canvas_images import CanvasImages
+from dreamtable.constants import InputLayer, Tool
+from dreamtable.hal import (
+    HAL,
+    InputEvent,
+    MouseButton,
+    MouseButtonPressed,
+    Rect,
+    Vec2,
+)
+from dreamtable.input_handler import InputHandler
 
 
-class PencilToolController(esper.Processor):
+class PencilToolController(esper.Processor, InputHandler):
+    input_events = (MouseButtonPressed,)
+    input_layer = InputLayer.TOOL
+
     def __init__(self) -> None:
         self.last_pos: Optional[Vec2] = None
         self.draw_color = None
+        self._images = CanvasImages()
+
+    def handle_input(self, hal: HAL, event: InputEvent, target: Optional[int]) -> bool:
+        context = self.world.context
+        if context.tool != Tool.PENCIL or self.draw_color:
+            return False
+        if target is None or not self.world.has_component(target, c.Canvas):
+            return False
+
+        assert isinstance(event, MouseButtonPressed)
+        if event.button is MouseButton.LEFT:
+            self.draw_color = context.color_primary
+        elif event.button is MouseButton.RIGHT:
+            self.draw_color = context.color_secondary
+        else:
+            return False
+        return True
 
     def process(self, hal: HAL) -> None:
         context = self.world.context
@@ -23,9 +52,20 @@ class PencilToolController(esper.Processor):
             self.last_pos = None
             self.draw_color = None
 
-        for ent, (canvas, pos, ext, img) in self.world.get_components(
-            c.Canvas, c.Position, c.Extent, c.Image
+        if not self.draw_color:
+            return
+
+        # Magnifiers draw on their source's pixels
+        self._images.update(self.world)
+
+        for ent, (canvas, pos, ext) in self.world.get_components(
+            c.Canvas, c.Position, c.Extent
         ):
+            found = self._images.get(ent)
+            if found is None:
+                continue
+            image_ent, img = found
+
             camera = context.cameras[pos.space]
             rect = c.rect(pos.position, ext.extent)
             pencil_pos = hal.get_screen_to_world(hal.get_mouse_position(), camera)
@@ -33,26 +73,21 @@ class PencilToolController(esper.Processor):
             if pencil_pos not in rect:
                 continue
 
-            if not self.draw_color:
-                if hal.is_mouse_button_pressed(MouseButton.LEFT):
-                    hal.clear_mouse_button_pressed(MouseButton.LEFT)
-                    self.draw_color = context.color_primary
-                elif hal.is_mouse_button_pressed(MouseButton.RIGHT):
-                    hal.clear_mouse_button_pressed(MouseButton.RIGHT)
-                    self.draw_color = context.color_secondary
-                else:
-                    continue
-
             if self.last_pos is None:
                 self.last_pos = pencil_pos
 
-            assert self.draw_color is not None
-
+            start = ((self.last_pos - pos.position) / canvas.scale).floor()
+            end = ((pencil_pos - pos.position) / canvas.scale).floor()
             hal.draw_image_line(
-                img.image,
-                (self.last_pos - pos.position).floored,
-                (pencil_pos - pos.position).floored,
-                self.draw_color,
+                context.pager.image(hal, image_ent, img), start, end, self.draw_color
             )
             self.last_pos = pencil_pos.copy()
-            img.dirty = True
+            c.mark_drawn(
+                img,
+                Rect(
+                    min(start.x, end.x),
+                    min(start.y, end.y),
+                    abs(end.x - start.x) + 1,
+                    abs(end.y - start.y) + 1,
+                ),
+            )
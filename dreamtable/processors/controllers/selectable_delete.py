@@ -1,16 +1,17 @@
 import esper
 
 from dreamtable import components as c
-from dreamtable.hal import HAL, Key
+from dreamtable.hal import HAL, Key, KeyPressed
 
 
 class SelectableDeleteController(esper.Processor):
-    """Mark any selected Deletables as deleted when Delete is pressed."""
+    """Queue any selected Deletables for deletion when Delete is pressed."""
 
     def process(self, hal: HAL) -> None:
-        if hal.is_key_pressed(Key.DELETE):
-            for ent, (sel, del_) in self.world.get_components(
-                c.Selectable, c.Deletable
-            ):
-                if sel.selected:
-                    del_.deleted = True
+        if not any(e.key is Key.DELETE for e in hal.get_input_events(KeyPressed)):
+            return
+
+        deletions = self.world.context.deletions
+        for ent, (sel, _) in self.world.get_components(c.Selectable, c.Deletable):
+            if sel.selected:
+                deletions.mark(ent)
@@ -0,0 +1,34 @@
+from collections import deque
+from typing import Callable, Iterable
+
+import esper
+
+from dreamtable.hal import HAL
+
+StartupStep = Callable[[HAL], None]
+
+
+class StartupController(esper.Processor):
+    """
+    Finishes starting up once the window is open. The first frame goes out
+    (blank) right away, then each following frame runs one of the remaining
+    startup steps, until there are none left and this removes itself.
+
+    Steps run during UPDATE, so processors a step adds to the UPDATE phase
+    first run on the next frame, while ones it adds to later phases run on
+    this one. Order the steps accordingly.
+    """
+
+    def __init__(self, steps: Iterable[StartupStep]) -> None:
+        self._steps = deque(steps)
+        self._started = False
+
+    def process(self, hal: HAL) -> None:
+        if self._started and self._steps:
+            self._steps.popleft()(hal)
+        self._started = True
+
+        if self._steps:
+            hal.request_frame()
+        else:
+            self.world.remove_processor(StartupController)
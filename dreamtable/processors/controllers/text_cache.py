@@ -0,0 +1,10 @@
+import esper
+
+from dreamtable.hal import HAL
+
+
+class TextCacheController(esper.Processor):
+    """Evicts old text from the text cache, once this frame's text has been drawn."""
+
+    def process(self, hal: HAL) -> None:
+        self.world.context.text_cache.trim(hal)
@@ -0,0 +1,94 @@
+from typing import Any, Dict, List, Optional, Set
+
+import esper
+
+from dreamtable import components as c
+from dreamtable.constants import PositionSpace
+from dreamtable.hal import HAL
+from dreamtable.texture_residency import BYTES_PER_PIXEL
+
+
+class TextureResidencyController(esper.Processor):
+    """
+    Uploads textures for the Images that are about to be drawn, and unloads
+    the ones that have been off-screen longest while over the texture budget.
+
+    Runs after VisibilityController and before anything draws an Image.
+    """
+
+    def __init__(self) -> None:
+        self._source: Optional[List[Any]] = None
+        self._images: Dict[int, c.Image] = {}
+        self._world_images: Set[int] = set()
+        self._unculled: List[int] = []
+
+    def _sync(self, hal: HAL, query: List[Any]) -> None:
+        self._source = query
+        self._images = {ent: img for ent, (img, _) in query}
+        self._world_images = {
+            ent for ent, (_, pos) in query if pos.space == PositionSpace.WORLD
+        }
+        self._unculled = [ent for ent in self._images if ent not in self._world_images]
+
+        # See TextureResidency: a shared texture would be unloaded from under
+        # the other entities using it as soon as one of them was evicted
+        textures = [img.texture for img in self._images.values() if img.texture]
+        assert len(set(textures)) == len(textures), "Images can't share textures"
+
+        residency = self.world.context.textures
+        residency.retain(self._images)
+
+        # Adopt textures that were uploaded by someone else
+        for ent, img in self._images.items():
+            if img.texture and ent not in residency:
+                residency.add(ent, self._texture_bytes(hal, ent, img))
+
+    def _texture_bytes(self, hal: HAL, ent: int, img: c.Image) -> int:
+        size = self.world.context.pager.image_size(hal, ent, img)
+        return int(size.x) * int(size.y) * BYTES_PER_PIXEL
+
+    def process(self, hal: HAL) -> None:
+        context = self.world.context
+        residency = context.textures
+        residency.frame += 1
+
+        query = self.world.get_components(c.Image, c.Position)
+        if query is not self._source:
+            self._sync(hal, query)
+
+        images = self._images
+        needed = self._unculled + list(context.visible & self._world_images)
+
+        # Tilemaps render their tiles from their source's texture, wherever
+        # the source is, whenever they have chunks to render
+        for ent, (tilemap, pos) in self.world.get_components(c.Tilemap, c.Position):
+            if (
+                tilemap.stale
+                and tilemap.source in images
+                and not c.is_culled(context, ent, pos)
+            ):
+                needed.append(tilemap.source)
+
+        # Magnifiers draw their source's texture, wherever the source is
+        for ent, (mag, pos) in self.world.get_components(c.Magnifier, c.Position):
+            if mag.source in images and not c.is_culled(context, ent, pos):
+                needed.append(mag.source)
+
+        for ent in needed:
+            img = images[ent]
+            if not img.texture:
+                if not img.image and ent not in context.pager:
+                    continue
+                image = context.pager.image(hal, ent, img)
+                img.texture = hal.load_texture_from_image(image)
+                if img.dirty:
+                    # Drawn on while it had no texture
+                    c.mark_updated(img)
+                residency.add(ent, self._texture_bytes(hal, ent, img))
+                context.texture_version += 1
+            residency.touch(ent)
+
+        for ent in residency.evict():
+            img = images[ent]
+            hal.unload_texture(img.texture)
+            img.texture = None
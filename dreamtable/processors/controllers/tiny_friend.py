@@ -1,41 +1,130 @@
 import math
+import random
+from typing import Any, List, Optional
 
 import esper
+import numpy as np
 
 from dreamtable import components as c
 from dreamtable.constants import EPSILON
-from dreamtable.hal import HAL, Color
+from dreamtable.hal import HAL, Color, Vec2
 
+TINT_NORMAL = Color(255, 255, 255, 255)
+TINT_SELECTED = Color(64, 128, 255, 255)
 
-# todo lots of vector-y cleanup here
-# also the angle calculation is probably wrong
-# also also, maybe a helper for angle-to-direction
-# also also also, sprite_region needs to have a rect
+# Sprite sheet row for each eighth of a turn, starting from the angle
+# (atan2 + pi) / 2pi == 0, i.e. facing left
+DIRECTION_CELLS = np.array([1, 3, 3, 2, 2, 0, 0, 1])
+
+# Every kind of friend walks through four columns of the sprite sheet
+WALK_FRAME_TIME = 0.15
+WALK_CYCLE = [(Vec2(x * 16, 0), WALK_FRAME_TIME) for x in range(4)]
+
+
+# todo the angle calculation is probably wrong
+# also, sprite_region needs to have a rect
 class TinyFriendController(esper.Processor):
-    def process(self, hal: HAL) -> None:
-        for ent, (friend, vel, sel, spr) in self.world.get_components(
+    def __init__(self) -> None:
+        self._source: Optional[List[Any]] = None
+        self._query: List[Any] = []
+        self._store_version = -1
+        self._selection_version = -1
+        self._walk_cycle: Optional[int] = None
+
+        # Per-friend state, in the same order as self._query
+        self._rows = np.zeros(0, dtype=np.int64)
+        self._angles = np.zeros(0)
+        self._cell_y = np.zeros(0, dtype=np.int64)
+        self._selected = np.zeros(0, dtype=bool)
+        self._animations: List[c.Animation] = []
+
+    def _sync(self) -> None:
+        store = self.world.context.motion
+        query = self.world.get_components(
             c.TinyFriend, c.Velocity, c.Selectable, c.SpriteRegion
-        ):
-            spr.tint = (
-                Color(64, 128, 255, 255) if sel.selected else Color(255, 255, 255, 255)
-            )
-
-            base_cell_x = friend.type * 4
-            anim_cell_x = 0  # todo
-            cell_x = base_cell_x + anim_cell_x
-
-            if vel.velocity.magnitude > EPSILON:
-                friend.angle = (
-                    math.atan2(vel.velocity.y, vel.velocity.x) + math.pi
-                ) / (2 * math.pi)
-
-            # fmt: off
-            cell_y = 1
-            if friend.angle < 0.125:   cell_y = 1  # noqa
-            elif friend.angle < 0.375: cell_y = 3  # noqa
-            elif friend.angle < 0.625: cell_y = 2  # noqa
-            elif friend.angle < 0.875: cell_y = 0  # noqa
-            # fmt: on
-
-            spr.x = cell_x * 16
-            spr.y = cell_y * 16
+        )
+        if query is self._source and store.version == self._store_version:
+            return
+        self._source = query
+        self._store_version = store.version
+
+        # Write back the angles we've been tracking before starting over
+        for (_, (friend, *_)), angle in zip(self._query, self._angles.tolist()):
+            friend.angle = angle
+
+        query = [(ent, comps) for ent, comps in query if ent in store]
+        self._query = query
+
+        count = len(query)
+        self._rows = np.fromiter(
+            (store.rows[ent] for ent, _ in query), dtype=np.int64, count=count
+        )
+        self._angles = np.fromiter(
+            (friend.angle for _, (friend, *_) in query), dtype=float, count=count
+        )
+        self._cell_y = np.full(count, -1)
+        self._selected = np.zeros(count, dtype=bool)
+        self._selection_version = -1
+
+        # Friends all share the walk cycle, starting from one of its frames,
+        # so that they don't step in time (the AnimationController updates
+        # everyone on the same frame together)
+        self._animations = []
+        for ent, (friend, _, sel, spr) in query:
+            anim = next(self.world.try_component(ent, c.Animation), None)
+            if anim is None:
+                if self._walk_cycle is None:
+                    self._walk_cycle = self.world.create_entity(
+                        c.Name("Tiny friend walk cycle"), c.Timeline(WALK_CYCLE)
+                    )
+                anim = c.Animation(
+                    self._walk_cycle,
+                    origin=Vec2(friend.type * 4 * 16, 0),
+                    phase=random.randrange(len(WALK_CYCLE)) * WALK_FRAME_TIME,
+                )
+                self.world.add_component(ent, anim)
+                spr.x = int(anim.origin.x)
+            self._animations.append(anim)
+            spr.tint = TINT_NORMAL
+
+    def process(self, hal: HAL) -> None:
+        store = self.world.context.motion
+        self._sync()
+
+        query = self._query
+        if not query:
+            return
+
+        # Direction of travel, for friends that are going anywhere
+        velocity = store.velocity[self._rows]
+        moving = np.hypot(velocity[:, 0], velocity[:, 1]) > EPSILON
+        self._angles[moving] = (
+            np.arctan2(velocity[moving, 1], velocity[moving, 0]) + math.pi
+        ) / (2 * math.pi)
+        cell_y = DIRECTION_CELLS[(self._angles * 8).astype(np.int64) % 8]
+
+        # Only touch the components whose sprite actually changed. The row is
+        # the animation's origin, which its frames are relative to.
+        turned = np.flatnonzero(cell_y != self._cell_y).tolist()
+        if turned:
+            self.world.context.scene_version += 1
+        for i in turned:
+            _, (_, _, _, spr) = query[i]
+            anim = self._animations[i]
+            row = int(cell_y[i]) * 16
+            spr.y += row - int(anim.origin.y)
+            anim.origin.y = row
+        self._cell_y = cell_y
+
+        selection_version = self.world.context.selection_version
+        if selection_version == self._selection_version:
+            return
+        self._selection_version = selection_version
+
+        selected = np.fromiter(
+            (sel.selected for _, (_, _, sel, _) in query), dtype=bool, count=len(query)
+        )
+        for i in np.flatnonzero(selected != self._selected).tolist():
+            _, (_, _, _, spr) = query[i]
+            spr.tint = TINT_SELECTED if selected[i] else TINT_NORMAL
+        self._selected = selected
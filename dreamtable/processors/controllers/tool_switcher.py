@@ -1,8 +1,18 @@
+from typing import Optional
+
 import esper
 
 from dreamtable import components as c
-from dreamtable.constants import Tool
-from dreamtable.hal import HAL, Key, MouseButton
+from dreamtable.constants import InputLayer, Tool
+from dreamtable.hal import (
+    HAL,
+    InputEvent,
+    Key,
+    KeyPressed,
+    MouseButton,
+    MouseButtonPressed,
+)
+from dreamtable.input_handler import InputHandler
 
 HOTKEYS = {
     Key.Q: Tool.MOVE,
@@ -12,32 +22,42 @@ HOTKEYS = {
     Key.T: Tool.CELLREF,
     Key.Y: Tool.CELLREF_DROPPER,
     Key.U: Tool.EGG,
+    Key.I: Tool.BRUSH,
 }
 
 
-class ToolSwitcherController(esper.Processor):
-    def process(self, hal: HAL) -> None:
+class ToolSwitcherController(esper.Processor, InputHandler):
+    input_events = (MouseButtonPressed, KeyPressed)
+    input_layer = InputLayer.UI
+
+    def handle_input(self, hal: HAL, event: InputEvent, target: Optional[int]) -> bool:
         context = self.world.context
 
         # Update the current tool if we pressed a tool switcher
-        for ent, (switcher, hover) in self.world.get_components(
-            c.ToolSwitcher, c.Hoverable
-        ):
-            if hover.hovered and hal.is_mouse_button_pressed(MouseButton.LEFT):
-                hal.clear_mouse_button_pressed(MouseButton.LEFT)
+        if isinstance(event, MouseButtonPressed):
+            if event.button is not MouseButton.LEFT or target is None:
+                return False
+            for switcher in self.world.try_component(target, c.ToolSwitcher):
                 context.tool = switcher.tool
+                return True
+            return False
 
         # Switch to a tool if we pressed its hotkey
-        for key, tool in HOTKEYS.items():
-            if hal.is_key_pressed(key):
-                context.tool = tool
+        if isinstance(event, KeyPressed) and (tool := HOTKEYS.get(event.key)):
+            context.tool = tool
+            return True
+
+        return False
+
+    def process(self, hal: HAL) -> None:
+        context = self.world.context
 
         # Tool-specific temporary overrides
         # todo hmmmm this is weird
         is_overriding = False
         if (
             context.tool == Tool.PENCIL or context.underlying_tool == Tool.PENCIL
-        ) and hal.is_key_down(Key.LEFT_ALT):
+        ) and Key.LEFT_ALT in hal.get_held_keys():
             context.tool = Tool.DROPPER
             context.underlying_tool = Tool.PENCIL
             is_overriding = True
@@ -0,0 +1,77 @@
+from typing import Any, List, Optional, Tuple
+
+import esper
+
+from dreamtable import components as c
+from dreamtable.constants import PositionSpace
+from dreamtable.hal import HAL
+from dreamtable.spatial import SpatialHash, query_points
+
+# Simulated entities are tested by their position (top left corner) alone, so
+# views are grown by this much to catch ones that are only partly in view
+MOVING_MARGIN = 32
+
+
+class VisibilityController(esper.Processor):
+    """
+    Works out which world space entities can be seen, by the main camera and by
+    each Viewport, with one query against a shared spatial index.
+
+    Runs at the start of rendering, once everything has moved.
+    """
+
+    def __init__(self) -> None:
+        self.index = SpatialHash()
+        self._source: Optional[List[Any]] = None
+        self._store_version = -1
+        self._static: List[Tuple[int, c.Position, c.Extent]] = []
+
+    def _sync(self, query: List[Any]) -> None:
+        context = self.world.context
+        store = context.motion
+        self._source = query
+        self._store_version = store.version
+        self._static = [
+            (ent, pos, ext)
+            for ent, (pos, ext) in query
+            if pos.space == PositionSpace.WORLD and ent not in store
+        ]
+        self.index.retain({ent for ent, _, _ in self._static})
+
+        # Something was created, deleted, or gained or lost a component
+        context.scene_version += 1
+
+    def process(self, hal: HAL) -> None:
+        context = self.world.context
+        store = context.motion
+
+        query = self.world.get_components(c.Position, c.Extent)
+        if query is not self._source or store.version != self._store_version:
+            self._sync(query)
+
+        # Things that don't simulate rarely move, so most of these are no-ops
+        for ent, pos, ext in self._static:
+            self.index.update(ent, c.rect(pos.position, ext.extent))
+
+        main_camera = context.cameras[PositionSpace.WORLD]
+        views = [c.view_rect(main_camera, hal.get_screen_size())]
+        viewports = []
+        for _, (vp, ext) in self.world.get_components(c.Viewport, c.Extent):
+            # Like the main camera, viewport cameras are centered on their target
+            vp.camera.offset = ext.extent / 2
+            views.append(c.view_rect(vp.camera, ext.extent))
+            viewports.append(vp)
+
+        static_hits = self.index.query_many(views)
+        moving_hits = query_points(store.position[: store.size], views, MOVING_MARGIN)
+
+        visible = []
+        for static, rows in zip(static_hits, moving_hits):
+            visible.append(static.union(store.entities[rows].tolist()))
+
+        context.visible = set().union(*visible)
+        context.views = views
+        for vp, vp_visible in zip(viewports, visible[1:]):
+            if vp_visible != vp.visible:
+                vp.visible = vp_visible
+                vp.visible_version += 1
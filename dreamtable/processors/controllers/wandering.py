@@ -1,15 +1,65 @@
+import math
+from typing import Any, List, Optional
+
 import esper
+import numpy as np
 
 from dreamtable import components as c
-from dreamtable.hal import HAL, Vec2
+from dreamtable.hal import HAL
+from dreamtable.motion_store import MotionStore
+
+rng = np.random.default_rng()
 
 
 class WanderingController(esper.Processor):
     """Kick objects around a bit."""
 
+    def __init__(self) -> None:
+        self._query: Optional[List[Any]] = None
+        self._store_version = -1
+
+    def _sync(self, store: MotionStore) -> None:
+        """Copy Wandering components into the store for newly stored entities."""
+        query = self.world.get_components(c.Velocity, c.Wandering)
+        if query is self._query and store.version == self._store_version:
+            return
+        self._query = query
+        self._store_version = store.version
+
+        n = store.size
+        wandering = set(store.entities[:n][store.wandering[:n]].tolist())
+
+        for ent, (_, jit) in query:
+            if ent in wandering:
+                wandering.remove(ent)
+            elif ent in store:
+                store.set_wandering(ent, jit)
+
+        for ent in wandering:
+            store.clear_wandering(ent)
+
     def process(self, hal: HAL) -> None:
-        for _, (vel, jit) in self.world.get_components(c.Velocity, c.Wandering):
-            jit.tick -= 1
-            if jit.tick == 0:
-                jit.tick = jit.interval
-                vel.velocity.assign(Vec2.random() * jit.force)
+        store = self.world.context.motion
+        self._sync(store)
+
+        n = store.size
+        wandering = store.wandering[:n]
+        if not wandering.any():
+            return
+
+        hal.request_frame()
+
+        tick = store.wander_tick[:n]
+        tick[wandering] -= 1
+
+        kicked = wandering & (tick == 0)
+        count = np.count_nonzero(kicked)
+        if not count:
+            return
+
+        tick[kicked] = store.wander_interval[:n][kicked]
+        theta = rng.uniform(0, 2 * math.pi, count)
+        force = store.wander_force[:n][kicked]
+        store.velocity[:n][kicked] = (
+            np.column_stack((np.cos(theta), np.sin(theta))) * force[:, np.newaxis]
+        )
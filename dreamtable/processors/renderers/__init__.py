@@ -1,10 +1,38 @@
-from .background_grid import BackgroundGridRenderer
-from .box_selection import BoxSelectionRenderer
-from .button import ButtonRenderer
-from .canvas import CanvasRenderer
-from .debug_entity import DebugEntityRenderer
-from .dropper_tool import DropperToolRenderer
-from .grid_tool import GridToolRenderer
-from .pencil_tool import PencilToolRenderer
-from .position_marker import PositionMarkerRenderer
-from .sprite_region import SpriteRegionRenderer
+"""
+The renderer classes, by name. Each one's module is imported the first time
+the class is looked up, so only the processors that are actually used pay for
+their imports, and only when they're needed.
+"""
+
+from importlib import import_module
+from typing import Any, List
+
+PROCESSORS = {
+    "BackgroundGridRenderer": "background_grid",
+    "BoxSelectionRenderer": "box_selection",
+    "ButtonRenderer": "button",
+    "CanvasRenderer": "canvas",
+    "CommandBufferRenderer": "command_buffer",
+    "DebugEntityRenderer": "debug_entity",
+    "DropperToolRenderer": "dropper_tool",
+    "GridToolRenderer": "grid_tool",
+    "PencilToolRenderer": "pencil_tool",
+    "PositionMarkerRenderer": "position_marker",
+    "SpriteRegionRenderer": "sprite_region",
+    "TilemapRenderer": "tilemap",
+    "ViewportRenderer": "viewport",
+}
+
+__all__ = list(PROCESSORS)
+
+
+def __getattr__(name: str) -> Any:
+    if name not in PROCESSORS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    processor_class = getattr(import_module(f".{PROCESSORS[name]}", __name__), name)
+    globals()[name] = processor_class
+    return processor_class
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(PROCESSORS))
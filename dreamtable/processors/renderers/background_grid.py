@@ -1,39 +1,102 @@
+import math
+
 import esper
 
-from dreamtable.constants import PositionSpace
+from dreamtable.constants import Layer, PositionSpace
 from dreamtable import components as c
-from dreamtable.hal import HAL, Vec2
+from dreamtable.hal import HAL, Color, Vec2
 
 
 class BackgroundGridRenderer(esper.Processor):
-    """Draws BackgroundGrids."""
+    """
+    Draws BackgroundGrids.
+
+    The lines are rendered into a texture one grid step larger than the screen,
+    which is then drawn at an offset to follow the camera. It's only rendered
+    again when the step (i.e. the zoom) or the screen size changes.
+    """
 
     def process(self, hal: HAL) -> None:
+        commands = self.world.context.commands
         camera = self.world.context.cameras[PositionSpace.WORLD]
         screen = hal.get_screen_rect()
         for _, (grid, ext) in self.world.get_components(c.BackgroundGrid, c.Extent):
-            step = ext.extent.x * camera.zoom
-            if step >= grid.min_step:
-                x = -camera.target.x * camera.zoom + screen.width / 2
-                x %= step
-                while x < screen.width:
-                    hal.draw_line_width(
-                        Vec2(x, 0).floored,
-                        Vec2(x, screen.height).floored,
-                        grid.line_width,
-                        grid.color,
-                    )
-                    x += step
-
-            step = ext.extent.y * camera.zoom
-            if step >= grid.min_step:
-                y = -camera.target.y * camera.zoom + screen.height / 2
-                y %= step
-                while y < screen.height:
-                    hal.draw_line_width(
-                        Vec2(0, y).floored,
-                        Vec2(screen.width, y).floored,
-                        grid.line_width,
-                        grid.color,
-                    )
-                    y += step
+            # A step of 0 means that axis' lines are too close together to draw
+            step = ext.extent * camera.zoom
+            step_x = step.x if step.x >= grid.min_step else 0
+            step_y = step.y if step.y >= grid.min_step else 0
+            if not step_x and not step_y:
+                continue
+
+            key = (
+                step_x,
+                step_y,
+                *grid.color.rgba,
+                grid.line_width,
+                screen.width,
+                screen.height,
+            )
+            if key != grid.texture_key:
+                self.render_grid(hal, grid, step_x, step_y, screen.size)
+                grid.texture_key = key
+
+            offset = Vec2()
+            if step_x:
+                offset.x = (-camera.target.x * camera.zoom + screen.width / 2) % step_x
+                offset.x -= step_x
+            if step_y:
+                offset.y = (-camera.target.y * camera.zoom + screen.height / 2) % step_y
+                offset.y -= step_y
+
+            # The lines were rendered opaque, so they can't double up where
+            # they cross; the grid's alpha is applied here instead
+            commands.draw_texture(
+                grid.texture,
+                offset.floored,
+                Color(255, 255, 255, grid.color.a),
+                layer=Layer.BACKGROUND,
+            )
+
+    def render_grid(
+        self,
+        hal: HAL,
+        grid: c.BackgroundGrid,
+        step_x: float,
+        step_y: float,
+        screen_size: Vec2,
+    ) -> None:
+        size = Vec2(
+            math.ceil(screen_size.x + step_x), math.ceil(screen_size.y + step_y)
+        )
+
+        # Reuse the texture unless it's too small, or much bigger than needed
+        too_small = size.x > grid.texture_size.x or size.y > grid.texture_size.y
+        too_big = size.x * size.y * 2 < grid.texture_size.x * grid.texture_size.y
+        if grid.texture is None or too_small or too_big:
+            if grid.texture is not None:
+                hal.unload_texture(grid.texture)
+            grid.texture = hal.load_render_texture(size)
+            grid.texture_size = size
+
+        size = grid.texture_size
+        color = Color(grid.color.r, grid.color.g, grid.color.b, 255)
+
+        hal.begin_texture_mode(grid.texture)
+
+        if step_x:
+            x = 0.0
+            while x < size.x:
+                hal.draw_line_width(
+                    Vec2(x, 0).floor(), Vec2(x, size.y).floor(), grid.line_width, color
+                )
+                x += step_x
+
+        if step_y:
+            y = 0.0
+            while y < size.y:
+                hal.draw_line_width(
+                    Vec2(0, y).floor(), Vec2(size.x, y).floor(), grid.line_width, color
+                )
+                y += step_y
+
+        hal.end_texture_mode()
@@ -1,7 +1,7 @@
 import esper
 
 from dreamtable import components as c
-from dreamtable.constants import SelectionType
+from dreamtable.constants import Layer, SelectionType
 from dreamtable.hal import HAL, Rect, Vec2
 
 
@@ -10,14 +10,11 @@ class BoxSelectionRenderer(esper.Processor):
 
     def process(self, hal: HAL) -> None:
         theme = self.world.context.theme
+        commands = self.world.context.commands
 
-        for _, (pos, ext, sel) in self.world.get_components(
+        for ent, (pos, ext, sel) in self.world.get_components(
             c.Position, c.Extent, c.BoxSelection
         ):
-            camera = self.world.context.cameras[pos.space]
-
-            hal.push_camera(camera)
-
             if sel.type == SelectionType.NORMAL:
                 fill_color = theme.color_selection_normal_fill
                 outline_color = theme.color_selection_normal_outline
@@ -42,19 +39,31 @@ class BoxSelectionRenderer(esper.Processor):
             width = x_max - x
             height = y_max - y
 
-            rect = Rect(x, y, width, height).floored
-            hal.draw_rectangle(rect, fill_color)
-            hal.draw_rectangle_lines(rect, 1, outline_color)
+            rect = Rect(x, y, width, height).floor()
+            commands.draw_rectangle(
+                rect, fill_color, layer=Layer.SELECTION, space=pos.space, entity=ent
+            )
+            commands.draw_rectangle_lines(
+                rect,
+                1,
+                outline_color,
+                layer=Layer.SELECTION,
+                space=pos.space,
+                entity=ent,
+            )
 
             if labeled:
+                # Not from the text cache: the size changes on nearly every
+                # frame of a drag, so each one would be rendered for one frame
                 text_pos = Vec2(x, y - 8)
-                hal.draw_text(
+                commands.draw_text(
                     theme.font,
                     f"{int(width)}x{int(height)}",
-                    text_pos.floored,
+                    text_pos.floor(),
                     size=8,
                     spacing=1,
                     color=theme.color_text_normal,
+                    layer=Layer.SELECTION,
+                    space=pos.space,
+                    entity=ent,
                 )
-
-            hal.pop_camera()
@@ -1,38 +1,114 @@
+from typing import Hashable, List
+
 import esper
 
 from dreamtable import components as c
-from dreamtable.hal import HAL
+from dreamtable.constants import Layer, PositionSpace
+from dreamtable.command_buffer import CommandBuffer
+from dreamtable.hal import HAL, Color, Vec2
+from dreamtable.retained_layer import RetainedLayer
+
+
+def over(under: Color, color: Color) -> Color:
+    """`color` blended over `under`, as one color."""
+    alpha = color.a / 255
+    under_alpha = under.a / 255 * (1 - alpha)
+    total = alpha + under_alpha
+    if not total:
+        return Color()
+    r, g, b = (
+        round((top * alpha + bottom * under_alpha) / total)
+        for top, bottom in zip(color.rgba[:3], under.rgba[:3])
+    )
+    return Color(r, g, b, round(total * 255))
 
 
 class ButtonRenderer(esper.Processor):
+    """
+    Draws Buttons.
+
+    Screen-space buttons (i.e. the toolbar) are drawn into a retained layer,
+    which is only redrawn when one of them changes.
+    """
+
+    def __init__(self) -> None:
+        self.layer = RetainedLayer()
+
     def process(self, hal: HAL) -> None:
-        theme = self.world.context.theme
+        context = self.world.context
+
+        screen_buttons: List[int] = []
+        signature: List[Hashable] = []
 
         for ent, (pos, ext, btn) in self.world.get_components(
             c.Position, c.Extent, c.Button
         ):
-            camera = self.world.context.cameras[pos.space]
+            if pos.space != PositionSpace.SCREEN:
+                self.draw_button(ent, context.commands)
+                continue
+
+            screen_buttons.append(ent)
+            signature.append(
+                (
+                    ent,
+                    pos.position.xy,
+                    ext.extent.xy,
+                    btn.lit,
+                    any(
+                        hov.hovered
+                        for hov in self.world.try_component(ent, c.Hoverable)
+                    ),
+                    tuple(
+                        img.texture for img in self.world.try_component(ent, c.Image)
+                    ),
+                )
+            )
+
+        if not screen_buttons:
+            return
 
-            hal.push_camera(camera)
+        camera = context.cameras[PositionSpace.SCREEN]
+        signature.append((camera.target.xy, camera.offset.xy, camera.zoom))
+        frozen_signature = tuple(signature)
 
-            rect = c.rect(pos.position, ext.extent)
+        if self.layer.is_stale(hal, frozen_signature):
+            for ent in screen_buttons:
+                self.draw_button(ent, self.layer.commands)
+            self.layer.redraw(hal, context.cameras, frozen_signature)
+
+        context.commands.draw_texture(self.layer.texture, Vec2(0, 0), layer=Layer.UI)
+
+    def draw_button(self, ent: int, commands: CommandBuffer) -> None:
+        theme = self.world.context.theme
+        pos = self.world.component_for_entity(ent, c.Position)
+        ext = self.world.component_for_entity(ent, c.Extent)
+        btn = self.world.component_for_entity(ent, c.Button)
 
-            fill_color = theme.color_button_fill
-            border_color = theme.color_button_border
+        rect = c.rect(pos.position, ext.extent)
 
-            if btn.lit:
-                fill_color = theme.color_button_lit_fill
-                border_color = theme.color_button_lit_border
+        fill_color = theme.color_button_fill
+        border_color = theme.color_button_border
 
-            hal.draw_rectangle(rect, fill_color)
-            hal.draw_rectangle_lines(rect, 1, border_color)
+        if btn.lit:
+            fill_color = theme.color_button_lit_fill
+            border_color = theme.color_button_lit_border
 
-            for hov in self.world.try_component(ent, c.Hoverable):
-                if hov.hovered:
-                    hal.draw_rectangle(rect, theme.color_button_hover_overlay)
+        # The hover overlay covers the fill and border alike, and is blended
+        # into both up front. Drawn on its own into the (transparent) retained
+        # layer, its alpha would be blended into the layer's, leaving hovered
+        # buttons partly see-through.
+        for hov in self.world.try_component(ent, c.Hoverable):
+            if hov.hovered:
+                fill_color = over(fill_color, theme.color_button_hover_overlay)
+                border_color = over(border_color, theme.color_button_hover_overlay)
 
-            for img in self.world.try_component(ent, c.Image):
-                if img.texture:
-                    hal.draw_texture(img.texture, pos.position)
+        commands.draw_rectangle(rect, fill_color, layer=Layer.UI, space=pos.space)
+        commands.draw_rectangle_lines(
+            rect, 1, border_color, layer=Layer.UI, space=pos.space
+        )
 
-            hal.pop_camera()
+        for img in self.world.try_component(ent, c.Image):
+            if img.texture:
+                commands.draw_texture(
+                    img.texture, pos.position, layer=Layer.UI, space=pos.space
+                )
@@ -1,29 +1,52 @@
 import esper
 
 from dreamtable import components as c
-from dreamtable.constants import Tool
-from dreamtable.hal import HAL, Vec2
+from dreamtable.canvas_images import CanvasImages
+from dreamtable.constants import Layer, Tool
+from dreamtable.hal import HAL, Rect, Vec2
 
 
 class CanvasRenderer(esper.Processor):
     """Draws Canvases and their images."""
 
+    def __init__(self) -> None:
+        # Magnifiers draw their source's texture
+        self._images = CanvasImages()
+
     def process(self, hal: HAL) -> None:
         theme = self.world.context.theme
+        commands = self.world.context.commands
+        self._images.update(self.world)
 
         for ent, (canvas, pos, ext) in self.world.get_components(
             c.Canvas, c.Position, c.Extent
         ):
-            camera = self.world.context.cameras[pos.space]
-
-            hal.push_camera(camera)
+            if c.is_culled(self.world.context, ent, pos):
+                continue
 
             # draw texture if it has an image
             # it always should, but who knows.
-            for img in self.world.try_component(ent, c.Image):
-                if not img.texture:
-                    continue
-                hal.draw_texture(img.texture, pos.position)
+            found = self._images.get(ent)
+            img = found[1] if found is not None else None
+            if img is not None and img.texture:
+                if canvas.scale == 1:
+                    commands.draw_texture(
+                        img.texture,
+                        pos.position,
+                        layer=Layer.CANVASES,
+                        space=pos.space,
+                        entity=ent,
+                    )
+                else:
+                    size = ext.extent / canvas.scale
+                    commands.draw_texture_pro(
+                        img.texture,
+                        Rect(0, 0, size.x, size.y),
+                        c.rect(pos.position, ext.extent),
+                        layer=Layer.CANVASES,
+                        space=pos.space,
+                        entity=ent,
+                    )
 
             outline_color = theme.color_thingy_outline
             for hov in self.world.try_component(ent, c.Hoverable):
@@ -34,7 +57,14 @@ class CanvasRenderer(esper.Processor):
                     outline_color = theme.color_thingy_selected_outline
 
             outline_rect = c.rect(pos.position, ext.extent).grown(1)
-            hal.draw_rectangle_lines(outline_rect, 1, outline_color)
+            commands.draw_rectangle_lines(
+                outline_rect,
+                1,
+                outline_color,
+                layer=Layer.CANVASES,
+                space=pos.space,
+                entity=ent,
+            )
 
             # todo: draw ref'd cells
             # for cell_y, cell_ref_row in enumerate(self.cell_refs):
@@ -82,19 +112,23 @@ class CanvasRenderer(esper.Processor):
                 if cells.x > 1:
                     for ix in range(1, cells.x):
                         x = pos.position.x + ix / cells.x * ext.extent.x
-                        hal.draw_line(
+                        commands.draw_line(
                             Vec2(x, pos.position.y),
                             Vec2(x, pos.position.y + ext.extent.y),
                             cell_grid_color,
+                            layer=Layer.CANVASES,
+                            space=pos.space,
+                            entity=ent,
                         )
 
                 if cells.y > 1:
                     for iy in range(1, cells.y):
                         y = pos.position.y + iy / cells.y * ext.extent.y
-                        hal.draw_line(
+                        commands.draw_line(
                             Vec2(pos.position.x, y),
                             Vec2(pos.position.x + ext.extent.x, y),
                             cell_grid_color,
+                            layer=Layer.CANVASES,
+                            space=pos.space,
+                            entity=ent,
                         )
-
-            hal.pop_camera()
@@ -0,0 +1,11 @@
+import esper
+
+from dreamtable.hal import HAL
+
+
+class CommandBufferRenderer(esper.Processor):
+    """Sends the frame's draw commands to the HAL. Runs after every other renderer."""
+
+    def process(self, hal: HAL) -> None:
+        context = self.world.context
+        context.commands.flush(hal, context.cameras)
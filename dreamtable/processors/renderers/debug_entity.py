@@ -3,7 +3,8 @@ from typing import Optional
 import esper
 
 from dreamtable import components as c
-from dreamtable.hal import HAL, Color
+from dreamtable.constants import Layer
+from dreamtable.hal import HAL, Color, Vec2
 
 
 class DebugEntityRenderer(esper.Processor):
@@ -11,17 +12,21 @@ class DebugEntityRenderer(esper.Processor):
 
     def process(self, hal: HAL) -> None:
         theme = self.world.context.theme
+        commands = self.world.context.commands
+        text_cache = self.world.context.text_cache
 
         for ent, (_, pos, ext) in self.world.get_components(
             c.DebugEntity, c.Position, c.Extent
         ):
-            camera = self.world.context.cameras[pos.space]
-            hal.push_camera(camera)
+            if c.is_culled(self.world.context, ent, pos):
+                continue
 
             rect = c.rect(pos.position, ext.extent)
             color = theme.color_debug_magenta
 
-            hal.draw_rectangle_lines(rect.floored, 1, color)
+            commands.draw_rectangle_lines(
+                rect.floored, 1, color, layer=Layer.DEBUG, space=pos.space, entity=ent
+            )
 
             outline_color: Optional[Color] = None
 
@@ -34,15 +39,25 @@ class DebugEntityRenderer(esper.Processor):
                     outline_color = theme.color_selection_normal_outline
 
             if outline_color:
-                hal.draw_rectangle_lines(rect.grown(1), 1, outline_color)
+                commands.draw_rectangle_lines(
+                    rect.grown(1),
+                    1,
+                    outline_color,
+                    layer=Layer.DEBUG,
+                    space=pos.space,
+                    entity=ent,
+                )
 
             for name in self.world.try_component(ent, c.Name):
-                size = 8
-                spacing = 1
-                measurement = hal.measure_text(theme.font, name.name, size, spacing)
-                text_pos = rect.center - measurement / 2
-                hal.draw_text(
-                    theme.font, name.name, text_pos.floored, size, spacing, color,
+                label = text_cache.get(hal, theme.font, name.name, 8, 1)
+                text_pos = rect.center_into(Vec2())
+                text_pos.x -= label.size.x / 2
+                text_pos.y -= label.size.y / 2
+                commands.draw_texture(
+                    label.texture,
+                    text_pos.floor(),
+                    color,
+                    layer=Layer.DEBUG,
+                    space=pos.space,
+                    entity=ent,
                 )
-
-            hal.pop_camera()
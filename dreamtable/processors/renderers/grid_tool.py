@@ -1,7 +1,7 @@
 import esper
 
 from dreamtable import components as c
-from dreamtable.constants import Tool
+from dreamtable.constants import Layer, Tool
 from dreamtable.hal import HAL, Vec2
 
 
@@ -13,12 +13,13 @@ class GridToolRenderer(esper.Processor):
             return
 
         theme = context.theme
+        commands = context.commands
 
         for ent, (canvas, pos, ext, cellgrid) in self.world.get_components(
             c.Canvas, c.Position, c.Extent, c.CellGrid
         ):
-            camera = context.cameras[pos.space]
-            hal.push_camera(camera)
+            if c.is_culled(context, ent, pos):
+                continue
 
             cell_w = ext.extent.x / cellgrid.x
             cell_h = ext.extent.y / cellgrid.y
@@ -30,13 +31,14 @@ class GridToolRenderer(esper.Processor):
                 text_color = theme.color_text_error
                 cell_dimensions = f"{cell_w:.2f}x{cell_h:.2f}"
 
-            hal.draw_text(
-                theme.font,
-                str(f"{cellgrid.x}x{cellgrid.y} @ {cell_dimensions}"),
+            label = context.text_cache.get(
+                hal, theme.font, f"{cellgrid.x}x{cellgrid.y} @ {cell_dimensions}", 8, 1
+            )
+            commands.draw_texture(
+                label.texture,
                 pos.position + Vec2(0, -8),
-                8,
-                1,
                 text_color,
+                layer=Layer.LABELS,
+                space=pos.space,
+                entity=ent,
             )
-
-            hal.pop_camera()
@@ -1,6 +1,7 @@
 import esper
 
 from dreamtable import components as c
+from dreamtable.constants import Layer
 from dreamtable.hal import HAL, Vec2
 
 
@@ -9,20 +10,20 @@ class PositionMarkerRenderer(esper.Processor):
 
     def process(self, hal: HAL) -> None:
         theme = self.world.context.theme
+        commands = self.world.context.commands
 
         for _, (pos, mark) in self.world.get_components(c.Position, c.PositionMarker):
-            camera = self.world.context.cameras[pos.space]
-            hal.push_camera(camera)
-
-            hal.draw_line(
-                Vec2(pos.position.x - mark.size, pos.position.y).floored,
-                Vec2(pos.position.x + mark.size, pos.position.y).floored,
+            commands.draw_line(
+                Vec2(pos.position.x - mark.size, pos.position.y).floor(),
+                Vec2(pos.position.x + mark.size, pos.position.y).floor(),
                 theme.color_position_marker,
+                layer=Layer.MARKERS,
+                space=pos.space,
             )
-            hal.draw_line(
-                Vec2(pos.position.x, pos.position.y - mark.size).floored,
-                Vec2(pos.position.x, pos.position.y + mark.size).floored,
+            commands.draw_line(
+                Vec2(pos.position.x, pos.position.y - mark.size).floor(),
+                Vec2(pos.position.x, pos.position.y + mark.size).floor(),
                 theme.color_position_marker,
+                layer=Layer.MARKERS,
+                space=pos.space,
             )
-
-            hal.pop_camera()
@@ -1,18 +1,50 @@
+from typing import Any, Dict, List, Optional, Tuple
+
 import esper
 
 from dreamtable import components as c
+from dreamtable.constants import Layer, PositionSpace
 from dreamtable.hal import HAL
 
 
 class SpriteRegionRenderer(esper.Processor):
+    def __init__(self) -> None:
+        self._source: Optional[List[Any]] = None
+        self._sprites: Dict[int, Tuple[Any, ...]] = {}
+        self._unculled: List[int] = []
+
     def process(self, hal: HAL) -> None:
         context = self.world.context
-        for ent, (pos, ext, spr, img) in self.world.get_components(
-            c.Position, c.Extent, c.SpriteRegion, c.Image
-        ):
-            camera = context.cameras[pos.space]
-            hal.push_camera(camera)
-            hal.draw_texture_rect(
-                img.texture, c.rect(spr, ext.extent), pos.position.floored, spr.tint
+
+        query = self.world.get_components(c.Position, c.Extent, c.SpriteRegion, c.Image)
+        if query is not self._source:
+            self._source = query
+            self._sprites = dict(query)
+            self._unculled = [
+                ent for ent, (pos, *_) in query if pos.space != PositionSpace.WORLD
+            ]
+
+        # There can be a lot of sprites in the world, and few of them in view.
+        # Going through what's visible (in entity order, so overlapping sprites
+        # don't trade places between frames) is cheaper than culling them all.
+        if len(context.visible) < len(self._sprites):
+            in_view = self._unculled + [
+                ent for ent in context.visible if ent in self._sprites
+            ]
+            in_view.sort()
+        else:
+            in_view = list(self._sprites)
+
+        for ent in in_view:
+            pos, ext, spr, img = self._sprites[ent]
+            if c.is_culled(context, ent, pos) or not img.texture:
+                continue
+            context.commands.draw_texture_rect(
+                img.texture,
+                c.rect(spr, ext.extent),
+                c.interpolated(pos, self.world.alpha).floor(),
+                spr.tint,
+                layer=Layer.SPRITES,
+                space=pos.space,
+                entity=ent,
             )
-            hal.pop_camera()
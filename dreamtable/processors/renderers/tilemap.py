@@ -0,0 +1,260 @@
+import math
+from typing import Dict, List, Optional, Set, Tuple
+
+import esper
+import numpy as np
+
+from dreamtable import components as c
+from dreamtable.constants import Layer, PositionSpace
+from dreamtable.hal import HAL, Rect, TextureHandle, Vec2
+
+# Tiles along each side of a chunk
+CHUNK_TILES = 16
+
+# (column, row) of a chunk
+Chunk = Tuple[int, int]
+
+
+def chunks_where(mask: np.ndarray) -> Set[Chunk]:
+    """The chunks with any tile set in `mask`, a bool per tile."""
+    rows, columns = mask.shape
+    mask = np.pad(mask, ((0, -rows % CHUNK_TILES), (0, -columns % CHUNK_TILES)))
+    blocks = mask.reshape(
+        mask.shape[0] // CHUNK_TILES,
+        CHUNK_TILES,
+        mask.shape[1] // CHUNK_TILES,
+        CHUNK_TILES,
+    ).any(axis=(1, 3))
+    return {(int(x), int(y)) for y, x in np.argwhere(blocks)}
+
+
+def every_chunk(shape: Tuple[int, int]) -> Set[Chunk]:
+    """All the chunks of a map with `shape` (rows, columns) of tiles."""
+    rows, columns = shape
+    return {
+        (x, y)
+        for y in range(math.ceil(rows / CHUNK_TILES))
+        for x in range(math.ceil(columns / CHUNK_TILES))
+    }
+
+
+def cells_in(area: Rect, sheet_size: Vec2, cells: c.CellGrid) -> np.ndarray:
+    """The index of each cell of a sheet that overlaps `area`, in pixels."""
+    width, height = sheet_size.x // cells.x, sheet_size.y // cells.y
+    if not width or not height:
+        return np.zeros(0, np.intp)
+    left = max(math.floor(area.x / width), 0)
+    top = max(math.floor(area.y / height), 0)
+    right = min(math.ceil(area.right / width), cells.x)
+    bottom = min(math.ceil(area.bottom / height), cells.y)
+    columns, rows = np.meshgrid(np.arange(left, right), np.arange(top, bottom))
+    return (rows * cells.x + columns).ravel()
+
+
+class TilemapRenderer(esper.Processor):
+    """
+    Draws Tilemaps.
+
+    Each chunk of CHUNK_TILES x CHUNK_TILES tiles is rendered into a texture of
+    its own, so a map takes one draw per chunk in view rather than one per
+    tile. A chunk is only rendered again once one of its tiles changes, or the
+    pixels of a cell it shows do, and chunks out of view wait until they come
+    into it.
+    """
+
+    def __init__(self) -> None:
+        # The version of each source's Image as of the last frame, to tell
+        # which of them were drawn on since
+        self._versions: Dict[int, int] = {}
+
+    def _sheet_changes(
+        self, hal: HAL, sources: Dict[int, Tuple[c.Image, c.CellGrid]]
+    ) -> Dict[int, Optional[np.ndarray]]:
+        """
+        The cells of each source that were drawn on since the last call, or
+        None if they all might have been.
+        """
+        context = self.world.context
+        versions = {}
+        changes: Dict[int, Optional[np.ndarray]] = {}
+        for source, (img, cells) in sources.items():
+            versions[source] = img.version
+            last = self._versions.get(source)
+            if last == img.version:
+                continue
+            if last != img.version - 1 or img.updated is None:
+                # New, or updated more than once since: it's unknown where
+                changes[source] = None
+            elif cells.x > 0 and cells.y > 0:
+                sheet_size = context.pager.image_size(hal, source, img)
+                changes[source] = cells_in(img.updated, sheet_size, cells)
+
+        self._versions = versions
+        return changes
+
+    def process(self, hal: HAL) -> None:
+        context = self.world.context
+
+        # Sources may have been deleted out from under their tilemaps
+        sources = dict(self.world.get_components(c.Image, c.CellGrid))
+        tilemaps = [
+            (ent, tilemap, pos, ext)
+            for ent, (tilemap, pos, ext) in self.world.get_components(
+                c.Tilemap, c.Position, c.Extent
+            )
+            if tilemap.source in sources
+        ]
+
+        changes = self._sheet_changes(
+            hal, {t.source: sources[t.source] for _, t, _, _ in tilemaps}
+        )
+
+        is_waiting = False
+        for ent, tilemap, pos, ext in tilemaps:
+            img, cells = sources[tilemap.source]
+            if cells.x <= 0 or cells.y <= 0:
+                continue
+            if not img.image and tilemap.source not in context.pager:
+                continue
+            sheet_size = context.pager.image_size(hal, tilemap.source, img)
+            tile_size = Vec2(sheet_size.x // cells.x, sheet_size.y // cells.y)
+
+            self._find_stale(hal, tilemap, tile_size, changes)
+            rows, columns = tilemap.tiles.shape
+            ext.extent = Vec2(columns * tile_size.x, rows * tile_size.y)
+
+            if c.is_culled(context, ent, pos) or not tile_size.x or not tile_size.y:
+                continue
+
+            for chunk in self._chunks_in_view(tilemap, pos):
+                if chunk in tilemap.stale:
+                    if not img.texture:
+                        # Its texture is uploaded once this is visible
+                        is_waiting = True
+                        continue
+                    self._render_chunk(hal, tilemap, chunk, img.texture, cells)
+                    tilemap.stale.discard(chunk)
+                    context.scene_version += 1
+
+                texture = tilemap.chunks.get(chunk)
+                if texture is None:
+                    continue
+                x, y = chunk
+                context.commands.draw_texture(
+                    texture,
+                    Vec2(
+                        pos.position.x + x * CHUNK_TILES * tile_size.x,
+                        pos.position.y + y * CHUNK_TILES * tile_size.y,
+                    ),
+                    layer=Layer.CANVASES,
+                    space=pos.space,
+                    entity=ent,
+                )
+
+        if is_waiting:
+            hal.request_frame()
+
+    def _find_stale(
+        self,
+        hal: HAL,
+        tilemap: c.Tilemap,
+        tile_size: Vec2,
+        changes: Dict[int, Optional[np.ndarray]],
+    ) -> None:
+        """Add the chunks that changed since the last frame to `stale`."""
+        tiles = tilemap.tiles
+        is_resized = (
+            tilemap.last_tiles is None
+            or tilemap.last_tiles.shape != tiles.shape
+            or tile_size != tilemap.tile_size
+        )
+        is_edited = tilemap.version != tilemap.last_version
+        if is_resized:
+            # Chunk textures are sized to fit, so start over
+            for texture in tilemap.chunks.values():
+                hal.unload_texture(texture)
+            tilemap.chunks = {}
+            tilemap.tile_size = tile_size.copy()
+            tilemap.stale = every_chunk(tiles.shape)
+        elif is_edited:
+            tilemap.stale |= chunks_where(tiles != tilemap.last_tiles)
+        if is_resized or is_edited:
+            tilemap.last_tiles = tiles.copy()
+            tilemap.last_version = tilemap.version
+
+        if tilemap.source in changes:
+            cells = changes[tilemap.source]
+            if cells is None:
+                tilemap.stale = every_chunk(tiles.shape)
+            elif len(cells):
+                tilemap.stale |= chunks_where(np.isin(tiles, cells))
+
+    def _chunks_in_view(self, tilemap: c.Tilemap, pos: c.Position) -> List[Chunk]:
+        rows, columns = tilemap.tiles.shape
+        chunk_columns = math.ceil(columns / CHUNK_TILES)
+        chunk_rows = math.ceil(rows / CHUNK_TILES)
+        if pos.space != PositionSpace.WORLD:
+            return [(x, y) for y in range(chunk_rows) for x in range(chunk_columns)]
+
+        width = CHUNK_TILES * tilemap.tile_size.x
+        height = CHUNK_TILES * tilemap.tile_size.y
+        in_view: Set[Chunk] = set()
+        for view in self.world.context.views:
+            left = max(math.floor((view.x - pos.position.x) / width), 0)
+            top = max(math.floor((view.y - pos.position.y) / height), 0)
+            right = min(
+                math.ceil((view.x + view.width - pos.position.x) / width),
+                chunk_columns,
+            )
+            bottom = min(
+                math.ceil((view.y + view.height - pos.position.y) / height),
+                chunk_rows,
+            )
+            in_view.update(
+                (x, y) for y in range(top, bottom) for x in range(left, right)
+            )
+
+        # In order, so chunks are drawn the same way every frame
+        return sorted(in_view, key=lambda chunk: (chunk[1], chunk[0]))
+
+    def _render_chunk(
+        self,
+        hal: HAL,
+        tilemap: c.Tilemap,
+        chunk: Chunk,
+        source_texture: TextureHandle,
+        cells: c.CellGrid,
+    ) -> None:
+        x, y = chunk
+        rows = slice(y * CHUNK_TILES, (y + 1) * CHUNK_TILES)
+        columns = slice(x * CHUNK_TILES, (x + 1) * CHUNK_TILES)
+        block = tilemap.tiles[rows, columns]
+        shown = (block >= 0) & (block < cells.x * cells.y)
+
+        texture = tilemap.chunks.pop(chunk, None)
+        if not shown.any():
+            if texture is not None:
+                hal.unload_texture(texture)
+            return
+
+        tile_size = tilemap.tile_size
+        if texture is None:
+            texture = hal.load_render_texture(
+                Vec2(block.shape[1] * tile_size.x, block.shape[0] * tile_size.y)
+            )
+        tilemap.chunks[chunk] = texture
+
+        hal.begin_texture_mode(texture)
+        for tile_y, tile_x in np.argwhere(shown).tolist():
+            row, column = divmod(int(block[tile_y, tile_x]), cells.x)
+            hal.draw_texture_rect(
+                source_texture,
+                Rect(
+                    column * tile_size.x,
+                    row * tile_size.y,
+                    tile_size.x,
+                    tile_size.y,
+                ),
+                Vec2(tile_x * tile_size.x, tile_y * tile_size.y),
+            )
+        hal.end_texture_mode()
@@ -0,0 +1,88 @@
+import esper
+
+from dreamtable import components as c
+from dreamtable.command_buffer import draw_commands
+from dreamtable.constants import Layer, PositionSpace
+from dreamtable.hal import HAL, Rect
+
+
+class ViewportRenderer(esper.Processor):
+    """
+    Draws Viewports, by replaying this frame's world space draw commands
+    through each viewport's camera into its texture.
+
+    Runs after every other renderer that draws the world. A viewport's texture
+    is only redrawn when its camera or what it can see has changed.
+    """
+
+    def process(self, hal: HAL) -> None:
+        context = self.world.context
+        theme = context.theme
+
+        # Where moving things are drawn depends on how far between simulation
+        # steps we are
+        alpha = self.world.alpha if context.motion.moving else None
+
+        world_commands = None
+        for ent, (pos, ext, vp) in self.world.get_components(
+            c.Position, c.Extent, c.Viewport
+        ):
+            size = ext.extent.floored
+            if vp.texture is None or size != vp.texture_size:
+                if vp.texture is not None:
+                    hal.unload_texture(vp.texture)
+                vp.texture = hal.load_render_texture(size)
+                vp.texture_size = size
+                vp.signature = None
+
+            # Built from counters rather than from the commands themselves, so
+            # telling that nothing changed doesn't cost a look at each one
+            camera = vp.camera
+            signature = (
+                camera.target.xy,
+                camera.offset.xy,
+                camera.rotation,
+                camera.zoom,
+                context.texture_version,
+                context.scene_version,
+                context.selection_version,
+                vp.visible_version,
+                alpha,
+            )
+
+            if signature != vp.signature:
+                if world_commands is None:
+                    world_commands = [
+                        command
+                        for command in context.commands.commands
+                        if command.space == PositionSpace.WORLD
+                    ]
+                commands = [
+                    command
+                    for command in world_commands
+                    if command.entity is None or command.entity in vp.visible
+                ]
+
+                hal.begin_texture_mode(vp.texture)
+                hal.draw_rectangle(
+                    Rect.from_size(size.x, size.y), theme.color_background
+                )
+                draw_commands(hal, {PositionSpace.WORLD: camera}, commands)
+                hal.end_texture_mode()
+                vp.signature = signature
+
+            context.commands.draw_texture(
+                vp.texture,
+                pos.position,
+                layer=Layer.VIEWPORTS,
+                space=pos.space,
+                entity=ent,
+            )
+            context.commands.draw_rectangle_lines(
+                c.rect(pos.position, ext.extent).grown(1),
+                1,
+                theme.color_thingy_outline,
+                layer=Layer.VIEWPORTS,
+                space=pos.space,
+                entity=ent,
+            )
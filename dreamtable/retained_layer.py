@@ -0,0 +1,50 @@
+"""
+Retained drawing, for things that rarely change.
+"""
+
+from typing import Hashable, Mapping, Optional
+
+from dreamtable.command_buffer import CommandBuffer
+from dreamtable.constants import PositionSpace
+from dreamtable.hal import HAL, Camera, TextureHandle, Vec2
+
+
+class RetainedLayer:
+    """
+    A screen-sized render texture holding the result of a set of draw commands.
+
+    Each frame, the owner describes what the layer should show with a hashable
+    signature. Only when the signature changes does the owner need to record
+    commands into `commands` and call `redraw()`; otherwise the texture from
+    last time is still good, and can be drawn as-is.
+    """
+
+    def __init__(self) -> None:
+        self.commands = CommandBuffer()
+        self.texture: Optional[TextureHandle] = None
+        self._size = Vec2()
+        self._signature: Optional[Hashable] = None
+
+    def is_stale(self, hal: HAL, signature: Hashable) -> bool:
+        screen_size = hal.get_screen_size().floored
+        if self.texture is None or screen_size != self._size:
+            if self.texture is not None:
+                hal.unload_texture(self.texture)
+            self.texture = hal.load_render_texture(screen_size)
+            self._size = screen_size
+            self._signature = None
+
+        return signature != self._signature
+
+    def redraw(
+        self,
+        hal: HAL,
+        cameras: Mapping[PositionSpace, Camera],
+        signature: Hashable,
+    ) -> None:
+        """Replace the texture's contents with the recorded commands."""
+        assert self.texture is not None
+        hal.begin_texture_mode(self.texture)
+        self.commands.flush(hal, cameras)
+        hal.end_texture_mode()
+        self._signature = signature
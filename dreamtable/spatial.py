@@ -0,0 +1,215 @@
+"""
+Spatial indexing, for finding out what's in view without looking at everything.
+"""
+
+from collections import defaultdict
+import math
+from typing import (
+    Any,
+    DefaultDict,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+import numpy as np
+
+from dreamtable.constants import PositionSpace
+from dreamtable.hal import Rect, RectArray
+from dreamtable.motion_store import MotionStore
+
+Cell = Tuple[int, int]
+CellRange = Tuple[int, int, int, int]
+
+
+class SpatialHash:
+    """
+    Buckets rectangles into a uniform grid of square cells.
+
+    Queries are answered at cell granularity: an entity is reported if any
+    cell it touches overlaps the query rect, so results may include things
+    just outside of it.
+    """
+
+    def __init__(self, cell_size: float = 128) -> None:
+        self.cell_size = cell_size
+        self._cells: DefaultDict[Cell, Set[int]] = defaultdict(set)
+        self._ranges: Dict[int, CellRange] = {}
+
+    def __len__(self) -> int:
+        return len(self._ranges)
+
+    def __contains__(self, entity: int) -> bool:
+        return entity in self._ranges
+
+    def _cell_range(self, rect: Rect) -> CellRange:
+        # Rects with negative extents (e.g. box selections) are fine too
+        x1, x2 = sorted((rect.x, rect.x + rect.width))
+        y1, y2 = sorted((rect.y, rect.y + rect.height))
+        size = self.cell_size
+        return (
+            math.floor(x1 / size),
+            math.floor(y1 / size),
+            math.floor(x2 / size),
+            math.floor(y2 / size),
+        )
+
+    def _cells_in(self, cell_range: CellRange) -> Iterable[Cell]:
+        x1, y1, x2, y2 = cell_range
+        for x in range(x1, x2 + 1):
+            for y in range(y1, y2 + 1):
+                yield x, y
+
+    def update(self, entity: int, rect: Rect) -> None:
+        """Insert an entity, or move it if it's already here."""
+        cell_range = self._cell_range(rect)
+        old_range = self._ranges.get(entity)
+        if cell_range == old_range:
+            return
+
+        if old_range is not None:
+            self.remove(entity)
+
+        self._ranges[entity] = cell_range
+        for cell in self._cells_in(cell_range):
+            self._cells[cell].add(entity)
+
+    def remove(self, entity: int) -> None:
+        for cell in self._cells_in(self._ranges.pop(entity)):
+            entities = self._cells[cell]
+            entities.discard(entity)
+            if not entities:
+                del self._cells[cell]
+
+    def retain(self, entities: Set[int]) -> None:
+        """Remove every entity that isn't in the given set."""
+        for entity in [e for e in self._ranges if e not in entities]:
+            self.remove(entity)
+
+    def query_many(self, rects: Sequence[Rect]) -> List[Set[int]]:
+        """
+        Find what's in each of several rects, visiting each occupied cell at
+        most once no matter how many of the rects overlap it.
+        """
+        results: List[Set[int]] = [set() for _ in rects]
+        ranges = [self._cell_range(rect) for rect in rects]
+
+        # Zoomed far out, it's cheaper to go through the occupied cells than
+        # every cell in view
+        area = sum((x2 - x1 + 1) * (y2 - y1 + 1) for x1, y1, x2, y2 in ranges)
+        if area > len(self._cells):
+            for (x, y), entities in self._cells.items():
+                for i, (x1, y1, x2, y2) in enumerate(ranges):
+                    if x1 <= x <= x2 and y1 <= y <= y2:
+                        results[i] |= entities
+            return results
+
+        covering: DefaultDict[Cell, List[int]] = defaultdict(list)
+        for i, cell_range in enumerate(ranges):
+            for cell in self._cells_in(cell_range):
+                covering[cell].append(i)
+
+        for cell, indices in covering.items():
+            entities = self._cells.get(cell)
+            if entities:
+                for i in indices:
+                    results[i] |= entities
+
+        return results
+
+
+def query_points(
+    points: np.ndarray, rects: Sequence[Rect], margin: float = 0
+) -> List[np.ndarray]:
+    """
+    Find which of an (n, 2) array of points fall in each rect (grown by
+    `margin`), returning an array of row indices for each.
+
+    For things that move every frame, testing all of them with a few array
+    operations is cheaper than keeping them bucketed.
+    """
+    x = points[:, 0]
+    y = points[:, 1]
+    results = []
+    for rect in rects:
+        x1, x2 = sorted((rect.x, rect.x + rect.width))
+        y1, y2 = sorted((rect.y, rect.y + rect.height))
+        inside = (
+            (x >= x1 - margin)
+            & (x <= x2 + margin)
+            & (y >= y1 - margin)
+            & (y <= y2 + margin)
+        )
+        results.append(np.flatnonzero(inside))
+    return results
+
+
+class EntityBounds:
+    """
+    The bounding rects of the entities in one space from a (Position, Extent,
+    ...) query, kept as a RectArray so they can be tested all at once.
+
+    Rows for entities in the MotionStore are refreshed with array operations,
+    and their extents are assumed not to change while they're in it; anything
+    else is refreshed one by one.
+    """
+
+    def __init__(self, space: PositionSpace) -> None:
+        self.space = space
+        self.entities: List[int] = []
+        self.components: List[Any] = []
+        self.rects = RectArray()
+
+        self._source: Optional[List[Any]] = None
+        self._store_version = -1
+        self._store_rows = np.zeros(0, dtype=np.int64)
+        self._store_indices = np.zeros(0, dtype=np.int64)
+        self._others: List[Tuple[int, Any, Any]] = []
+
+    def update(self, query: List[Any], store: MotionStore) -> bool:
+        """
+        Bring the rects up to date. Returns True if the set of entities (and
+        with it, the meaning of each row) changed.
+        """
+        resynced = query is not self._source or store.version != self._store_version
+        if resynced:
+            self._sync(query, store)
+
+        data = self.rects.data
+        if len(self._store_indices):
+            data[self._store_indices, :2] = store.position[self._store_rows]
+        for i, pos, ext in self._others:
+            data[i] = (pos.position.x, pos.position.y, ext.extent.x, ext.extent.y)
+
+        return resynced
+
+    def _sync(self, query: List[Any], store: MotionStore) -> None:
+        self._source = query
+        self._store_version = store.version
+
+        rows = [
+            (ent, pos, ext, component)
+            for ent, (pos, ext, component) in query
+            if pos.space == self.space
+        ]
+        self.entities = [ent for ent, *_ in rows]
+        self.components = [component for *_, component in rows]
+        self.rects = RectArray(np.zeros((len(rows), 4)))
+
+        store_rows = []
+        store_indices = []
+        self._others = []
+        for i, (ent, pos, ext, _) in enumerate(rows):
+            if ent in store:
+                store_rows.append(store.rows[ent])
+                store_indices.append(i)
+                self.rects.data[i, 2:] = ext.extent.xy
+            else:
+                self._others.append((i, pos, ext))
+
+        self._store_rows = np.array(store_rows, dtype=np.int64)
+        self._store_indices = np.array(store_indices, dtype=np.int64)
@@ -0,0 +1,77 @@
+"""
+Pre-rendered text.
+
+Laying out a string glyph by glyph is slow compared to drawing one texture, and
+most labels don't change from frame to frame. The cache keeps a measurement and
+a white render of each string it's asked for, to be tinted when drawn.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+import math
+from typing import Tuple
+
+from dreamtable.hal import HAL, Color, FontHandle, TextureHandle, Vec2
+
+WHITE = Color(255, 255, 255, 255)
+
+TextKey = Tuple[FontHandle, str, float, float]
+
+
+@dataclass
+class CachedText:
+    # What hal.measure_text() returned for the text
+    size: Vec2
+
+    # The text rendered in white, to be drawn with the desired color as a tint
+    texture: TextureHandle
+
+
+class TextCache:
+    """
+    Least-recently-used cache of CachedText, keyed by (font, text, size,
+    spacing).
+
+    Textures handed out by get() are drawn later, when the frame's commands are
+    flushed, so the cache only shrinks when trim() is called after that.
+    """
+
+    def __init__(self, capacity: int = 256) -> None:
+        self.capacity = capacity
+        self._entries: "OrderedDict[TextKey, CachedText]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(
+        self, hal: HAL, font: FontHandle, text: str, size: float, spacing: float
+    ) -> CachedText:
+        key = (font, text, size, spacing)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry
+
+        measurement = hal.measure_text(font, text, size, spacing)
+        texture_size = Vec2(
+            max(1, math.ceil(measurement.x)), max(1, math.ceil(measurement.y))
+        )
+        texture = hal.load_render_texture(texture_size)
+        hal.begin_texture_mode(texture)
+        hal.draw_text(font, text, Vec2(0, 0), size, spacing, WHITE)
+        hal.end_texture_mode()
+
+        entry = CachedText(measurement, texture)
+        self._entries[key] = entry
+        return entry
+
+    def trim(self, hal: HAL) -> None:
+        """Unload the least recently used entries until we're within capacity."""
+        while len(self._entries) > self.capacity:
+            _, entry = self._entries.popitem(last=False)
+            hal.unload_texture(entry.texture)
+
+    def clear(self, hal: HAL) -> None:
+        for entry in self._entries.values():
+            hal.unload_texture(entry.texture)
+        self._entries.clear()
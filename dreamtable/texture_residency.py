@@ -0,0 +1,96 @@
+"""
+Bookkeeping for which Image textures are uploaded to the GPU.
+"""
+
+from collections import OrderedDict
+from typing import Dict, Iterable, List
+
+# Images are kept as R8G8B8A8
+BYTES_PER_PIXEL = 4
+
+
+class TextureResidency:
+    """
+    Tracks the uploaded texture of each entity with an Image, in the order
+    they were last drawn, so that once they take up more than `budget` bytes
+    the ones that have been off-screen longest can be dropped. Their CPU-side
+    images stay around, to upload them again when they come back into view.
+
+    Tracking by entity relies on each entity's texture being its own (the HAL
+    hands out a new handle per load): evicting one never unloads a texture
+    someone else is drawing, and no texture is counted twice.
+    """
+
+    def __init__(self, budget: int = 256 * 2**20) -> None:
+        self.budget = budget
+
+        # Bumped once per rendered frame
+        self.frame = 0
+
+        # Bytes of textures that are uploaded, and of textures that were
+        # evicted and haven't been uploaded again since
+        self.resident_bytes = 0
+        self.evicted_bytes = 0
+
+        # How many textures have been evicted, ever
+        self.evictions = 0
+
+        # Least recently drawn first
+        self._resident: "OrderedDict[int, int]" = OrderedDict()
+        self._last_drawn: Dict[int, int] = {}
+        self._evicted: Dict[int, int] = {}
+
+    def __contains__(self, entity: int) -> bool:
+        return entity in self._resident
+
+    def __len__(self) -> int:
+        return len(self._resident)
+
+    def add(self, entity: int, nbytes: int) -> None:
+        """Record that `entity` has an uploaded texture taking `nbytes`."""
+        self.discard(entity)
+        self._resident[entity] = nbytes
+        self._last_drawn[entity] = self.frame
+        self.resident_bytes += nbytes
+
+    def discard(self, entity: int) -> None:
+        """Forget about `entity`, e.g. because it was deleted."""
+        if entity in self._resident:
+            self.resident_bytes -= self._resident.pop(entity)
+            del self._last_drawn[entity]
+        if entity in self._evicted:
+            self.evicted_bytes -= self._evicted.pop(entity)
+
+    def retain(self, entities: Iterable[int]) -> None:
+        """Forget about every entity not in `entities`."""
+        keep = set(entities)
+        for entity in [e for e in self._resident if e not in keep]:
+            self.discard(entity)
+        for entity in [e for e in self._evicted if e not in keep]:
+            self.discard(entity)
+
+    def touch(self, entity: int) -> None:
+        """Record that `entity`'s texture is being drawn this frame."""
+        self._resident.move_to_end(entity)
+        self._last_drawn[entity] = self.frame
+
+    def evict(self) -> List[int]:
+        """
+        Pick textures to unload until we're within budget, least recently
+        drawn first. Textures drawn this frame are never picked, even if that
+        leaves us over budget.
+        """
+        evicted = []
+        while self.resident_bytes > self.budget and self._resident:
+            entity = next(iter(self._resident))
+            if self._last_drawn[entity] == self.frame:
+                break
+
+            nbytes = self._resident.pop(entity)
+            del self._last_drawn[entity]
+            self.resident_bytes -= nbytes
+            self._evicted[entity] = nbytes
+            self.evicted_bytes += nbytes
+            self.evictions += 1
+            evicted.append(entity)
+        return evicted
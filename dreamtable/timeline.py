@@ -0,0 +1,45 @@
+"""
+Timelines compiled for playback.
+"""
+
+from bisect import bisect_right
+from itertools import accumulate
+import math
+from typing import List, Sequence, Tuple
+
+from dreamtable.hal import Vec2
+
+
+class FrameSchedule:
+    """
+    A Timeline's frames, as the time each one ends and the cell it shows, so
+    that the frame at any time is a binary search away. Frames with no
+    duration are never shown.
+    """
+
+    def __init__(self, frames: Sequence[Tuple[Vec2, float]], loop: bool) -> None:
+        if not frames:
+            raise ValueError("A timeline needs at least one frame")
+        self.ends: List[float] = list(accumulate(max(d, 0.0) for _, d in frames))
+        self.cells: List[Tuple[int, int]] = [
+            (int(cell.x), int(cell.y)) for cell, _ in frames
+        ]
+        self.duration = self.ends[-1]
+        self.loop = loop
+
+    def frame_at(self, time: float) -> Tuple[int, float]:
+        """
+        Which frame shows `time` seconds in, and how many seconds until the
+        next frame does (inf if none ever will).
+        """
+        last = len(self.ends) - 1
+        if self.duration <= 0:
+            return 0, math.inf
+        if self.loop:
+            time %= self.duration
+        elif time >= self.duration:
+            return last, math.inf
+        else:
+            time = max(time, 0.0)
+        index = min(bisect_right(self.ends, time), last)
+        return index, max(self.ends[index] - time, 0.0)
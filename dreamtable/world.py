@@ -0,0 +1,112 @@
+from typing import Any, Dict, List, Type
+
+import esper
+
+from dreamtable.constants import Phase
+from dreamtable.hal import HAL
+from dreamtable.input_handler import InputHandler
+
+
+class World(esper.World):
+    """
+    An esper World that runs its processors in phases.
+
+    UPDATE, RENDER and CLEANUP processors run once per displayed frame.
+    SIMULATE processors run at a fixed timestep: each frame's elapsed time goes
+    into an accumulator, and the simulation steps as many times as fit. That
+    keeps simulation speed independent of the frame rate, and lets rendering
+    fall behind (or run ahead) without affecting it.
+
+    InputHandlers that don't override process() only get routed input, and
+    aren't run every frame.
+    """
+
+    def __init__(self, timestep: float = 1 / 60, max_steps: int = 5) -> None:
+        super().__init__()
+        self.timestep = timestep
+
+        # Upper bound on simulation steps per frame, so a long stall (or
+        # waking up from idle) doesn't turn into a burst of catch-up work
+        self.max_steps = max_steps
+
+        self.accumulator = 0.0
+
+        # How far between the last two simulation steps we are, from 0 to 1.
+        # Renderers can use this to interpolate moving things.
+        self.alpha = 1.0
+
+        self._phases: Dict[Phase, List[esper.Processor]] = {p: [] for p in Phase}
+
+        # Input handlers subscribed to each event type, in dispatch order
+        self.input_handlers: Dict[type, List[InputHandler]] = {}
+
+        self._is_simulating = False
+
+    def add_processor(
+        self,
+        processor_instance: esper.Processor,
+        priority: int = 0,
+        phase: Phase = Phase.UPDATE,
+    ) -> None:
+        processor_instance.phase = phase
+        super().add_processor(processor_instance, priority)
+        self._sort_phases()
+
+    def remove_processor(self, processor_type: Type[esper.Processor]) -> None:
+        super().remove_processor(processor_type)
+        self._sort_phases()
+
+    def _sort_phases(self) -> None:
+        # New lists rather than updating in place, so processors can be added
+        # or removed by a phase that is running
+        self._phases = {
+            phase: [
+                p
+                for p in self._processors
+                if p.phase == phase and type(p).process is not esper.Processor.process
+            ]
+            for phase in Phase
+        }
+
+        handlers = sorted(
+            (p for p in self._processors if isinstance(p, InputHandler)),
+            key=lambda p: (p.input_layer, -p.input_priority),
+        )
+        self.input_handlers = {}
+        for handler in handlers:
+            for event_type in handler.input_events:
+                self.input_handlers.setdefault(event_type, []).append(handler)
+
+    def _run_phase(self, phase: Phase, *args: Any) -> None:
+        for processor in self._phases[phase]:
+            processor.process(*args)
+
+    def process(self, hal: HAL) -> None:
+        # esper clears its query cache every frame; only do that when some
+        # entity actually died, so unchanged queries stay cached
+        if self._dead_entities:
+            self._clear_dead_entities()
+
+        self.accumulator += min(hal.get_frame_time(), self.timestep * self.max_steps)
+
+        self._run_phase(Phase.UPDATE, hal)
+
+        steps = 0
+        while self.accumulator >= self.timestep:
+            if self._dead_entities:
+                self._clear_dead_entities()
+            self._run_phase(Phase.SIMULATE, hal)
+            self.accumulator -= self.timestep
+            steps += 1
+
+        # Frames without a simulation step still count as busy if the
+        # simulation was, or an idle backend would stall between steps
+        if steps:
+            self._is_simulating = hal.is_frame_requested()
+        elif self._is_simulating:
+            hal.request_frame()
+
+        self.alpha = self.accumulator / self.timestep
+
+        self._run_phase(Phase.RENDER, hal)
+        self._run_phase(Phase.CLEANUP, hal)